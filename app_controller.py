@@ -1,6 +1,9 @@
 from gui.pharmacy_app import PharmacyApp
+from gui.startup_profile import profile
 
-def start_main_app(root):
+def start_main_app(root, session=None):
+    profile.mark("Logged in")
     for widget in root.winfo_children():
         widget.destroy()
-    app = PharmacyApp(root)
\ No newline at end of file
+    with profile.phase("Main window"):
+        app = PharmacyApp(root, session)
\ No newline at end of file
@@ -1,8 +1,56 @@
 # Rename this file to config.py and fill in your own database credentials
 
+# Database backend: 'mysql' or 'sqlite' (embedded, no server needed)
+DB_BACKEND = 'mysql'
+
+# Database file used when DB_BACKEND is 'sqlite'; ':memory:' uses a temporary file deleted at exit
+SQLITE_PATH = 'pharmacy.db'
+
 DB_CONFIG = {
     'host': 'localhost',
     'user': 'your_username',
     'password': 'your_password',
     'database': 'your_database_name'
 }
+
+# Optional connection pool settings
+POOL_CONFIG = {
+    'max_size': 5,                # Maximum number of open connections
+    'timeout': 10,                # Seconds to wait for a free connection
+    'health_check_interval': 30   # Ping connections idle for longer than this (seconds)
+}
+
+# New bill, medicine, supplier and customer ids are reserved from the database this many at a time
+ID_BLOCK_SIZE = 50
+
+# Print a breakdown of startup time (imports, login, main window, each tab on first use)
+STARTUP_PROFILE = False
+
+# Rendered bill PDFs are cached here and reused for reprints (default: a folder in the system temp dir)
+PDF_CACHE_DIR = None
+PDF_CACHE_MAX_MB = 200
+
+# TrueType fonts for invoices; they need the rupee sign. Left as None, DejaVu Sans, Nirmala UI
+# or Arial is used if installed, otherwise Helvetica with "Rs."
+PDF_FONT_PATH = None
+PDF_BOLD_FONT_PATH = None
+
+# Receipt printer for the bill preview's Print button: a device path (e.g. '/dev/usb/lp0', 'COM3',
+# r'\\localhost\Receipt') or a folder to spool receipts into (default: 'receipts')
+RECEIPT_PRINTER = None
+RECEIPT_FORMAT = 'escpos'   # or 'text'
+RECEIPT_WIDTH = 48          # characters per line: 48 for 80mm paper, 32 for 58mm
+
+# Query statistics (Diagnostics button) and the slow-query log
+QUERY_STATS = True
+SLOW_QUERY_MS = 200                   # log statements slower than this; None turns the log off
+SLOW_QUERY_LOG = 'slow_queries.log'
+SLOW_QUERY_EXPLAIN = False            # also log the EXPLAIN plan of slow SELECTs
+SLOW_QUERY_PARAMS = False             # also log parameters (they include login passwords)
+
+# UI latency tracing: every click, callback, background task and query is recorded and written
+# as a Chrome trace (open in chrome://tracing or ui.perfetto.dev) on exit or from Diagnostics
+UI_TRACE = False
+UI_TRACE_FILE = 'ui_trace.json'
+UI_STALL_MS = 500                     # log the stack of callbacks blocking the window this long; None = off
+UI_STALL_LOG = 'ui_stalls.log'
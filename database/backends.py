@@ -0,0 +1,191 @@
+import datetime
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import weakref
+from decimal import Decimal
+from database import schema
+
+
+class MySQLBackend:
+    """Live MySQL server configured through config.DB_CONFIG"""
+
+    label = "MySQL"
+    paramstyle = "%s"
+    explain_prefix = "EXPLAIN "
+
+    def __init__(self, db_config):
+        import mysql.connector
+        self._mysql = mysql.connector
+        self.db_config = db_config
+        self.Error = mysql.connector.Error
+
+    def connect(self):
+        return self._mysql.connect(**self.db_config)
+
+    def is_healthy(self, connection):
+        # ping raises if the server has gone away
+        connection.ping(reconnect=False)
+        return True
+
+    def cursor(self, connection):
+        return connection.cursor(dictionary=True)
+
+    def translate(self, query):
+        return query
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def _convert_date(value):
+    return datetime.date.fromisoformat(value.decode()[:10])
+
+
+def _convert_timestamp(value):
+    return datetime.datetime.fromisoformat(value.decode())
+
+
+_CENTS = Decimal("0.01")
+
+
+def _convert_decimal(value):
+    # SQLite's numeric affinity drops trailing zeros; restore MySQL's DECIMAL(x, 2) scale
+    return Decimal(value.decode()).quantize(_CENTS)
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DECIMAL", _convert_decimal)
+
+_INTERVAL_UNITS = {'DAY': 'days', 'MONTH': 'months', 'YEAR': 'years'}
+
+# (pattern, replacement) pairs rewriting the MySQL dialect used in repositories/
+_REWRITES = [
+    (re.compile(r"\bSEPARATOR\s+('(?:[^']|'')*')", re.I), r", \1"),
+    (re.compile(r"\bYEAR\(((?:[^()]|\([^()]*\))+)\)", re.I), r"CAST(strftime('%Y', \1) AS INTEGER)"),
+    (re.compile(r"\bMONTH\(((?:[^()]|\([^()]*\))+)\)", re.I), r"CAST(strftime('%m', \1) AS INTEGER)"),
+    (re.compile(r"\bCURDATE\(\)", re.I), "DATE('now', 'localtime')"),
+    (re.compile(r"\bNOW\(\)", re.I), "DATETIME('now', 'localtime')"),
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+]
+
+_DATE_INTERVAL = re.compile(
+    r"\bDATE_(ADD|SUB)\(((?:[^,()]|\([^()]*\))+),\s*INTERVAL\s+(\d+|%s)\s+(DAY|MONTH|YEAR)\)", re.I)
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_INSERT_TABLE = re.compile(r"\bINSERT\s+(?:IGNORE\s+)?INTO\s+(\w+)", re.I)
+_UPSERT_VALUE = re.compile(r"\bVALUES\((\w+)\)", re.I)
+
+
+class SQLiteBackend:
+    """Embedded SQLite database, used for benchmarks and runs without MySQL.
+
+    path may be a file name or ':memory:'. The schema from
+    database_schema.md is created on first connect.
+
+    ':memory:' is served from a throwaway temporary file, deleted on
+    close() or at exit. SQLite's shared-cache in-memory databases fail
+    concurrent writers with SQLITE_LOCKED, which busy_timeout does not wait
+    out, so the multi-threaded tools would fail spuriously against them; a
+    WAL file left to the OS page cache is nearly as fast and locks properly.
+    """
+
+    label = "SQLite"
+    paramstyle = "?"
+    explain_prefix = "EXPLAIN QUERY PLAN "
+    Error = sqlite3.Error
+
+    def __init__(self, path="pharmacy.db", busy_timeout=30, create_schema=True):
+        self.busy_timeout = busy_timeout
+        self.create_schema = create_schema
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._translations = {}
+        self._cleanup = None
+
+        if path == ":memory:":
+            handle, self.path = tempfile.mkstemp(prefix="pharmacy_", suffix=".db")
+            os.close(handle)
+            self._cleanup = weakref.finalize(self, _remove_database, self.path)
+        else:
+            self.path = path
+
+    def _open(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        connection.row_factory = _dict_row
+        return connection
+
+    def connect(self):
+        connection = self._open()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        if self.create_schema and not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.executescript(";\n".join(schema.sqlite_statements()) + ";")
+                    self._schema_ready = True
+        return connection
+
+    def is_healthy(self, connection):
+        connection.execute("SELECT 1")
+        return True
+
+    def cursor(self, connection):
+        return connection.cursor()
+
+    def translate(self, query):
+        translated = self._translations.get(query)
+        if translated is None:
+            translated = self._translate(query)
+            self._translations[query] = translated
+        return translated
+
+    def _translate(self, query):
+        translated = _DATE_INTERVAL.sub(self._date_interval, query)
+
+        upsert = _UPSERT.search(translated)
+        if upsert:
+            table = _INSERT_TABLE.search(translated).group(1)
+            keys = ", ".join(schema.PRIMARY_KEYS[table])
+            assignments = _UPSERT_VALUE.sub(r"excluded.\1", translated[upsert.end():])
+            translated = (translated[:upsert.start()]
+                          + f"ON CONFLICT ({keys}) DO UPDATE SET" + assignments)
+
+        for pattern, replacement in _REWRITES:
+            translated = pattern.sub(replacement, translated)
+
+        return translated.replace("%s", "?")
+
+    @staticmethod
+    def _date_interval(match):
+        function, value, amount, unit = match.groups()
+        sign = "+" if function.upper() == "ADD" else "-"
+        unit = _INTERVAL_UNITS[unit.upper()]
+        if amount == "%s":
+            return f"DATE({value}, '{sign}' || %s || ' {unit}')"
+        return f"DATE({value}, '{sign}{amount} {unit}')"
+
+    def close(self):
+        # Deletes the temporary file behind ':memory:'; a named database file is kept
+        if self._cleanup is not None:
+            self._cleanup()
+
+
+def _remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
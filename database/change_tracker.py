@@ -0,0 +1,69 @@
+import threading
+from collections import deque
+
+
+class ChangeTracker:
+    """Version counter bumped by every write the repositories commit.
+
+    Each change is logged as (version, table, keys) so caches can ask what
+    changed since the version they last saw instead of reloading whole
+    tables. keys is None when the writer cannot say which rows it touched.
+    """
+
+    def __init__(self, history=1000):
+        self._lock = threading.Lock()
+        self._log = deque(maxlen=history)
+        self._subscribers = []
+        self.version = 0
+
+    def record(self, table, keys=None):
+        """Log a committed write to table and notify subscribers; returns the new version"""
+        if keys is not None:
+            keys = frozenset(keys)
+
+        with self._lock:
+            self.version += 1
+            version = self.version
+            self._log.append((version, table, keys))
+            subscribers = list(self._subscribers)
+
+        # Called on the writing thread; GUI subscribers must hand over to Tk themselves
+        for callback in subscribers:
+            try:
+                callback(version, table, keys)
+            except Exception as e:
+                print("Error notifying change subscriber:", e)
+        return version
+
+    def changes_since(self, version, table):
+        """Return the keys of table changed after version, or None if unknown.
+
+        None means the caller has to reload: a writer did not name its rows,
+        or the change happened longer ago than the log remembers.
+        """
+        with self._lock:
+            if version >= self.version:
+                return set()
+
+            oldest = self._log[0][0] if self._log else self.version + 1
+            if version + 1 < oldest:
+                return None
+
+            keys = set()
+            for change_version, change_table, change_keys in self._log:
+                if change_version <= version or change_table != table:
+                    continue
+                if change_keys is None:
+                    return None
+                keys.update(change_keys)
+            return keys
+
+    def subscribe(self, callback):
+        """Call callback(version, table, keys) after every recorded change"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
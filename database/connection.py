@@ -1,47 +1,273 @@
-import mysql.connector
-from mysql.connector import Error
-from config import DB_CONFIG
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox
+from database.pool import ConnectionPool, PoolExhaustedError
+from database.change_tracker import ChangeTracker
+from database.instrumentation import get_instrumentation
+
+try:
+    import config
+except ImportError:
+    # No config.py, e.g. an SQLite benchmark run on a machine without MySQL
+    config = None
+
+# 'mysql' (default) or 'sqlite'
+DB_BACKEND = getattr(config, 'DB_BACKEND', 'mysql')
+
+# Database file used when DB_BACKEND is 'sqlite'
+SQLITE_PATH = getattr(config, 'SQLITE_PATH', 'pharmacy.db')
+
+# Optional pool settings, e.g. {'max_size': 5, 'timeout': 10, 'health_check_interval': 30}
+POOL_CONFIG = getattr(config, 'POOL_CONFIG', {})
+
+_default_backend = None
+_pools = {}
+_trackers = {}
+_pools_lock = threading.Lock()
+
+
+def get_default_backend():
+    """Return the backend selected by config.DB_BACKEND"""
+    global _default_backend
+    with _pools_lock:
+        if _default_backend is None:
+            from database.backends import MySQLBackend, SQLiteBackend
+            if DB_BACKEND == 'sqlite':
+                _default_backend = SQLiteBackend(SQLITE_PATH)
+            else:
+                _default_backend = MySQLBackend(config.DB_CONFIG)
+        return _default_backend
+
+
+def get_pool(backend):
+    """Return the pool shared by every DatabaseConnection on backend"""
+    with _pools_lock:
+        pool = _pools.get(backend)
+        if pool is None:
+            pool = ConnectionPool(backend.connect, backend.is_healthy, **POOL_CONFIG)
+            _pools[backend] = pool
+        return pool
+
+
+def get_change_tracker(backend):
+    """Return the change log shared by every DatabaseConnection on backend"""
+    with _pools_lock:
+        tracker = _trackers.get(backend)
+        if tracker is None:
+            tracker = ChangeTracker()
+            _trackers[backend] = tracker
+        return tracker
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
 
 class DatabaseConnection:
-    def __init__(self):
-        try:
-            self.connection = mysql.connector.connect( **DB_CONFIG )
-            
-            if self.connection.is_connected():
-                self.cursor = self.connection.cursor(dictionary=True)
-                print("Connected to MySQL database")
-        except Error as e:
-            messagebox.showerror("Database Error", f"Error connecting to MySQL: {e}")
-            self.connection = None
-            self.cursor = None
+    """Facade over the connection pool used by the repositories.
+
+    Every query runs on its own cursor over a connection checked out from the
+    pool. Reads return the connection straight away; once a thread writes, the
+    connection stays pinned to that thread until commit() or rollback(), so
+    several threads can run queries and transactions at the same time.
+    """
+
+    def __init__(self, backend=None, pool=None, error_reporter=None):
+        self._local = threading.local()
+        self.backend = backend or get_default_backend()
+        self.Error = self.backend.Error
+
+        # Repositories record their committed writes here so caches can refresh by delta
+        self.changes = get_change_tracker(self.backend)
+
+        # Timings, row counts and callers of every statement; see gui/diagnostics_window.py
+        self.instrumentation = get_instrumentation()
+
+        # Optional callable(title, message) used for errors raised off the Tk
+        # thread, e.g. TaskExecutor.call_soon wrapping a message box, or by tools without a window
+        self.error_reporter = error_reporter
+        try:
+            self.pool = pool or get_pool(self.backend)
+
+            # Check out once so a bad configuration is reported at startup
+            connection = self.pool.get_connection()
+            self.pool.release(connection)
+            print(f"Connected to {self.backend.label} database")
+        except (self.Error, PoolExhaustedError) as e:
+            self.report_error("Database Error", f"Error connecting to {self.backend.label}: {e}")
+            self.pool = None
+
+    def _state(self):
+        state = self._local
+        if not hasattr(state, 'connection'):
+            state.connection = None
+            state.rows = []
+            state.rowcount = 0
+            state.lastrowid = None
+        return state
+
+    def _checkout(self, state):
+        if state.connection is not None:
+            return state.connection
+        if self.pool is None:
+            raise PoolExhaustedError("No database connection available")
+        return self.pool.get_connection()
+
+    def _checkin(self, state, connection, keep=False):
+        if state.connection is connection:
+            return
+        if keep:
+            state.connection = connection
+            return
+
+        # End the implicit read transaction so the next checkout sees fresh data
+        discard = False
+        try:
+            connection.rollback()
+        except self.Error:
+            discard = True
+        self.pool.release(connection, discard=discard)
+
+    def _finish(self, state, action):
+        connection = state.connection
+        if connection is None:
+            return
+        state.connection = None
+        discard = False
+        try:
+            action(connection)
+        except self.Error:
+            discard = True
+            raise
+        finally:
+            self.pool.release(connection, discard=discard)
+
+    def report_error(self, title, message):
+        # Message boxes may only be shown from the Tk thread of a running app
+        if threading.current_thread() is threading.main_thread() and tk._default_root is not None:
+            messagebox.showerror(title, message)
+        elif self.error_reporter is not None:
+            self.error_reporter(title, message)
+        else:
+            print(f"{title}: {message}")
 
     def execute_query(self, query, params=None):
+        state = self._state()
+        try:
+            connection = self._checkout(state)
+        except (self.Error, PoolExhaustedError) as e:
+            self.report_error("Database Error", f"Error connecting to {self.backend.label}: {e}")
+            return False
+
+        query = self.backend.translate(query)
+        cursor = self.backend.cursor(connection)
+        wrote = False
+        started = time.perf_counter()
         try:
             if params:
-                self.cursor.execute(query, params)
+                cursor.execute(query, params)
             else:
-                self.cursor.execute(query)
+                cursor.execute(query)
+
+            if cursor.description is not None:
+                state.rows = cursor.fetchall()
+                rows = len(state.rows)
+            else:
+                state.rows = []
+                wrote = True
+                rows = max(cursor.rowcount, 0)
+            state.rowcount = cursor.rowcount
+            state.lastrowid = cursor.lastrowid
+            self.instrumentation.record(query, params, (time.perf_counter() - started) * 1000, rows,
+                                        explain=lambda: self.explain(connection, query, params))
             return True
-        except Error as e:
-            messagebox.showerror("Query Error", f"Error executing query: {e}")
+        except self.Error as e:
+            state.rows = []
+            self.instrumentation.record(query, params, (time.perf_counter() - started) * 1000, 0, error=e)
+            self.report_error("Query Error", f"Error executing query: {e}")
             return False
+        finally:
+            cursor.close()
+            self._checkin(state, connection, keep=wrote)
+
+    def execute_many(self, query, param_rows):
+        """Run one statement for every parameter tuple in a single call.
+
+        MySQL Connector folds INSERT ... VALUES into one multi-row statement,
+        so this costs one round trip however many rows there are.
+        """
+        state = self._state()
+        try:
+            connection = self._checkout(state)
+        except (self.Error, PoolExhaustedError) as e:
+            self.report_error("Database Error", f"Error connecting to {self.backend.label}: {e}")
+            return False
+
+        query = self.backend.translate(query)
+        cursor = self.backend.cursor(connection)
+        wrote = False
+        param_rows = list(param_rows)
+        started = time.perf_counter()
+        try:
+            cursor.executemany(query, param_rows)
+            state.rows = []
+            state.rowcount = cursor.rowcount
+            state.lastrowid = cursor.lastrowid
+            wrote = True
+            self.instrumentation.record(query, None, (time.perf_counter() - started) * 1000,
+                                        max(cursor.rowcount, 0))
+            return True
+        except self.Error as e:
+            state.rows = []
+            self.instrumentation.record(query, None, (time.perf_counter() - started) * 1000, 0, error=e)
+            self.report_error("Query Error", f"Error executing query: {e}")
+            return False
+        finally:
+            cursor.close()
+            self._checkin(state, connection, keep=wrote)
+
+    def explain(self, connection, query, params=None):
+        """Return the plan the database picks for a SELECT as text, or None for other statements"""
+        if not query.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        cursor = self.backend.cursor(connection)
+        try:
+            cursor.execute(self.backend.explain_prefix + query, params or ())
+            rows = cursor.fetchall()
+        except self.Error as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            cursor.close()
+        return "\n".join(", ".join(f"{key}={value}" for key, value in row.items()) for row in rows)
 
     def fetch_all(self):
-        return self.cursor.fetchall()
+        return self._state().rows
 
     def fetch_one(self):
-        return self.cursor.fetchone()
+        rows = self._state().rows
+        return rows[0] if rows else None
+
+    @property
+    def rowcount(self):
+        return self._state().rowcount
+
+    @property
+    def lastrowid(self):
+        return self._state().lastrowid
 
     def commit(self):
-        self.connection.commit()
+        self._finish(self._state(), lambda connection: connection.commit())
 
     def rollback(self):
-        self.connection.rollback()
+        self._finish(self._state(), lambda connection: connection.rollback())
 
     def close(self):
-        if self.connection and self.connection.is_connected():
-            self.cursor.close()
-            self.connection.close()
-            print("MySQL connection closed")
+        # Hand back whatever this thread still holds; the shared pool stays open
+        state = self._state()
+        if state.connection is not None:
+            self.rollback()
+        print(f"{self.backend.label} connection closed")
@@ -0,0 +1,138 @@
+import datetime
+import threading
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# Sequence values reserved per database round trip; unused values are lost when the app exits
+ID_BLOCK_SIZE = getattr(config, 'ID_BLOCK_SIZE', 50)
+
+# Digits of the per-day sequence value; ids sort as text while a day stays under 10 ** ID_DIGITS
+ID_DIGITS = 6
+
+# Sequence name -> id prefix, as the forms have always shown them
+ID_PREFIXES = {
+    'bill': "BILL-",
+    'medicine': "MED",
+    'supplier': "SUP",
+    'customer': "CUST",
+}
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_id_allocator(db):
+    """Return the allocator shared by every DatabaseConnection on db's backend in this process"""
+    with _allocators_lock:
+        allocator = _allocators.get(db.backend)
+        if allocator is None:
+            allocator = IdAllocator(db)
+            _allocators[db.backend] = allocator
+        return allocator
+
+
+def format_id(prefix, value, day):
+    """e.g. BILL-250314-000042: the day the id was handed out, then that day's sequence value"""
+    return f"{prefix}{day:%y%m%d}-{value:0{ID_DIGITS}d}"
+
+
+def sequence_key(name, day):
+    """id_sequences row of one sequence on one day, e.g. bill:250314"""
+    return f"{name}:{day:%y%m%d}"
+
+
+class IdAllocator:
+    """Unique, time-ordered ids for bills, medicines, suppliers and customers.
+
+    Every sequence starts again at 1 each day, in its own id_sequences row.
+    A process reserves a block of block_size values with one UPDATE and
+    hands them out from memory, so only one allocation in block_size costs
+    a round trip and terminals never share a value. Ids are the day
+    followed by a fixed-width value, so they sort as text by date, and
+    within a day by the order in which their blocks were reserved.
+
+    Blocks are always reserved on a pool connection of their own and
+    committed at once, even when the calling thread is inside a write
+    transaction, so the shared sequence row is locked only for that
+    one UPDATE. Values of a block the process never uses are skipped;
+    ids may have gaps but are never reused.
+    """
+
+    def __init__(self, db, block_size=ID_BLOCK_SIZE):
+        self.db = db
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.blocks = {}          # sequence key -> [next value, end of block)
+        self.reservations = 0
+
+    def next_id(self, name, day=None):
+        """Return the next id of sequence name ('bill', 'medicine', ...), or None if none could be reserved"""
+        day = day or datetime.date.today()
+        try:
+            value = self.next_value(name, day)
+            if value >= 10 ** ID_DIGITS:
+                raise RuntimeError(f"more than {10 ** ID_DIGITS - 1} {name} ids in one day")
+        except (self.db.Error, RuntimeError) as e:
+            self.db.report_error("ID Error", f"Could not reserve a new {name} id: {e}")
+            return None
+        return format_id(ID_PREFIXES[name], value, day)
+
+    def next_value(self, name, day):
+        key = sequence_key(name, day)
+        with self.lock:
+            block = self.blocks.get(key)
+            if block is None or block[0] >= block[1]:
+                # Values left over from an earlier day are never handed out
+                for old_key in [old for old in self.blocks if old.startswith(name + ":") and old != key]:
+                    del self.blocks[old_key]
+                first = self.reserve(key, self.block_size)
+                block = [first, first + self.block_size]
+                self.blocks[key] = block
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def take(self, connection, key, size):
+        """Take size values off the sequence on connection, without committing; returns the first"""
+        backend = self.db.backend
+        cursor = backend.cursor(connection)
+        try:
+            # The UPDATE locks the row until commit, so the SELECT reads our own increment
+            cursor.execute(backend.translate("UPDATE id_sequences SET next_value = next_value + %s WHERE name = %s"),
+                           (size, key))
+            if cursor.rowcount:
+                cursor.execute(backend.translate("SELECT next_value FROM id_sequences WHERE name = %s"), (key,))
+                return int(cursor.fetchone()['next_value']) - size
+            cursor.execute(backend.translate("INSERT INTO id_sequences (name, next_value) VALUES (%s, %s)"),
+                           (key, 1 + size))
+            return 1
+        finally:
+            cursor.close()
+
+    def reserve(self, key, size):
+        """Reserve size values on a pool connection and commit them; returns the first"""
+        if self.db.pool is None:
+            raise RuntimeError("No database connection available")
+
+        # Two processes may both find the day's row missing; the loser's insert
+        # fails on the key and its second attempt takes the update path
+        for attempt in range(2):
+            connection = self.db.pool.get_connection()
+            discard = False
+            try:
+                first = self.take(connection, key, size)
+                connection.commit()
+                self.reservations += 1
+                return first
+            except self.db.Error:
+                try:
+                    connection.rollback()
+                except self.db.Error:
+                    discard = True
+                if attempt:
+                    raise
+            finally:
+                self.db.pool.release(connection, discard=discard)
@@ -0,0 +1,222 @@
+import bisect
+import datetime
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# Record timings, row counts and callers of every statement
+QUERY_STATS = getattr(config, 'QUERY_STATS', True)
+
+# Statements slower than this (milliseconds) go to the slow-query log; None turns the log off
+SLOW_QUERY_MS = getattr(config, 'SLOW_QUERY_MS', 200)
+SLOW_QUERY_LOG = getattr(config, 'SLOW_QUERY_LOG', 'slow_queries.log')
+
+# Also write the EXPLAIN plan of slow SELECTs to the log
+SLOW_QUERY_EXPLAIN = getattr(config, 'SLOW_QUERY_EXPLAIN', False)
+
+# Also write statement parameters to the log; off by default since they include passwords
+SLOW_QUERY_PARAMS = getattr(config, 'SLOW_QUERY_PARAMS', False)
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket is open
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_instrumentation = None
+_instrumentation_lock = threading.Lock()
+
+
+def get_instrumentation():
+    """Return the statistics shared by every DatabaseConnection in this process"""
+    global _instrumentation
+    with _instrumentation_lock:
+        if _instrumentation is None:
+            _instrumentation = QueryInstrumentation(
+                enabled=QUERY_STATS,
+                slow_query_ms=SLOW_QUERY_MS,
+                slow_query_log=SLOW_QUERY_LOG,
+                explain=SLOW_QUERY_EXPLAIN,
+                log_params=SLOW_QUERY_PARAMS
+            )
+        return _instrumentation
+
+
+def normalize_sql(query):
+    """Reduce a statement to its shape: literals become ?, IN lists become (...), whitespace collapses"""
+    normalized = _STRING.sub("?", query)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    normalized = normalized.replace("%s", "?")
+    return _SPACE.sub(" ", normalized).strip()
+
+
+def find_caller():
+    """Return 'Class.method' (or 'module.function') of the nearest caller outside database/"""
+    frame = sys._getframe(1)
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _DATABASE_DIR:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+
+    code = frame.f_code
+    owner = frame.f_locals.get('self')
+    if owner is not None:
+        return f"{type(owner).__name__}.{code.co_name}"
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{code.co_name}"
+
+
+class QueryStats:
+    """Timings of one normalized statement"""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.callers = {}
+
+    def add(self, elapsed_ms, rows, caller, failed):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        if failed:
+            self.errors += 1
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.callers[caller] = self.callers.get(caller, 0) + 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        if not self.calls:
+            return 0.0
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self):
+        return {
+            'sql': self.sql,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': self.total_ms,
+            'avg_ms': self.total_ms / self.calls if self.calls else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'rows': self.rows,
+            'avg_rows': self.rows / self.calls if self.calls else 0.0,
+            'buckets': list(self.buckets),
+            'callers': sorted(self.callers.items(), key=lambda item: -item[1]),
+        }
+
+
+class QueryInstrumentation:
+    """Per-statement timing histograms and a slow-query log.
+
+    DatabaseConnection reports every statement it runs. Statements are
+    grouped by their normalized SQL, so the same query with different
+    parameters (or a different number of IN values) is counted together,
+    with the repository methods that ran it. A statement slower than
+    slow_query_ms, or one that failed, is appended to slow_query_log with
+    its caller and row count, and optionally its parameters and the plan
+    EXPLAIN gives for it.
+    """
+
+    def __init__(self, enabled=True, slow_query_ms=200, slow_query_log=None, explain=False, log_params=False):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_log = slow_query_log
+        self.explain = explain
+        self.log_params = log_params
+        self.lock = threading.Lock()
+        self.log_lock = threading.Lock()
+        self.stats = {}
+        # Called with (sql, elapsed_ms, rows, caller) after every statement, e.g. by the UI tracer
+        self.listeners = []
+        self.normalized = {}   # raw query -> normalized SQL
+        self.started = time.time()
+
+    def normalize(self, query):
+        normalized = self.normalized.get(query)
+        if normalized is None:
+            normalized = normalize_sql(query)
+            # Queries built with f-strings can be endless; keep the cache bounded
+            if len(self.normalized) > 5000:
+                self.normalized.clear()
+            self.normalized[query] = normalized
+        return normalized
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+
+    def record(self, query, params, elapsed_ms, rows, error=None, explain=None):
+        """Count one statement; explain() returns its plan as text and is only called for slow queries"""
+        if not self.enabled:
+            return
+        sql = self.normalize(query)
+        caller = find_caller()
+
+        with self.lock:
+            stats = self.stats.get(sql)
+            if stats is None:
+                stats = QueryStats(sql)
+                self.stats[sql] = stats
+            stats.add(elapsed_ms, rows, caller, error is not None)
+
+        for listener in self.listeners:
+            listener(sql, elapsed_ms, rows, caller)
+
+        if self.slow_query_log and (self.is_slow(elapsed_ms) or error is not None):
+            plan = None
+            if explain is not None and self.explain and error is None:
+                plan = explain()
+            self.write_log(sql, params, elapsed_ms, rows, caller, error, plan)
+
+    def write_log(self, sql, params, elapsed_ms, rows, caller, error, plan):
+        stamp = datetime.datetime.now().isoformat(sep=" ", timespec="milliseconds")
+        kind = "ERROR" if error is not None else "SLOW"
+        lines = [f"{stamp} {kind} {elapsed_ms:.1f} ms rows={rows} caller={caller}", f"  {sql}"]
+        if params and self.log_params:
+            shown = repr(tuple(params))
+            lines.append("  params: " + (shown if len(shown) <= 500 else shown[:500] + "..."))
+        if error is not None:
+            lines.append(f"  error: {error}")
+        if plan:
+            lines.extend("  | " + line for line in plan.splitlines())
+
+        try:
+            with self.log_lock, open(self.slow_query_log, "a", encoding="utf-8") as log:
+                log.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def snapshot(self):
+        """Every statement's figures, the most total time first"""
+        with self.lock:
+            stats = [stats.snapshot() for stats in self.stats.values()]
+        stats.sort(key=lambda item: -item['total_ms'])
+        return stats
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.started = time.time()
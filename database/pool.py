@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of database connections with checkout/return.
+
+    connect is a zero-argument callable returning a new DB-API connection and
+    is_healthy is called on connections that sat idle longer than
+    health_check_interval before they are handed out again.
+    """
+
+    def __init__(self, connect, is_healthy=None, max_size=5, timeout=10,
+                 health_check_interval=30):
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        # Idle connections as (connection, returned_at) pairs, most recent first
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._all = set()
+        self._closed = False
+
+    def get_connection(self):
+        """Check out a connection, opening a new one if none are idle"""
+        if self._closed:
+            raise PoolExhaustedError("Connection pool is closed")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhaustedError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.max_size})")
+
+        try:
+            while True:
+                try:
+                    connection, returned_at = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+
+                idle_for = time.monotonic() - returned_at
+                if idle_for < self.health_check_interval or self._check(connection):
+                    return connection
+                self._discard(connection)
+
+            connection = self._connect()
+            with self._lock:
+                self._all.add(connection)
+            return connection
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """Return a checked out connection to the pool"""
+        try:
+            if discard or self._closed:
+                self._discard(connection)
+            else:
+                self._idle.put((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    @property
+    def size(self):
+        with self._lock:
+            return len(self._all)
+
+    @property
+    def idle_count(self):
+        return self._idle.qsize()
+
+    def _check(self, connection):
+        if self._is_healthy is None:
+            return True
+        try:
+            return self._is_healthy(connection)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        with self._lock:
+            self._all.discard(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
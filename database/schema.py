@@ -0,0 +1,154 @@
+import os
+import re
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "database_schema.md")
+
+# database_schema.md documents column names, types and indexes; keys and
+# the summary views are spelled out here.
+PRIMARY_KEYS = {
+    'bills': ('bill_id',),
+    'bill_items': ('item_id',),
+    'customers': ('customer_id',),
+    'daily_sales': ('sale_date',),
+    'daily_medicine_sales': ('sale_date', 'medicine_id'),
+    'id_sequences': ('name',),
+    'medicines': ('medicine_id',),
+    'suppliers': ('supplier_id',),
+    'supplies': ('supply_id',),
+    'users': ('username',),
+}
+
+AUTO_INCREMENT = {
+    'bill_items': 'item_id',
+    'supplies': 'supply_id',
+}
+
+VIEWS = {
+    'bill_summary': """
+        SELECT b.bill_id, b.bill_date, b.customer_id, c.name AS customer_name,
+               c.contact AS customer_contact, COUNT(bi.item_id) AS item_count,
+               SUM(bi.quantity) AS total_items, b.subtotal, b.tax, b.total
+        FROM bills b
+        JOIN customers c ON b.customer_id = c.customer_id
+        LEFT JOIN bill_items bi ON b.bill_id = bi.bill_id
+        GROUP BY b.bill_id, b.bill_date, b.customer_id, c.name, c.contact,
+                 b.subtotal, b.tax, b.total
+    """,
+    'medicine_inventory': """
+        SELECT m.medicine_id, m.name, m.description, s.name AS supplier_name, m.price,
+               m.quantity, m.price * m.quantity AS inventory_value, m.expiry_date,
+               m.location
+        FROM medicines m
+        LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
+    """,
+    'supply_summary': """
+        SELECT sup.supplier_id, sup.name AS supplier_name, COUNT(s.supply_id) AS supply_count,
+               SUM(s.quantity) AS total_quantity, SUM(s.amount) AS total_amount,
+               MIN(s.supply_date) AS first_supply, MAX(s.supply_date) AS last_supply
+        FROM suppliers sup
+        JOIN supplies s ON sup.supplier_id = s.supplier_id
+        GROUP BY sup.supplier_id, sup.name
+    """,
+}
+
+# NOCASE matches MySQL's default case-insensitive collation and lets SQLite
+# answer LIKE 'prefix%' from an index
+SQLITE_TYPES = {
+    'varchar': 'VARCHAR(255) COLLATE NOCASE',
+    'text': 'TEXT',
+    'int': 'INTEGER',
+    'bigint': 'INTEGER',
+    'decimal': 'DECIMAL(12, 2)',
+    'date': 'DATE',
+    'timestamp': 'TIMESTAMP',
+}
+
+_TABLE_HEADING = re.compile(r"^##\s.*`(\w+)`")
+_INDEX_HEADING = re.compile(r"^##\s.*Indexes", re.I)
+_COLUMN_ROW = re.compile(r"^\|\s*(\w+)\s*\|\s*(\w+)\s*\|")
+_INDEX_ROW = re.compile(r"^\|\s*(\w+)\s*\|\s*(\w+)\s*\|\s*([\w,\s]+?)\s*\|")
+
+
+def load_schema(path=SCHEMA_FILE):
+    """Parse database_schema.md into ({table: [(column, type), ...]}, {index: (table, columns)})"""
+    tables = {}
+    indexes = {}
+    current = None
+    in_indexes = False
+
+    with open(path, encoding="utf-8") as schema_file:
+        for line in schema_file:
+            if line.startswith("## "):
+                heading = _TABLE_HEADING.match(line)
+                current = tables.setdefault(heading.group(1), []) if heading else None
+                in_indexes = bool(_INDEX_HEADING.match(line))
+                continue
+
+            if in_indexes:
+                row = _INDEX_ROW.match(line)
+                if row and row.group(1) != 'Index':
+                    columns = tuple(column.strip() for column in row.group(3).split(","))
+                    indexes[row.group(1)] = (row.group(2), columns)
+                continue
+
+            row = _COLUMN_ROW.match(line)
+            if row and current is not None and row.group(1) != 'Column':
+                current.append((row.group(1), row.group(2).lower()))
+
+    return tables, indexes
+
+
+def load_tables(path=SCHEMA_FILE):
+    """Parse database_schema.md into {table: [(column, type), ...]}"""
+    return load_schema(path)[0]
+
+
+def sqlite_statements(path=SCHEMA_FILE):
+    """Build the DDL needed to create the documented schema in SQLite"""
+    statements = []
+    tables, indexes = load_schema(path)
+
+    for table, columns in tables.items():
+        if table in VIEWS:
+            continue
+
+        keys = PRIMARY_KEYS.get(table, ())
+        auto_column = AUTO_INCREMENT.get(table)
+        definitions = []
+
+        for column, column_type in columns:
+            if column == auto_column:
+                definitions.append(f"{column} INTEGER PRIMARY KEY AUTOINCREMENT")
+                continue
+
+            definition = f"{column} {SQLITE_TYPES.get(column_type, 'TEXT')}"
+            if column in keys:
+                definition += " NOT NULL"
+            if column_type == 'timestamp':
+                definition += " DEFAULT (datetime('now', 'localtime'))"
+            definitions.append(definition)
+
+        if keys and not auto_column:
+            definitions.append(f"PRIMARY KEY ({', '.join(keys)})")
+
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} (\n    "
+                          + ",\n    ".join(definitions) + "\n)")
+
+        # Mirror MySQL's ON UPDATE CURRENT_TIMESTAMP
+        if keys and any(column == 'updated_at' for column, _ in columns):
+            key_match = " AND ".join(f"{key} = NEW.{key}" for key in keys)
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at "
+                f"AFTER UPDATE ON {table} FOR EACH ROW "
+                f"WHEN NEW.updated_at IS OLD.updated_at BEGIN "
+                f"UPDATE {table} SET updated_at = datetime('now', 'localtime') "
+                f"WHERE {key_match}; END")
+
+    for name, (table, columns) in indexes.items():
+        statements.append(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+    for name, definition in VIEWS.items():
+        statements.append(f"CREATE VIEW IF NOT EXISTS {name} AS {definition.strip()}")
+
+    return statements
@@ -0,0 +1,130 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class AutocompleteEntry(ttk.Entry):
+    """Entry that shows ranked suggestions in a drop-down list while typing.
+
+    suggest(text) returns the items to show, format_item(item) the line for
+    each one, and on_select(item) is called with the item the user picks
+    (Enter, Tab or a click). Lookups are debounced by delay milliseconds so
+    fast typing only searches once it pauses.
+    """
+
+    def __init__(self, master, suggest, on_select, format_item=str, delay=120,
+                 max_items=8, **kwargs):
+        super().__init__(master, **kwargs)
+        self.suggest = suggest
+        self.on_select = on_select
+        self.format_item = format_item
+        self.delay = delay
+        self.max_items = max_items
+
+        self.items = []
+        self.pending = None
+        self.popup = None
+        self.listbox = None
+
+        self.bind("<KeyRelease>", self.on_key_release)
+        self.bind("<Down>", lambda e: self.move(1))
+        self.bind("<Up>", lambda e: self.move(-1))
+        self.bind("<Return>", self.on_return)
+        self.bind("<Tab>", self.on_tab)
+        self.bind("<Escape>", lambda e: self.hide())
+        self.bind("<FocusOut>", lambda e: self.after(150, self.hide_unless_focused))
+        self.bind("<Destroy>", lambda e: self.cancel_pending())
+
+    def on_key_release(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Tab", "Escape",
+                            "Shift_L", "Shift_R", "Control_L", "Control_R"):
+            return
+        self.cancel_pending()
+        self.pending = self.after(self.delay, self.update_suggestions)
+
+    def cancel_pending(self):
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.pending = None
+
+    def update_suggestions(self):
+        self.pending = None
+        self.items = self.suggest(self.get())[:self.max_items]
+        if not self.items:
+            self.hide()
+            return
+
+        self.show()
+        self.listbox.delete(0, tk.END)
+        for item in self.items:
+            self.listbox.insert(tk.END, self.format_item(item))
+        self.listbox.configure(height=len(self.items))
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+
+    def show(self):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self)
+            self.popup.wm_overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, exportselection=False, activestyle="none")
+            self.listbox.pack(fill="both", expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self.on_click)
+
+        x = self.winfo_rootx()
+        y = self.winfo_rooty() + self.winfo_height()
+        width = max(self.winfo_width(), 360)
+        self.popup.wm_geometry(f"{width}x{len(self.items) * 20 + 4}+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        self.cancel_pending()
+        if self.popup is not None:
+            self.popup.withdraw()
+
+    def hide_unless_focused(self):
+        if self.focus_get() is not self.listbox:
+            self.hide()
+
+    def visible(self):
+        return self.popup is not None and self.popup.winfo_viewable()
+
+    def move(self, step):
+        if not self.visible():
+            self.update_suggestions()
+            return "break"
+
+        current = self.listbox.curselection()
+        index = (current[0] if current else -step) + step
+        index = max(0, min(index, len(self.items) - 1))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.see(index)
+        return "break"
+
+    def on_return(self, event):
+        # Enter before the debounce fired still picks the best match
+        if self.pending is not None:
+            self.update_suggestions()
+        if self.items:
+            self.choose()
+        return "break"
+
+    def on_tab(self, event):
+        if self.visible() and self.items:
+            self.choose()
+            return "break"
+
+    def on_click(self, event):
+        index = self.listbox.nearest(event.y)
+        if 0 <= index < len(self.items):
+            self.choose(index)
+
+    def choose(self, index=None):
+        if index is None:
+            current = self.listbox.curselection() if self.listbox is not None else ()
+            index = current[0] if current else 0
+        item = self.items[index]
+        self.hide()
+        self.items = []
+        self.on_select(item)
@@ -1,12 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font, scrolledtext
 from tkinter import filedialog
-from pdf_generator import PDFGenerator
+import shutil
+from pdf_cache import get_default_cache
+from receipt_printer import ReceiptPrinter
+from gui.virtual_table import VirtualTable
+from gui.tracing import tracer
 
 class BillPreviewWindow:
-    def __init__(self, parent, bill_data):
+    def __init__(self, parent, bill_data, tasks=None):
         self.parent = parent
         self.bill_data = bill_data
+        # The main window's TaskExecutor; PDFs are rendered through it, off the Tk thread
+        self.tasks = tasks
 
         # Create a new top-level window
         self.window = tk.Toplevel(parent)
@@ -27,7 +33,8 @@ class BillPreviewWindow:
         self.normal_font = font.Font(family="Segoe UI", size=10)
         self.small_font = font.Font(family="Segoe UI", size=9)
 
-        self.setup_bill_preview()
+        with tracer.span("bill preview", 'widgets', items=len(bill_data['items'])):
+            self.setup_bill_preview()
 
     def setup_bill_preview(self):
         # Configure window to be resizable and maximizable
@@ -135,33 +142,13 @@ class BillPreviewWindow:
         items_frame = ttk.LabelFrame(content_frame, text="Items")
         items_frame.pack(fill="both", expand=True, pady=10)
 
-        # Create table headers
-        columns = ("S.No.",  "Medicine Name", "Quantity", "Price (₹)", "Amount (₹)")
-        self.items_tree = ttk.Treeview(items_frame, columns=columns, show="headings", height=10)
-
-        # Configure columns
-        for col in columns:
-            self.items_tree.heading(col, text=col)
-            width = 150 if col == "Medicine Name" else 100
-            self.items_tree.column(col, width=width, anchor="center")
-
+        # Only the lines on screen get Treeview items, so a bill with thousands of lines opens as fast as a short one
+        columns = [("S.No.", 'line', 100), ("Medicine Name", 'medicine_name', 150), ("Quantity", 'quantity', 100),
+                   ("Price (₹)", 'price', 100), ("Amount (₹)", 'amount', 100)]
+        self.items_tree = VirtualTable(items_frame, columns, key=lambda row: row['line'],
+                                       format_row=self.format_item_row, height=10)
         self.items_tree.pack(fill="both", expand=True, padx=5, pady=5)
-
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(items_frame, orient="vertical", command=self.items_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.items_tree.configure(yscrollcommand=scrollbar.set)
-
-        # Add items to the table
-        for i, item in enumerate(self.bill_data['items'], 1):
-            self.items_tree.insert("", "end", values=(
-                i,
-                
-                item['medicine_name'],
-                item['quantity'],
-                item['price'],
-                item['amount']
-            ))
+        self.items_tree.set_rows(dict(item, line=i) for i, item in enumerate(self.bill_data['items'], 1))
 
         # Totals
         totals_frame = ttk.Frame(content_frame)
@@ -250,10 +237,11 @@ class BillPreviewWindow:
         except:
             pass
 
+    def format_item_row(self, item):
+        return (item['line'], item['medicine_name'], item['quantity'], item['price'], item['amount'])
+
     def save_as_pdf(self):
         """Save the current bill as a PDF file"""
-        pdf_generator = PDFGenerator()
-
         # Ask user for save location
         file_path = filedialog.asksaveasfilename(
             defaultextension=".pdf",
@@ -261,15 +249,59 @@ class BillPreviewWindow:
             title="Save Bill As"
         )
 
-        if file_path:
-            success = pdf_generator.generate_bill_pdf(self.bill_data, file_path)
-            if success:
-                messagebox.showinfo("Success", f"Bill saved as PDF:\n{file_path}")
-            else:
-                messagebox.showerror("Error", "Failed to save PDF")
+        if not file_path:
+            return
+
+        # Copied from the PDF cache; ReportLab only runs if this bill was never rendered
+        cache = get_default_cache()
+        cached_path = cache.lookup(self.bill_data)
+        if cached_path is not None or self.tasks is None:
+            self.pdf_saved(cached_path or cache.get_or_render(self.bill_data), file_path)
+            return
+
+        def rendered(success, rendered_path):
+            if not success:
+                cache.discard(rendered_path)
+                self.pdf_saved(None, file_path)
+                return
+            self.pdf_saved(cache.store(self.bill_data, rendered_path), file_path)
+
+        def failed(error, rendered_path):
+            cache.discard(rendered_path)
+            messagebox.showerror("Error", f"Failed to save PDF: {error}")
+
+        # A miss is rendered in a worker process, as the history tab's Print does
+        from pdf_generator import render_bill_pdf
+        rendered_path = cache.reserve()
+        self.tasks.submit('preview_pdf', render_bill_pdf, self.bill_data, rendered_path, process=True,
+                          on_success=lambda success: rendered(success, rendered_path),
+                          on_error=lambda error: failed(error, rendered_path))
+
+    def pdf_saved(self, cached_path, file_path):
+        if cached_path is None:
+            messagebox.showerror("Error", "Failed to save PDF")
+            return
+        try:
+            shutil.copyfile(cached_path, file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save PDF: {e}")
+            return
+        messagebox.showinfo("Success", f"Bill saved as PDF:\n{file_path}")
 
     def print_bill(self):
-        # Placeholder for print functionality
-        messagebox.showinfo("Print", "Printing functionality will be implemented here.")
-        # In a real implementation, you would use a library like win32print or similar
-        # to send the bill to a printer
\ No newline at end of file
+        # Send the bill to the counter's receipt printer (config.RECEIPT_PRINTER).
+        # Device and spool writes run on a worker thread, so a stalled or
+        # missing printer cannot freeze the counter
+        printer = ReceiptPrinter()
+        if self.tasks is None:
+            self.receipt_printed(printer.print_receipt(self.bill_data))
+            return
+        self.tasks.submit('print_receipt', printer.print_receipt, self.bill_data,
+                          on_success=self.receipt_printed,
+                          on_error=lambda error: messagebox.showerror("Error", f"Failed to print receipt: {error}"))
+
+    def receipt_printed(self, printed_to):
+        if printed_to:
+            messagebox.showinfo("Print", f"Receipt sent to:\n{printed_to}")
+        else:
+            messagebox.showerror("Error", "Failed to print receipt")
\ No newline at end of file
@@ -0,0 +1,244 @@
+import tkinter as tk
+from tkinter import ttk, font, scrolledtext, filedialog, messagebox
+import datetime
+import os
+from database.instrumentation import BUCKETS_MS
+
+
+class DiagnosticsWindow:
+    """Query statistics recorded by DatabaseConnection, most total time first.
+
+    Selecting a statement shows its full SQL, its timing histogram and the
+    repository methods that ran it. A second tab lists how long user
+    actions took from click to screen, as measured by the UI tracer.
+    """
+
+    REFRESH_MS = 2000
+
+    def __init__(self, parent, instrumentation, tracer=None):
+        self.parent = parent
+        self.instrumentation = instrumentation
+        self.tracer = tracer
+        self.stats = {}
+        self.details_sql = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Diagnostics - Database Queries")
+        self.window.geometry("1100x650")
+        self.window.transient(parent)
+
+        self.primary_color = "#6200ea"  # Deep purple
+        self.header_font = font.Font(family="Segoe UI", size=12, weight="bold")
+        self.mono_font = font.Font(family="Consolas", size=9)
+
+        self.auto_refresh = tk.BooleanVar(value=True)
+        self.refresh_job = None
+
+        self.setup_window()
+        self.refresh()
+
+    def setup_window(self):
+        main_frame = ttk.Frame(self.window, padding=15)
+        main_frame.pack(fill="both", expand=True)
+
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(fill="x", pady=(0, 10))
+
+        title_label = ttk.Label(top_frame, text="Database Queries", font=self.header_font,
+                                foreground=self.primary_color)
+        title_label.pack(side="left")
+
+        self.summary_label = ttk.Label(top_frame, text="")
+        self.summary_label.pack(side="left", padx=20)
+
+        close_btn = ttk.Button(top_frame, text="Close", command=self.close)
+        close_btn.pack(side="right", padx=5)
+
+        reset_btn = ttk.Button(top_frame, text="Reset", command=self.reset)
+        reset_btn.pack(side="right", padx=5)
+
+        refresh_btn = ttk.Button(top_frame, text="Refresh", command=self.refresh)
+        refresh_btn.pack(side="right", padx=5)
+
+        auto_check = ttk.Checkbutton(top_frame, text="Auto refresh", variable=self.auto_refresh,
+                                     command=self.schedule_refresh)
+        auto_check.pack(side="right", padx=5)
+
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill="both", expand=True)
+        queries_tab = ttk.Frame(notebook)
+        actions_tab = ttk.Frame(notebook)
+        notebook.add(queries_tab, text="Queries")
+        notebook.add(actions_tab, text="UI Actions")
+
+        # Statements table
+        table_frame = ttk.Frame(queries_tab)
+        table_frame.pack(fill="both", expand=True)
+
+        columns = [("Calls", 60), ("Total ms", 80), ("Avg ms", 70), ("p50 ms", 70), ("p95 ms", 70),
+                   ("Max ms", 70), ("Avg rows", 70), ("Errors", 60), ("Top caller", 220), ("SQL", 500)]
+        self.stats_tree = ttk.Treeview(table_frame, columns=[name for name, _ in columns],
+                                       show="headings", height=15)
+        for name, width in columns:
+            self.stats_tree.heading(name, text=name)
+            anchor = "w" if name in ("Top caller", "SQL") else "e"
+            self.stats_tree.column(name, width=width, anchor=anchor, stretch=name == "SQL")
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.stats_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.stats_tree.configure(yscrollcommand=scrollbar.set)
+        self.stats_tree.pack(side="left", fill="both", expand=True)
+        self.stats_tree.bind("<<TreeviewSelect>>", lambda e: self.show_details())
+
+        # Details of the selected statement
+        details_frame = ttk.LabelFrame(queries_tab, text="Statement Details")
+        details_frame.pack(fill="both", expand=True, pady=(10, 0))
+
+        self.details_text = scrolledtext.ScrolledText(details_frame, height=12, font=self.mono_font, wrap="word")
+        self.details_text.pack(fill="both", expand=True, padx=5, pady=5)
+        self.details_text.configure(state="disabled")
+
+        # Click-to-screen latency of user actions
+        actions_top = ttk.Frame(actions_tab)
+        actions_top.pack(fill="x", pady=5)
+
+        self.trace_label = ttk.Label(actions_top, text="")
+        self.trace_label.pack(side="left", padx=5)
+
+        export_btn = ttk.Button(actions_top, text="Export Trace", command=self.export_trace)
+        export_btn.pack(side="right", padx=5)
+        if self.tracer is None or not self.tracer.enabled:
+            export_btn.configure(state="disabled")
+
+        action_columns = [("Action", 500), ("Count", 70), ("Avg ms", 80), ("p95 ms", 80), ("Max ms", 80)]
+        self.actions_tree = ttk.Treeview(actions_tab, columns=[name for name, _ in action_columns],
+                                         show="headings", height=20)
+        for name, width in action_columns:
+            self.actions_tree.heading(name, text=name)
+            self.actions_tree.column(name, width=width, anchor="w" if name == "Action" else "e",
+                                     stretch=name == "Action")
+        self.actions_tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+    def refresh(self):
+        previous = self.details_sql
+        snapshot = self.instrumentation.snapshot()
+        self.stats = {str(index): stats for index, stats in enumerate(snapshot)}
+
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for iid, stats in self.stats.items():
+            top_caller = stats['callers'][0][0] if stats['callers'] else ""
+            self.stats_tree.insert("", "end", iid=iid, values=(
+                stats['calls'],
+                f"{stats['total_ms']:.1f}",
+                f"{stats['avg_ms']:.2f}",
+                f"{stats['p50_ms']:g}",
+                f"{stats['p95_ms']:g}",
+                f"{stats['max_ms']:.1f}",
+                f"{stats['avg_rows']:.1f}",
+                stats['errors'],
+                top_caller,
+                stats['sql'][:300]
+            ))
+
+        # Keep the same statement selected across refreshes
+        for iid, stats in self.stats.items():
+            if stats['sql'] == previous:
+                self.stats_tree.selection_set(iid)
+                break
+
+        calls = sum(stats['calls'] for stats in snapshot)
+        total_ms = sum(stats['total_ms'] for stats in snapshot)
+        since = datetime.datetime.fromtimestamp(self.instrumentation.started).strftime("%H:%M:%S")
+        log = self.instrumentation.slow_query_log or "off"
+        self.summary_label.configure(
+            text=f"{len(snapshot)} statements, {calls} calls, {total_ms / 1000:.2f}s in the database "
+                 f"since {since}  |  slow query log (>= {self.instrumentation.slow_query_ms} ms): {log}")
+
+        self.show_details()
+        self.refresh_actions()
+        self.schedule_refresh()
+
+    def refresh_actions(self):
+        self.actions_tree.delete(*self.actions_tree.get_children())
+        if self.tracer is None:
+            self.trace_label.configure(text="UI tracing is not available")
+            return
+
+        actions = self.tracer.recent_actions()
+        for name, (count, average, p95, longest) in sorted(actions.items(), key=lambda item: -item[1][2]):
+            self.actions_tree.insert("", "end", values=(name, count, f"{average:.1f}", f"{p95:.1f}", f"{longest:.1f}"))
+
+        if self.tracer.enabled:
+            status = f"Tracing on, {len(self.tracer.events)} events recorded"
+        else:
+            status = "Tracing off (set UI_TRACE = True in config.py to record a trace)"
+        if self.tracer.stall_ms:
+            status += f"  |  stalls over {self.tracer.stall_ms} ms are logged to {self.tracer.stall_log or 'the console'}"
+        self.trace_label.configure(text=status)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            initialfile=os.path.basename(self.tracer.trace_file or "ui_trace.json"),
+            filetypes=[("Chrome Trace", "*.json")],
+            title="Export UI Trace"
+        )
+        if not path:
+            return
+        if self.tracer.export(path):
+            messagebox.showinfo("Export Trace", f"Trace written to:\n{path}\n\nOpen it in chrome://tracing or ui.perfetto.dev")
+        else:
+            messagebox.showerror("Error", "Failed to write the trace")
+
+    def schedule_refresh(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        if self.auto_refresh.get():
+            self.refresh_job = self.window.after(self.REFRESH_MS, self.refresh)
+
+    def show_details(self):
+        selection = self.stats_tree.selection()
+        stats = self.stats.get(selection[0]) if selection else None
+        self.details_sql = stats['sql'] if stats else None
+
+        lines = []
+        if stats:
+            lines.append(stats['sql'])
+            lines.append("")
+            lines.append(f"{stats['calls']} calls, {stats['errors']} errors, {stats['rows']} rows, "
+                         f"{stats['total_ms']:.1f} ms total, max {stats['max_ms']:.1f} ms")
+            lines.append("")
+
+            # Histogram, one bar per bucket that has calls
+            widest = max(stats['buckets']) or 1
+            lower = 0
+            for index, count in enumerate(stats['buckets']):
+                upper = BUCKETS_MS[index] if index < len(BUCKETS_MS) else None
+                label = f"{lower:g}-{upper:g} ms" if upper is not None else f">= {lower:g} ms"
+                if count:
+                    lines.append(f"{label:>16} {'#' * max(1, round(40 * count / widest)):<40} {count}")
+                lower = upper
+
+            lines.append("")
+            lines.append("Called from:")
+            for caller, count in stats['callers']:
+                lines.append(f"  {count:>7}  {caller}")
+
+        self.details_text.configure(state="normal")
+        self.details_text.delete("1.0", "end")
+        self.details_text.insert("1.0", "\n".join(lines))
+        self.details_text.configure(state="disabled")
+
+    def reset(self):
+        self.instrumentation.reset()
+        self.details_sql = None
+        self.refresh()
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        self.window.destroy()
@@ -1,19 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk, messagebox, font, scrolledtext
-from database.connection import DatabaseConnection
-from repositories.user_repository import UserRepository
+from session import AppSession
 
 class LoginPage:
-    def __init__(self, root, on_login_success):
+    def __init__(self, root, on_login_success, session=None):
         self.root = root
         self.on_login_success = on_login_success
         self.root.title("Pharmacy Management - Login")
         self.root.geometry("500x400")
 
-        # Database connection
-        self.db = DatabaseConnection()
-        self.user_repo = UserRepository(self.db)
+        # Database connection, shared with the main window after login
+        self.session = session or AppSession()
+        self.db = self.session.db
+        self.user_repo = self.session.user_repo
 
         # Set custom colors
         self.primary_color = "#6200ea"  # Deep purple
@@ -143,6 +143,7 @@ class LoginPage:
         user = self.user_repo.authenticate(username, password)
 
         if user:
+            self.session.user = user
             self.on_login_success()
             self.root.unbind('<Return>') 
         else:
@@ -1,36 +1,61 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter import ttk, messagebox, font, scrolledtext
-import random
 import os 
-import tempfile
-from pdf_generator import PDFGenerator
-from database.connection import DatabaseConnection
-from repositories.medicine_repository import MedicineRepository
-from repositories.customer_repository import CustomerRepository
-from repositories.supplier_repository import SupplierRepository
-from repositories.billing_repository import BillingRepository
+from repositories.search_index import parse_date_range
 from gui.login_ui import LoginPage
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
+from session import AppSession
+from pdf_cache import get_default_cache
+from database.id_allocator import get_id_allocator
 import datetime
 
 from gui.bill_preview_window import BillPreviewWindow
+from gui.autocomplete import AutocompleteEntry
+from gui.task_executor import TaskExecutor
+from gui.virtual_table import VirtualTable
+from gui.startup_profile import profile
+from gui.tracing import tracer
 
 class PharmacyApp:
-    def __init__(self, root):
+    BILL_PAGE_SIZE = 100  # Bills fetched per page in the Billing History tab
+
+    def __init__(self, root, session=None):
         self.root = root 
         self.root.title("Pharmacy Management System")
         self.root.geometry("1100x700")
 
-        # Database connection
-        self.db = DatabaseConnection()
-        self.medicine_repo = MedicineRepository(self.db)
-        self.supplier_repo = SupplierRepository(self.db)
-        self.customer_repo = CustomerRepository(self.db)
-        self.billing_repo = BillingRepository(self.db)
+        # Database connection and repositories, with the caches warmed during login
+        with profile.phase("Repositories"):
+            self.session = session or AppSession()
+            self.session.warm_up()
+            self.db = self.session.db
+            self.medicine_repo = self.session.medicine_repo
+            self.supplier_repo = self.session.supplier_repo
+            self.customer_repo = self.session.customer_repo
+            self.billing_repo = self.session.billing_repo
+            self.report_repo = self.session.report_repo
+            self.medicine_search = self.session.medicine_search
+            self.pdf_cache = get_default_cache()
+            # Ordered, collision-free ids for new bills, medicines, suppliers and customers
+            self.ids = get_id_allocator(self.db)
+
+        # Queries and PDF builds run in the background and report back through root.after
+        self.tasks = TaskExecutor(root)
+        self.db.error_reporter = lambda title, message: self.tasks.call_soon(
+            messagebox.showerror, title, message)
+
+        # Writes report the keys they changed; the tables patch just those rows
+        self.medicine_view_full = True
+        self.supplier_view_full = True
+        self.supply_view_full = True
+        self.bill_view_full = True
+        self.pending_changes = {}
+        self.change_fetches = set()
+        self.change_flush_scheduled = False
+        self.db.changes.subscribe(self.on_data_changed)
+
+        # Medicine suggestions are served from memory; the index is refreshed in the background
+        self.root.after(self.medicine_search.refresh_interval * 1000, self.refresh_medicine_search)
 
         # Set custom colors
         self.primary_color = "#6200ea"  # Deep purple
@@ -126,6 +151,12 @@ class PharmacyApp:
                                command=self.logout)
         logout_btn.pack(side="right", padx=10, pady=15)
 
+        # Query timings and the slow-query log
+        diagnostics_btn = tk.Button(self.header_frame, text="Diagnostics",
+                                    font=self.normal_font, bg=self.accent_color, fg="#ffffff",
+                                    command=self.show_diagnostics)
+        diagnostics_btn.pack(side="right", padx=10, pady=15)
+
         # Create notebook (tabs)
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill="both", expand=True, padx=20, pady=15)
@@ -146,16 +177,20 @@ class PharmacyApp:
         self.notebook.add(self.billing_history_tab, text="Billing History")
         self.notebook.add(self.reports_tab, text="Reports")
         self.notebook.add(self.stock_alerts_tab, text="Stock Alerts")
-        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
 
-        # Setup each tab
-        self.setup_home_tab()
-        self.setup_medicines_tab()
-        self.setup_suppliers_tab()
-        self.setup_billing_tab()
-        self.setup_billing_history_tab()
-        self.setup_reports_tab()
-        self.setup_stock_alerts_tab()
+        # Only the Home tab is built now; the others are built the first time they are selected
+        self.tab_builders = {
+            str(self.home_tab): self.setup_home_tab,
+            str(self.medicines_tab): self.setup_medicines_tab,
+            str(self.suppliers_tab): self.setup_suppliers_tab,
+            str(self.billing_tab): self.setup_billing_tab,
+            str(self.billing_history_tab): self.setup_billing_history_tab,
+            str(self.reports_tab): self.setup_reports_tab,
+            str(self.stock_alerts_tab): self.setup_stock_alerts_tab,
+        }
+        self.built_tabs = set()
+        self.ensure_tab(self.home_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
 
         # Create footer
         footer_frame = tk.Frame(root, bg=self.primary_color, height=25)
@@ -165,14 +200,184 @@ class PharmacyApp:
                                 font=("Segoe UI", 8), bg=self.primary_color, fg="#ffffff")
         footer_label.pack(side="right", padx=10, pady=3)
 
+        # Busy indicator, shown while background tasks are running
+        self.busy_label = tk.Label(footer_frame, text="Working...",
+                                   font=("Segoe UI", 8), bg=self.primary_color, fg="#ffffff")
+        self.busy_bar = ttk.Progressbar(footer_frame, mode="indeterminate", length=120)
+        self.tasks.add_busy_listener(self.show_busy)
+        self.show_busy(self.tasks.pending > 0)
+
+        self.root.after_idle(self.startup_done)
+
+    def startup_done(self):
+        profile.mark("Main window usable")
+        profile.report()
+
+    def ensure_tab(self, tab):
+        """Build tab if it has not been built yet; returns True if it was built now"""
+        tab = str(tab)
+        if tab in self.built_tabs:
+            return False
+
+        self.built_tabs.add(tab)
+        name = f"{self.notebook.tab(tab, 'text')} tab"
+        with profile.phase(name), tracer.span(f"build {name}", 'widgets'):
+            self.tab_builders[tab]()
+        return True
+
+    def tab_built(self, tab):
+        return str(tab) in self.built_tabs
+
+    def show_busy(self, busy):
+        if busy:
+            self.busy_label.pack(side="left", padx=10, pady=3)
+            self.busy_bar.pack(side="left", pady=3)
+            self.busy_bar.start(15)
+            self.root.configure(cursor="watch")
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.busy_label.pack_forget()
+            self.root.configure(cursor="")
+
+    def on_data_changed(self, version, table, keys):
+        # Called on the thread that made the write; hand over to Tk
+        self.tasks.call_soon(self.queue_change, table, keys)
+        if table in ('medicines', 'suppliers'):
+            self.session.refresh_search()
+
+    def refresh_medicine_search(self):
+        if self.tasks.closed:
+            return
+        self.session.refresh_search()
+        self.root.after(self.medicine_search.refresh_interval * 1000, self.refresh_medicine_search)
+
+    def queue_change(self, table, keys):
+        # Tabs that have not been built yet load fresh rows when they are
+        shown_in = {
+            'medicines': (self.medicines_tab, self.stock_alerts_tab),
+            'suppliers': (self.medicines_tab, self.suppliers_tab),
+            'supplies': (self.suppliers_tab,),
+            'bills': (self.billing_history_tab,),
+        }
+        if not any(self.tab_built(tab) for tab in shown_in.get(table, ())):
+            return
+
+        # Changes that arrive together (a bill touches bills and medicines) are fetched together
+        pending = self.pending_changes.get(table, set())
+        if keys is None or pending is None:
+            self.pending_changes[table] = None
+        else:
+            self.pending_changes[table] = pending | set(keys)
+
+        if not self.change_flush_scheduled:
+            self.change_flush_scheduled = True
+            self.root.after_idle(self.flush_changes)
+
+    def flush_changes(self):
+        self.change_flush_scheduled = False
+        for table in list(self.pending_changes):
+            # One fetch per table at a time, so an older result can never overwrite a newer one
+            if table in self.change_fetches:
+                continue
+
+            keys = self.pending_changes.pop(table)
+            if keys is None:
+                # The writer did not say which rows it touched
+                self.reload_table(table)
+                continue
+
+            fetch = {
+                'medicines': self.medicine_repo.get_medicines_by_ids,
+                'suppliers': self.fetch_supplier_changes,
+                'supplies': self.supplier_repo.get_supply_records_by_ids,
+                'bills': self.billing_repo.get_bills_by_ids,
+            }[table]
+
+            self.change_fetches.add(table)
+            self.tasks.submit(('changes', table), fetch, keys,
+                              on_success=lambda rows, t=table, k=keys: self.apply_change(t, k, rows),
+                              on_error=lambda error, t=table: self.change_fetch_done(t))
+
+    def change_fetch_done(self, table):
+        self.change_fetches.discard(table)
+        if table in self.pending_changes and not self.change_flush_scheduled:
+            self.change_flush_scheduled = True
+            self.root.after_idle(self.flush_changes)
+
+    def fetch_supplier_changes(self, supplier_ids):
+        # The supplier dropdowns list every name, so they are re-read along with the rows
+        suppliers = self.supplier_repo.get_suppliers_by_ids(supplier_ids)
+        if suppliers is None:
+            return None
+        self.medicine_repo.load_suppliers()
+        return suppliers, self.medicine_repo.get_supplier_names()
+
+    def apply_change(self, table, keys, rows):
+        self.change_fetch_done(table)
+        if rows is None:
+            # The read failed and was reported; leave the rows as they are
+            return
+
+        if table == 'medicines':
+            if self.tab_built(self.medicines_tab):
+                self.medicine_tree.apply_changes(keys, rows, add_new=self.medicine_view_full)
+            if self.notebook.tab(self.notebook.select(), "text") == "Stock Alerts":
+                self.load_low_stock_medicines()
+
+        elif table == 'suppliers':
+            rows, supplier_names = rows
+
+            # Medicine and supply rows show the supplier's name
+            if self.tab_built(self.medicines_tab):
+                self.medicine_entries["Supplier Name"]['values'] = supplier_names
+                medicine_ids = [row['medicine_id'] for row in self.medicine_tree.rows if row['supplier_id'] in keys]
+                if medicine_ids:
+                    self.queue_change('medicines', medicine_ids)
+
+            if self.tab_built(self.suppliers_tab):
+                self.supplier_search_tree.apply_changes(keys, rows, add_new=self.supplier_view_full)
+                self.supplier_combo['values'] = ["All Suppliers"] + supplier_names
+                supply_ids = [row['supply_id'] for row in self.supply_tree.rows if row['supplier_id'] in keys]
+                if supply_ids:
+                    self.queue_change('supplies', supply_ids)
+
+        elif table == 'supplies':
+            # Supplies are listed newest first
+            self.supply_tree.apply_changes(keys, rows, add_new=self.supply_view_full, at_start=True)
+
+        elif table == 'bills':
+            # Bills are never deleted, so only the rows read back are applied;
+            # a failed read cannot empty the history. Newest bills come first.
+            bill_ids = [row['bill_id'] for row in rows]
+            self.history_tree.apply_changes(bill_ids, rows, add_new=self.bill_view_full, at_start=True)
+
+    def reload_table(self, table):
+        if table == 'medicines' and self.tab_built(self.medicines_tab) and self.medicine_view_full:
+            self.load_medicines()
+        elif table == 'suppliers' and self.tab_built(self.suppliers_tab) and self.supplier_view_full:
+            self.load_suppliers()
+        elif table == 'supplies' and self.tab_built(self.suppliers_tab) and self.supply_view_full:
+            self.load_supplies()
+        elif table == 'bills' and self.tab_built(self.billing_history_tab) and self.bill_view_full:
+            self.load_bills()
+
     def logout(self):
         from app_controller import start_main_app
-        self.db.close()
+        self.db.changes.unsubscribe(self.on_data_changed)
+        self.tasks.shutdown()
+        self.session.close()
         self.root.destroy()
         root = tk.Tk()
-        login = LoginPage(root, lambda: start_main_app(root))
+        session = AppSession()
+        session.warm_up()
+        login = LoginPage(root, lambda: start_main_app(root, session), session)
         root.mainloop()
 
+    def show_diagnostics(self):
+        from gui.diagnostics_window import DiagnosticsWindow
+        DiagnosticsWindow(self.root, self.db.instrumentation, tracer)
+
     def get_gradient_color(self, index):
         # Create a gradient effect
         colors = ["#7c4dff", "#651fff", "#6200ea"]
@@ -242,6 +447,9 @@ class PharmacyApp:
             desc.bind("<Button-1>", lambda e, cmd=command: cmd())
 
     def setup_medicines_tab(self):
+        # tkcalendar is only loaded by the tabs that have date pickers
+        from tkcalendar import DateEntry
+
         # Create a notebook for medicine operations
         medicine_notebook = ttk.Notebook(self.medicines_tab)
         medicine_notebook.pack(fill="both", expand=True, padx=20, pady=10)
@@ -386,23 +594,20 @@ class PharmacyApp:
         results_frame = ttk.LabelFrame(search_medicine_frame, text="Search Results")
         results_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Create treeview for medicine results
-        columns = ("ID", "Name", "Supplier", "Price (₹)", "Quantity", "Expiry Date", "Location")
-        self.medicine_tree = ttk.Treeview(results_frame, columns=columns, show="headings", height=10)
-
-        # Configure columns
-        for col in columns:
-            self.medicine_tree.heading(col, text=col)
-            width = 150 if col == "Name" or col == "Supplier" else 100
-            self.medicine_tree.column(col, width=width, anchor="center")
-
+        # Virtual table for medicine results; only the visible rows become Treeview items
+        columns = [
+            ("ID", "medicine_id", 100),
+            ("Name", "name", 150),
+            ("Supplier", "supplier_name", 150),
+            ("Price (₹)", "price", 100),
+            ("Quantity", "quantity", 100),
+            ("Expiry Date", "expiry_date", 100),
+            ("Location", "location", 100),
+        ]
+        self.medicine_tree = VirtualTable(results_frame, columns, key=lambda row: row['medicine_id'],
+                                          format_row=self.format_medicine_row, height=10)
         self.medicine_tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Add scrollbar for the treeview
-        tree_scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.medicine_tree.yview)
-        tree_scrollbar.pack(side="right", fill="y")
-        self.medicine_tree.configure(yscrollcommand=tree_scrollbar.set)
-
         # Action buttons
         action_frame = ttk.Frame(search_medicine_frame)
         action_frame.pack(fill="x", padx=10, pady=10)
@@ -420,7 +625,9 @@ class PharmacyApp:
         self.load_medicines()
     def generate_medicine_id(self):
         # Generate a unique medicine ID
-        medicine_id = f"MED{random.randint(1000, 9999)}"
+        medicine_id = self.ids.next_id('medicine')
+        if not medicine_id:
+            return
         current_state = self.medicine_entries["Medicine ID"]['state']
         self.medicine_entries["Medicine ID"].config(state='normal')
         self.medicine_entries["Medicine ID"].delete(0, tk.END)
@@ -451,7 +658,6 @@ class PharmacyApp:
         if success:
             messagebox.showinfo("Success", "Medicine added successfully")
             self.clear_medicine_form()
-            self.load_medicines()
 
     def update_medicine(self):
         # Get data from form
@@ -476,7 +682,6 @@ class PharmacyApp:
 
         if success:
             messagebox.showinfo("Success", "Medicine updated successfully")
-            self.load_medicines()
 
     def clear_medicine_form(self, keep_id_state=False):
         # Clear all entry fields
@@ -533,24 +738,26 @@ class PharmacyApp:
             messagebox.showerror("Error", f"Medicine with ID {medicine_id} not found")
 
     def load_medicines(self):
-        # Clear treeview
-        for item in self.medicine_tree.get_children():
-            self.medicine_tree.delete(item)
-
-        # Get all medicines from database
-        medicines = self.medicine_repo.get_all_medicines()
-
-        # Add medicines to treeview
-        for medicine in medicines:
-            self.medicine_tree.insert("", "end", values=(
-                medicine["medicine_id"],
-                medicine['name'],
-                medicine['supplier_name'],
-                f"₹{medicine['price']}",
-                medicine['quantity'],
-                medicine['expiry_date'].strftime('%Y-%m-%d') if medicine['expiry_date'] else "",
-                medicine['location']
-            ))
+        # Served from the medicine catalog, which is usually warm from login;
+        # refreshing it may hit the database, so do it in the background
+        self.tasks.submit('medicines', self.medicine_repo.catalog.all,
+                          on_success=self.show_medicines)
+
+    def show_medicines(self, medicines, full=True):
+        # New medicines are only added to the table while it shows the full list
+        self.medicine_view_full = full
+        self.medicine_tree.set_rows(medicines)
+
+    def format_medicine_row(self, medicine):
+        return (
+            medicine["medicine_id"],
+            medicine['name'],
+            medicine['supplier_name'],
+            f"₹{medicine['price']}",
+            medicine['quantity'],
+            medicine['expiry_date'].strftime('%Y-%m-%d') if medicine['expiry_date'] else "",
+            medicine['location']
+        )
 
     def search_medicines(self):
         search_by = self.search_by_var.get()
@@ -560,28 +767,14 @@ class PharmacyApp:
             messagebox.showerror("Error", "Please enter a search term")
             return
 
-        # Clear treeview
-        for item in self.medicine_tree.get_children():
-            self.medicine_tree.delete(item)
-
-        # Search medicines in database
-        medicines = self.medicine_repo.search_medicines(search_by, search_term)
-
-        if not medicines:
-            messagebox.showinfo("Info", "No medicines found matching your search")
-            return
+        def show_results(medicines):
+            self.show_medicines(medicines, full=False)
+            if not medicines:
+                messagebox.showinfo("Info", "No medicines found matching your search")
 
-        # Add medicines to treeview
-        for medicine in medicines:
-            self.medicine_tree.insert("", "end", values=(
-                medicine["medicine_id"],
-                medicine['name'],
-                medicine['supplier_name'],
-                f"₹{medicine['price']}",
-                medicine['quantity'],
-                medicine['expiry_date'].strftime('%Y-%m-%d') if medicine['expiry_date'] else "",
-                medicine['location']
-            ))
+        # Search medicines in database; a newer search or reload supersedes this one
+        self.tasks.submit('medicines', self.medicine_repo.search_medicines, search_by, search_term,
+                          on_success=show_results)
 
     def reset_medicine_search(self):
         self.search_term_entry.delete(0, tk.END)
@@ -626,9 +819,10 @@ class PharmacyApp:
 
             if success:
                 messagebox.showinfo("Success", "Medicine deleted successfully")
-                self.load_medicines()
 
     def setup_suppliers_tab(self):
+        from tkcalendar import DateEntry
+
         # Create a notebook for supplier operations
         supplier_notebook = ttk.Notebook(self.suppliers_tab)
         supplier_notebook.pack(fill="both", expand=True, padx=20, pady=10)
@@ -688,8 +882,7 @@ class PharmacyApp:
 
             if label_text == "Medicine Supplied:":
                 # Get all medicines for dropdown
-                medicines = self.medicine_repo.get_all_medicines()
-                medicine_names = [medicine['name'] for medicine in medicines]
+                medicine_names = self.medicine_repo.catalog.names()
 
                 entry = ttk.Combobox(supplier_frame, width=23, values=medicine_names)
             else:
@@ -778,23 +971,18 @@ class PharmacyApp:
         results_frame = ttk.LabelFrame(search_supplier_frame, text="Search Results")
         results_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Create treeview for supplier results
-        columns = ("ID", "Name", "Contact No", "Email", "Address")
-        self.supplier_search_tree = ttk.Treeview(results_frame, columns=columns, show="headings", height=10)
-
-        # Configure columns
-        for col in columns:
-            self.supplier_search_tree.heading(col, text=col)
-            width = 200 if col == "Address" else 120
-            self.supplier_search_tree.column(col, width=width, anchor="center")
-
+        # Virtual table for supplier results
+        columns = [
+            ("ID", "supplier_id", 120),
+            ("Name", "name", 120),
+            ("Contact No", "contact", 120),
+            ("Email", "email", 120),
+            ("Address", "address", 200),
+        ]
+        self.supplier_search_tree = VirtualTable(results_frame, columns, key=lambda row: row['supplier_id'],
+                                                 format_row=self.format_supplier_row, height=10)
         self.supplier_search_tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Add scrollbar for the treeview
-        tree_scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.supplier_search_tree.yview)
-        tree_scrollbar.pack(side="right", fill="y")
-        self.supplier_search_tree.configure(yscrollcommand=tree_scrollbar.set)
-
         # Action buttons
         action_frame = ttk.Frame(search_supplier_frame)
         action_frame.pack(fill="x", padx=10, pady=10)
@@ -820,9 +1008,8 @@ class PharmacyApp:
         supplier_label = ttk.Label(supply_search_frame, text="Supplier:")
         supplier_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
-        # Get all suppliers for dropdown
-        suppliers = self.supplier_repo.get_all_suppliers()
-        supplier_options = ["All Suppliers"] + [supplier['name'] for supplier in suppliers]
+        # Get all suppliers for dropdown (cached, usually loaded during login)
+        supplier_options = ["All Suppliers"] + self.medicine_repo.get_supplier_names()
 
         self.supplier_combo = ttk.Combobox(supply_search_frame, width=25)
         self.supplier_combo['values'] = supplier_options
@@ -860,30 +1047,28 @@ class PharmacyApp:
         supply_results_frame = ttk.LabelFrame(supply_records_frame, text="Supply Records")
         supply_results_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Create treeview for supply records
-        columns = ("Supplier ID", "Supplier", "Medicine", "Quantity", "Amount Paid (₹)", "Supply Date")
-        self.supply_tree = ttk.Treeview(supply_results_frame, columns=columns, show="headings", height=10)
-
-        # Configure columns
-        for col in columns:
-            self.supply_tree.heading(col, text=col)
-            width = 150 if col == "Supplier" or col == "Medicine" else 120
-            self.supply_tree.column(col, width=width, anchor="center")
-
+        # Virtual table for supply records
+        columns = [
+            ("Supplier ID", "supplier_id", 120),
+            ("Supplier", "supplier_name", 150),
+            ("Medicine", "medicine_name", 150),
+            ("Quantity", "quantity", 120),
+            ("Amount Paid (₹)", "amount", 120),
+            ("Supply Date", "supply_date", 120),
+        ]
+        self.supply_tree = VirtualTable(supply_results_frame, columns, key=lambda row: row['supply_id'],
+                                        format_row=self.format_supply_row, height=10)
         self.supply_tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(supply_results_frame, orient="vertical", command=self.supply_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.supply_tree.configure(yscrollcommand=scrollbar.set)
-
         # Load suppliers and supplies
         self.load_suppliers()
         self.load_supplies()
 
     def generate_supplier_id(self):
         # Generate a unique supplier ID
-        supplier_id = f"SUP{random.randint(1000, 9999)}"
+        supplier_id = self.ids.next_id('supplier')
+        if not supplier_id:
+            return
         self.supplier_entries["Supplier ID"].delete(0, tk.END)
         self.supplier_entries["Supplier ID"].insert(0, supplier_id)
 
@@ -906,19 +1091,9 @@ class PharmacyApp:
         success = self.supplier_repo.add_supplier(supplier_data)
 
         if success:
-            # Refresh the supplier list in medicine repository
-            self.medicine_repo.load_suppliers()
-
-            # Update the supplier dropdown in the medicine tab
-            supplier_names = self.medicine_repo.get_supplier_names()
-            self.medicine_entries["Supplier Name"]['values'] = supplier_names
-
-            # Also update the supplier combo in the supply records tab if needed
-            self.supplier_combo['values'] = ["All Suppliers"] + supplier_names
-
+            # The supplier dropdowns and tables are refreshed by on_data_changed
             messagebox.showinfo("Success", "Supplier added successfully")
             self.clear_supplier_form()
-            self.load_suppliers()
 
     def add_supply_record(self):
         # Get supplier ID
@@ -942,19 +1117,15 @@ class PharmacyApp:
             messagebox.showerror("Error", "Please select a medicine")
             return
 
-        # Get medicine ID
-        medicines = self.medicine_repo.get_all_medicines()
-        medicine_id = None
-
-        for medicine in medicines:
-            if medicine['name'] == medicine_name:
-                medicine_id = medicine['medicine_id']
-                break
+        # Get medicine ID from the catalog cache
+        medicine = self.medicine_repo.catalog.find_by_name(medicine_name)
 
-        if not medicine_id:
+        if not medicine:
             messagebox.showerror("Error", f"Medicine {medicine_name} not found")
             return
 
+        medicine_id = medicine['medicine_id']
+
         # Get other supply data
         quantity = self.supply_entries["Quantity Supplied"].get()
         amount = self.supply_entries["Amount Paid (₹)"].get().replace('₹', '')
@@ -987,7 +1158,6 @@ class PharmacyApp:
         if success:
             messagebox.showinfo("Success", "Supply record added successfully")
             self.clear_supply_form()
-            self.load_supplies()
 
     def clear_supplier_form(self):
         # Clear all entry fields
@@ -1009,22 +1179,22 @@ class PharmacyApp:
         self.supply_date.set_date(datetime.datetime.now())
 
     def load_suppliers(self):
-        # Clear treeview
-        for item in self.supplier_search_tree.get_children():
-            self.supplier_search_tree.delete(item)
-
-        # Get all suppliers from database
-        suppliers = self.supplier_repo.get_all_suppliers()
-
-        # Add suppliers to treeview
-        for supplier in suppliers:
-            self.supplier_search_tree.insert("", "end", values=(
-                supplier['supplier_id'],
-                supplier['name'],
-                supplier['contact'],
-                supplier['email'],
-                supplier['address']
-            ))
+        # Get all suppliers from database in the background
+        self.tasks.submit('suppliers', self.supplier_repo.get_all_suppliers,
+                          on_success=self.show_suppliers)
+
+    def show_suppliers(self, suppliers, full=True):
+        self.supplier_view_full = full
+        self.supplier_search_tree.set_rows(suppliers)
+
+    def format_supplier_row(self, supplier):
+        return (
+            supplier['supplier_id'],
+            supplier['name'],
+            supplier['contact'],
+            supplier['email'],
+            supplier['address']
+        )
 
     def search_suppliers(self):
         search_by = self.supplier_search_by_var.get()
@@ -1034,22 +1204,9 @@ class PharmacyApp:
             messagebox.showerror("Error", "Please enter a search term")
             return
 
-        # Clear treeview
-        for item in self.supplier_search_tree.get_children():
-            self.supplier_search_tree.delete(item)
-
         # Search suppliers in database
-        suppliers = self.supplier_repo.search_suppliers(search_by, search_term)
-
-        # Add suppliers to treeview
-        for supplier in suppliers:
-            self.supplier_search_tree.insert("", "end", values=(
-                supplier['supplier_id'],
-                supplier['name'],
-                supplier['contact'],
-                supplier['email'],
-                supplier['address']
-            ))
+        self.tasks.submit('suppliers', self.supplier_repo.search_suppliers, search_by, search_term,
+                          on_success=lambda suppliers: self.show_suppliers(suppliers, full=False))
 
     def reset_supplier_search(self):
         self.supplier_search_term_entry.delete(0, tk.END)
@@ -1105,7 +1262,6 @@ class PharmacyApp:
 
             if success:
                 messagebox.showinfo("Success", "Supplier deleted successfully")
-                self.load_suppliers()
 
     def view_supplier_supplies(self):
         selected_item = self.supplier_search_tree.selection()
@@ -1130,55 +1286,44 @@ class PharmacyApp:
         self.search_supplies()
 
     def load_supplies(self):
-        # Clear treeview
-        for item in self.supply_tree.get_children():
-            self.supply_tree.delete(item)
-
-        # Get all supplies from database
-        supplies = self.supplier_repo.get_supply_records()
-
-        # Add supplies to treeview
-        for supply in supplies:
-            self.supply_tree.insert("", "end", values=(
-                supply['supplier_id'],
-                supply['supplier_name'],
-                supply['medicine_name'],
-                supply['quantity'],
-                f"₹{supply['amount']}",
-                supply['supply_date'].strftime('%Y-%m-%d')
-            ))
+        # Get all supplies from database in the background
+        self.tasks.submit('supplies', self.supplier_repo.get_supply_records,
+                          on_success=self.show_supplies)
+
+    def show_supplies(self, supplies, full=True):
+        self.supply_view_full = full
+        self.supply_tree.set_rows(supplies)
+
+    def format_supply_row(self, supply):
+        return (
+            supply['supplier_id'],
+            supply['supplier_name'],
+            supply['medicine_name'],
+            supply['quantity'],
+            f"₹{supply['amount']}",
+            supply['supply_date'].strftime('%Y-%m-%d')
+        )
 
     def search_supplies(self):
         supplier_name = self.supplier_combo.get()
         from_date = self.from_date_supply.get_date()
         to_date = self.to_date_supply.get_date()
 
-        # Get supplier ID from name
-        supplier_id = None
-        if supplier_name != "All Suppliers":
-            suppliers = self.supplier_repo.get_all_suppliers()
-            for supplier in suppliers:
-                if supplier['name'] == supplier_name:
-                    supplier_id = supplier['supplier_id']
-                    break
+        def fetch_supplies():
+            # Get supplier ID from name
+            supplier_id = None
+            if supplier_name != "All Suppliers":
+                suppliers = self.supplier_repo.get_all_suppliers()
+                for supplier in suppliers:
+                    if supplier['name'] == supplier_name:
+                        supplier_id = supplier['supplier_id']
+                        break
 
-        # Clear treeview
-        for item in self.supply_tree.get_children():
-            self.supply_tree.delete(item)
+            return self.supplier_repo.get_supply_records(supplier_id, from_date, to_date)
 
         # Search supplies in database
-        supplies = self.supplier_repo.get_supply_records(supplier_id, from_date, to_date)
-
-        # Add supplies to treeview
-        for supply in supplies:
-            self.supply_tree.insert("", "end", values=(
-                supply['supplier_id'],
-                supply['supplier_name'],
-                supply['medicine_name'],
-                supply['quantity'],
-                f"₹{supply['amount']}",
-                supply['supply_date'].strftime('%Y-%m-%d')
-            ))
+        self.tasks.submit('supplies', fetch_supplies,
+                          on_success=lambda supplies: self.show_supplies(supplies, full=False))
 
     def setup_billing_tab(self):
         # Create a main frame with scrollbar for billing tab
@@ -1283,7 +1428,11 @@ class PharmacyApp:
         med_search_label = ttk.Label(search_row, text="Search Medicine:")
         med_search_label.pack(side="left", padx=5)
 
-        self.med_search_entry = ttk.Entry(search_row, width=20)
+        # Suggestions by id or name as you type, best sellers first
+        self.med_search_entry = AutocompleteEntry(search_row, self.medicine_search.suggest,
+                                                  self.select_medicine_for_bill,
+                                                  format_item=self.format_medicine_suggestion,
+                                                  width=30)
         self.med_search_entry.pack(side="left", padx=5)
 
         med_search_btn = ttk.Button(search_row, text="Search", command=self.search_medicine_for_bill)
@@ -1295,17 +1444,21 @@ class PharmacyApp:
         med_label = ttk.Label(selection_row, text="Medicine:")
         med_label.pack(side="left", padx=5)
 
-        medicines = self.medicine_repo.get_all_medicines()
-        medicine_names = [medicine['name'] for medicine in medicines]
+        medicine_names = self.medicine_repo.catalog.names()
 
         self.med_combo = ttk.Combobox(selection_row, width=20, font=self.normal_font, values=medicine_names)
         self.med_combo.pack(side="left", padx=5)
 
+        # Id of the medicine picked from the suggestions, so equal names cannot be confused
+        self.selected_medicine_id = None
+        self.med_combo.bind("<<ComboboxSelected>>", lambda e: setattr(self, 'selected_medicine_id', None))
+
         qty_label = ttk.Label(selection_row, text="Quantity:")
         qty_label.pack(side="left", padx=5)
 
         self.qty_entry = ttk.Entry(selection_row, width=10)
         self.qty_entry.pack(side="left", padx=5)
+        self.qty_entry.bind("<Return>", lambda e: self.add_medicine_to_bill())
 
         button_row = ttk.Frame(add_med_frame)
         button_row.pack(fill="x", padx=5, pady=10)
@@ -1363,7 +1516,9 @@ class PharmacyApp:
     
     def generate_customer_id(self):
         # Generate a unique customer ID
-        customer_id = f"CUST{random.randint(1000, 9999)}"
+        customer_id = self.ids.next_id('customer')
+        if not customer_id:
+            return
         self.customer_bill_entries["Customer ID"].delete(0, tk.END)
         self.customer_bill_entries["Customer ID"].insert(0, customer_id)
     
@@ -1499,8 +1654,8 @@ class PharmacyApp:
             messagebox.showerror("Error", "Please enter a search term")
             return
         
-        # Search medicines in database
-        medicines = self.medicine_repo.search_medicines("Name", search_term)
+        # Search the in-memory medicine index
+        medicines = self.medicine_search.suggest(search_term, limit=50)
         
         if not medicines:
             messagebox.showinfo("Info", "No medicines found")
@@ -1512,7 +1667,21 @@ class PharmacyApp:
         
         # If only one medicine found, select it
         if len(medicines) == 1:
-            self.med_combo.set(medicines[0]['name'])
+            self.select_medicine_for_bill(medicines[0])
+
+    def format_medicine_suggestion(self, medicine):
+        return f"{medicine['name']}  ({medicine['medicine_id']})  ₹{medicine['price']}  stock {medicine['quantity']}"
+
+    def select_medicine_for_bill(self, medicine):
+        self.med_combo.set(medicine['name'])
+        self.selected_medicine_id = medicine['medicine_id']
+        self.med_search_entry.delete(0, tk.END)
+
+        # Ready for the quantity, then Enter adds the line
+        self.qty_entry.delete(0, tk.END)
+        self.qty_entry.insert(0, "1")
+        self.qty_entry.select_range(0, tk.END)
+        self.qty_entry.focus_set()
     
     def add_medicine_to_bill(self):
         medicine_name = self.med_combo.get()
@@ -1534,15 +1703,20 @@ class PharmacyApp:
             messagebox.showerror("Error", "Quantity must be a positive integer")
             return
         
-        # Get medicine from database
-        medicines = self.medicine_repo.search_medicines("Name", medicine_name)
+        # Get medicine from the catalog cache, by id when it was picked from the
+        # suggestions; create_bill re-checks stock when saving
+        medicine = None
+        if self.selected_medicine_id:
+            medicine = self.medicine_repo.catalog.get(self.selected_medicine_id)
+            if medicine and medicine['name'] != medicine_name:
+                medicine = None
+        if medicine is None:
+            medicine = self.medicine_repo.catalog.find_by_name(medicine_name)
         
-        if not medicines:
+        if not medicine:
             messagebox.showerror("Error", f"Medicine {medicine_name} not found")
             return
         
-        medicine = medicines[0]
-        
         # Check if quantity is available
         if quantity > int(medicine['quantity']):
             messagebox.showerror("Error", f"Only {medicine['quantity']} units of {medicine_name} available")
@@ -1575,7 +1749,9 @@ class PharmacyApp:
         
         # Clear medicine selection
         self.med_combo.set("")
+        self.selected_medicine_id = None
         self.qty_entry.delete(0, tk.END)
+        self.med_search_entry.focus_set()
     
     def remove_medicine_from_bill(self):
         selected_item = self.billing_tree.selection()
@@ -1642,9 +1818,15 @@ class PharmacyApp:
         if not self.bill_items:
             messagebox.showerror("Error", "Please add at least one medicine to the bill")
             return
+
+        # Ignore repeated clicks while the previous bill is still being saved
+        if self.tasks.is_running('generate_bill'):
+            return
         
         # Generate bill ID
-        bill_id = f"BILL-{random.randint(1000, 9999)}"
+        bill_id = self.ids.next_id('bill')
+        if not bill_id:
+            return
         
         # Get customer details
         customer_name = self.customer_bill_entries["Customer Name"].get()
@@ -1672,26 +1854,28 @@ class PharmacyApp:
             'customer_contact': customer_contact,
             'customer_address': customer_address,
             'date': current_date,
-            'items': self.bill_items,
+            'items': list(self.bill_items),
             'subtotal': subtotal_formatted,
             'tax': tax_formatted,
             'total': total_formatted
         }
         
-        # Save bill to database
-        success = self.billing_repo.create_bill(bill_data)
-        
-        if success:
-            # Show bill preview
-            bill_preview = BillPreviewWindow(self.root, bill_data)
-            
-            # Clear bill form for next bill
-            self.clear_bill()
-            
-            # Refresh medicines (quantities have changed)
-            self.load_medicines()
+        def bill_saved(success):
+            if success:
+                # Show bill preview
+                bill_preview = BillPreviewWindow(self.root, bill_data, self.tasks)
+                
+                # Clear bill form for next bill; the stock and history tables
+                # pick up the new quantities and bill through on_data_changed
+                self.clear_bill()
+
+        # Save bill to database in the background; errors are reported by the repository
+        self.tasks.submit('generate_bill', self.billing_repo.create_bill, bill_data,
+                          on_success=bill_saved)
 
     def setup_billing_history_tab(self):
+        from tkcalendar import DateEntry
+
         # Create a frame for billing history
         history_frame = ttk.Frame(self.billing_history_tab)
         history_frame.pack(fill="both", expand=True, padx=20, pady=20)
@@ -1716,6 +1900,7 @@ class PharmacyApp:
 
         self.bill_search_entry = ttk.Entry(search_frame, width=25)
         self.bill_search_entry.grid(row=0, column=3, padx=10, pady=10, sticky="w")
+        self.bill_search_entry.bind("<Return>", lambda e: self.search_bills())
 
         # Search button
         search_btn = ttk.Button(search_frame, text="Search", command=self.search_bills)
@@ -1751,27 +1936,22 @@ class PharmacyApp:
         results_frame = ttk.LabelFrame(history_frame, text="Billing History")
         results_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        columns = ("Bill ID", "Customer ID", "Customer Name", "Medicines", "Amount (₹)", "Date")
-        self.history_tree = ttk.Treeview(results_frame, columns=columns, show="headings", height=15)
-
-        # Configure columns
-        for col in columns:
-            self.history_tree.heading(col, text=col)
-            if col == "Customer Name":
-                width = 150
-            elif col == "Medicines":
-                width = 250  # Wider column for medicines list
-            else:
-                width = 120
-            self.history_tree.column(col, width=width, anchor="center")
-
+        # Virtual table; scrolling near the bottom fetches the next page of bills
+        columns = [
+            ("Bill ID", "bill_id", 120),
+            ("Customer ID", "customer_id", 120),
+            ("Customer Name", "customer_name", 150),
+            ("Medicines", "medicines", 250),  # Wider column for medicines list
+            ("Amount (₹)", "total", 120),
+            ("Date", "bill_date", 120),
+        ]
+        self.bill_page_cursor = None
+        self.bills_exhausted = True
+        self.history_tree = VirtualTable(results_frame, columns, key=lambda row: row['bill_id'],
+                                         format_row=self.format_bill_row, height=15,
+                                         on_near_end=self.load_more_bills)
         self.history_tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.history_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.history_tree.configure(yscrollcommand=scrollbar.set)
-
         # Action buttons
         action_frame = ttk.Frame(history_frame)
         action_frame.pack(fill="x", padx=10, pady=10)
@@ -1785,31 +1965,48 @@ class PharmacyApp:
         # Load bills
         self.load_bills()
 
-        # Add this to refresh whenever the tab is selected
-        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    def load_bills(self):
+        self.history_tree.clear()
+
+        # Start again from the newest bill; older pages load as the user scrolls
+        self.tasks.cancel('bills')
+        self.bill_view_full = True
+        self.bill_page_cursor = None
+        self.bills_exhausted = False
+
+        # The first page is usually fetched while the login screen was shown
+        bills = self.session.take_recent_bills(self.BILL_PAGE_SIZE)
+        if bills is not None:
+            self.add_bill_page(bills)
+            return
+        self.load_more_bills()
 
-    def on_tab_changed(self, event):
-        if self.notebook.index("current") == 4:  # Billing History tab is index 4
-            self.load_bills()
+    def load_more_bills(self):
+        if self.bills_exhausted or self.tasks.is_running('bills'):
+            return
 
-    def load_bills(self):
-        # Clear treeview
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
-        # Get all bills from database
-        bills = self.billing_repo.get_all_bills()
-
-        # Add bills to treeview
-        for bill in bills:
-            self.history_tree.insert("", "end", values=(
-                bill['bill_id'],
-                bill['customer_id'],
-                bill['customer_name'],
-                bill.get('medicines', 'N/A'),  # Added medicines column
-                f"₹{bill['total']}",
-                bill['bill_date'].strftime('%Y-%m-%d')
-            ))
+        self.tasks.submit('bills', self.billing_repo.get_bills_page,
+                          self.BILL_PAGE_SIZE, self.bill_page_cursor,
+                          on_success=self.add_bill_page)
+
+    def add_bill_page(self, bills):
+        if len(bills) < self.BILL_PAGE_SIZE:
+            self.bills_exhausted = True
+        if bills:
+            self.bill_page_cursor = (bills[-1]['bill_date'], bills[-1]['bill_id'])
+
+        with tracer.span("history rows", 'widgets', rows=len(bills)):
+            self.history_tree.append_rows(bills)
+
+    def format_bill_row(self, bill):
+        return (
+            bill['bill_id'],
+            bill['customer_id'],
+            bill['customer_name'],
+            bill.get('medicines') or 'N/A',  # Added medicines column
+            f"₹{bill['total']}",
+            bill['bill_date'].strftime('%Y-%m-%d')
+        )
 
     def search_bills(self):
         search_by = self.bill_search_by_var.get()
@@ -1819,45 +2016,27 @@ class PharmacyApp:
             messagebox.showerror("Error", "Please enter a search term")
             return
 
-        # Clear treeview
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
-        # Search bills in database
-        bills = self.billing_repo.search_bills(search_by, search_term)
-
-        # Add bills to treeview
-        for bill in bills:
-            self.history_tree.insert("", "end", values=(
-                bill['bill_id'],
-                bill['customer_id'],
-                bill['customer_name'],
-                bill.get('medicines', 'N/A'),  # Added medicines column
-                f"₹{bill['total']}",
-                bill['bill_date'].strftime('%Y-%m-%d')
-            ))
+        if search_by == 'Date' and not parse_date_range(search_term):
+            messagebox.showerror("Error", "Enter a date such as 2025-03-14, 14-03-2025, 2025-03, Mar 2025 or 2025")
+            return
+
+        # Search bills in database, best matches first; replaces any page still loading
+        self.tasks.submit('bills', self.billing_repo.search_bills, search_by, search_term,
+                          on_success=self.show_bill_results)
 
     def filter_bills_by_date(self):
         from_date = self.from_date.get_date()
         to_date = self.to_date.get_date()
 
-        # Clear treeview
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
         # Filter bills in database
-        bills = self.billing_repo.filter_bills_by_date(from_date, to_date)
-
-        # Add bills to treeview
-        for bill in bills:
-            self.history_tree.insert("", "end", values=(
-                bill['bill_id'],
-                bill['customer_id'],
-                bill['customer_name'],
-                bill.get('medicines', 'N/A'),  # Added medicines column
-                f"₹{bill['total']}",
-                bill['bill_date'].strftime('%Y-%m-%d')
-            ))
+        self.tasks.submit('bills', self.billing_repo.filter_bills_by_date, from_date, to_date,
+                          on_success=self.show_bill_results)
+
+    def show_bill_results(self, bills):
+        # Results are complete, so stop paging until the history is reloaded
+        self.bills_exhausted = True
+        self.bill_view_full = False
+        self.history_tree.set_rows(bills)
 
     def view_bill_details(self):
         selected_item = self.history_tree.selection()
@@ -1869,14 +2048,16 @@ class PharmacyApp:
         # Get bill ID from selected item
         bill_id = self.history_tree.item(selected_item[0], 'values')[0]
 
-        # Get bill details from database
-        bill_data = self.billing_repo.get_bill_details(bill_id)
+        def show_details(bill_data):
+            if bill_data:
+                # Show bill preview
+                bill_preview = BillPreviewWindow(self.root, bill_data, self.tasks)
+            else:
+                messagebox.showerror("Error", f"Bill with ID {bill_id} not found")
 
-        if bill_data:
-            # Show bill preview
-            bill_preview = BillPreviewWindow(self.root, bill_data)
-        else:
-            messagebox.showerror("Error", f"Bill with ID {bill_id} not found")
+        # Get bill details from database
+        self.tasks.submit('bill_details', self.billing_repo.get_bill_details, bill_id,
+                          on_success=show_details)
     
     def print_bill(self):
         selected_item = self.history_tree.selection()
@@ -1888,37 +2069,105 @@ class PharmacyApp:
         # Get bill ID from selected item
         bill_id = self.history_tree.item(selected_item[0], 'values')[0]
 
-        # Get bill details from database
-        bill_data = self.billing_repo.get_bill_details(bill_id)
-
-        if bill_data:
-            # Generate PDF
-            pdf_generator = PDFGenerator()
-
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-                temp_path = temp_file.name
-
-            success = pdf_generator.generate_bill_pdf(bill_data, temp_path)
-
+        def pdf_ready(success, rendered_path, bill_data):
             if success:
                 # Open PDF with default viewer
-                os.startfile(temp_path)
+                os.startfile(self.pdf_cache.store(bill_data, rendered_path))
             else:
+                self.pdf_cache.discard(rendered_path)
                 messagebox.showerror("Error", "Failed to generate PDF")
-        else:
-            messagebox.showerror("Error", f"Bill with ID {bill_id} not found")
+
+        def pdf_failed(error, rendered_path):
+            # The worker raised (or died): drop the reserved file rather than leave it in the cache
+            self.pdf_cache.discard(rendered_path)
+            messagebox.showerror("Error", f"Failed to generate PDF: {error}")
+
+        def build_pdf(bill_data):
+            if not bill_data:
+                messagebox.showerror("Error", f"Bill with ID {bill_id} not found")
+                return
+
+            # Reprints of an unchanged bill open the PDF rendered last time
+            cached_path = self.pdf_cache.lookup(bill_data)
+            if cached_path is not None:
+                os.startfile(cached_path)
+                return
+
+            # ReportLab work runs in a worker process; the module is loaded on first print
+            from pdf_generator import render_bill_pdf
+            rendered_path = self.pdf_cache.reserve()
+            self.tasks.submit('print_bill', render_bill_pdf, bill_data, rendered_path, process=True,
+                              on_success=lambda success: pdf_ready(success, rendered_path, bill_data),
+                              on_error=lambda error: pdf_failed(error, rendered_path))
+
+        # Get bill details from database
+        self.tasks.submit('print_bill', self.billing_repo.get_bill_details, bill_id,
+                          on_success=build_pdf)
 
     def setup_reports_tab(self):
+        from tkcalendar import DateEntry
+
         report_frame = ttk.LabelFrame(self.reports_tab, text="Sales Analysis")
         report_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-        # Button to generate sales chart
-        generate_btn = ttk.Button(report_frame, text="View Monthly Sales Chart", command=self.show_sales_chart)
-        generate_btn.pack(pady=10)
+        # Period selector and button to generate sales chart
+        chart_options = ttk.Frame(report_frame)
+        chart_options.pack(pady=10)
+
+        period_label = ttk.Label(chart_options, text="Period:")
+        period_label.pack(side="left", padx=5)
+
+        self.sales_period_var = tk.StringVar()
+        period_combo = ttk.Combobox(chart_options, textvariable=self.sales_period_var, width=12, state="readonly")
+        period_combo['values'] = ('Daily', 'Weekly', 'Monthly')
+        period_combo.current(2)
+        period_combo.pack(side="left", padx=5)
+
+        generate_btn = ttk.Button(chart_options, text="View Sales Chart", command=self.show_sales_chart)
+        generate_btn.pack(side="left", padx=5)
         
-        bestseller_btn = ttk.Button(report_frame, text="View Best Sellers", command=self.show_best_sellers)
-        bestseller_btn.pack(pady=10)
+        # Best seller window, grouping and custom date range
+        bestseller_options = ttk.Frame(report_frame)
+        bestseller_options.pack(pady=10)
+
+        window_label = ttk.Label(bestseller_options, text="Window:")
+        window_label.pack(side="left", padx=5)
+
+        self.bestseller_window_var = tk.StringVar()
+        window_combo = ttk.Combobox(bestseller_options, textvariable=self.bestseller_window_var,
+                                    width=10, state="readonly")
+        window_combo['values'] = ('Today', '7 Days', '30 Days', 'All Time', 'Custom')
+        window_combo.current(2)
+        window_combo.pack(side="left", padx=5)
+
+        group_label = ttk.Label(bestseller_options, text="Group By:")
+        group_label.pack(side="left", padx=5)
+
+        self.bestseller_group_var = tk.StringVar()
+        group_combo = ttk.Combobox(bestseller_options, textvariable=self.bestseller_group_var,
+                                   width=10, state="readonly")
+        group_combo['values'] = ('Medicine', 'Supplier')
+        group_combo.current(0)
+        group_combo.pack(side="left", padx=5)
+
+        from_label = ttk.Label(bestseller_options, text="From:")
+        from_label.pack(side="left", padx=5)
+
+        self.bestseller_from_date = DateEntry(bestseller_options, width=12, background=self.primary_color,
+                                              foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd',
+                                              font=self.normal_font)
+        self.bestseller_from_date.pack(side="left", padx=5)
+
+        to_label = ttk.Label(bestseller_options, text="To:")
+        to_label.pack(side="left", padx=5)
+
+        self.bestseller_to_date = DateEntry(bestseller_options, width=12, background=self.primary_color,
+                                            foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd',
+                                            font=self.normal_font)
+        self.bestseller_to_date.pack(side="left", padx=5)
+
+        bestseller_btn = ttk.Button(bestseller_options, text="View Best Sellers", command=self.show_best_sellers)
+        bestseller_btn.pack(side="left", padx=5)
 
 
     # Frame to hold the chart
@@ -1926,103 +2175,110 @@ class PharmacyApp:
         self.chart_frame.pack(fill="both", expand=True)
 
     def show_sales_chart(self):
+        # Daily and weekly charts cover a recent window; monthly covers the whole history
+        period = self.sales_period_var.get()
+        today = datetime.date.today()
+        if period == 'Daily':
+            args = ('day', today - datetime.timedelta(days=29), today)
+        elif period == 'Weekly':
+            args = ('week', today - datetime.timedelta(weeks=26), today)
+        else:
+            period = 'Monthly'
+            args = ('month',)
+
+        # Query in the background, draw when the figures arrive
+        self.tasks.submit('report', self.report_repo.get_sales_series, *args,
+                          on_success=lambda series: self.draw_sales_chart(period, series))
+
+    def draw_sales_chart(self, period, series):
         # Clear previous chart if any
         for widget in self.chart_frame.winfo_children():
             widget.destroy()
 
-        # Get sales data
-        bills = self.billing_repo.get_all_bills()
-
-        if not bills:
+        if not series:
             messagebox.showinfo("Info", "No billing data available for chart.")
             return
 
-        # Create DataFrame
-        df = pd.DataFrame(bills)
-        df['bill_date'] = pd.to_datetime(df['bill_date'])
-        df['month'] = df['bill_date'].dt.to_period('M').astype(str)
-        df['total'] = pd.to_numeric(df['total'])
-
-        monthly_sales = df.groupby('month')['total'].sum().reset_index()
+        labels = [row['period'] for row in series]
+        totals = [float(row['total']) for row in series]
+
+        # matplotlib is only loaded once a chart is drawn
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        with tracer.span("sales chart", 'chart', points=len(labels)):
+            # Plot chart
+            fig = Figure(figsize=(8, 4))
+            ax = fig.add_subplot()
+            ax.bar(labels, totals, color="#00eab7")
+            ax.set_title(f"{period} Sales Report", fontsize=14)
+            ax.set_xlabel({'Daily': "Day", 'Weekly': "Week starting", 'Monthly': "Month"}[period])
+            ax.set_ylabel("Total Sales (₹)")
+            ax.grid(True)
+            if len(labels) > 12:
+                ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+            fig.tight_layout()
+
+            # Embed in Tkinter
+            canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
+            canvas.draw()
+            canvas.get_tk_widget().pack(fill="both", expand=True)
 
-        # Plot chart
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.bar(monthly_sales['month'], monthly_sales['total'], color="#00eab7")
-        ax.set_title("Monthly Sales Report", fontsize=14)
-        ax.set_xlabel("Month")
-        ax.set_ylabel("Total Sales (₹)")
-        ax.grid(True)
+    def show_best_sellers(self):
+        """Displays the top 10 best-selling medicines or suppliers in the reports section."""
+
+        # Resolve the selected window to a date range (None means unbounded)
+        window = self.bestseller_window_var.get()
+        today = datetime.date.today()
+        if window == 'Today':
+            from_date, to_date = today, today
+        elif window == '7 Days':
+            from_date, to_date = today - datetime.timedelta(days=6), today
+        elif window == '30 Days':
+            from_date, to_date = today - datetime.timedelta(days=29), today
+        elif window == 'Custom':
+            from_date, to_date = self.bestseller_from_date.get_date(), self.bestseller_to_date.get_date()
+        else:
+            from_date, to_date = None, None
 
-        # Embed in Tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        group_by = 'supplier' if self.bestseller_group_var.get() == 'Supplier' else 'medicine'
 
-    def show_best_sellers(self):
-        """Displays the top 10 best-selling medicines in the reports section."""
+        # Top-K aggregation runs in the database over the daily rollup
+        self.tasks.submit('report', self.report_repo.get_best_sellers, 10, from_date, to_date, group_by,
+                          on_success=lambda best_sellers: self.draw_best_sellers(group_by, best_sellers))
 
+    def draw_best_sellers(self, group_by, best_sellers):
         # Clear previous content in the chart frame
         for widget in self.chart_frame.winfo_children():
             widget.destroy()
 
-        # Fetch billing and medicine data
-        bill_items = self.billing_repo.get_all_bill_items()
-        medicines = self.medicine_repo.get_all_medicines()
-
-        if not bill_items or not medicines:
+        if not best_sellers:
             messagebox.showinfo("Info", "No billing data available.")
             return
 
-        # Convert to DataFrames
-        items_df = pd.DataFrame(bill_items)
-        meds_df = pd.DataFrame(medicines)
-
-        # Sanitize bill items (remove invalid rows)
-        items_df = items_df[items_df['quantity'] != 'quantity']  # Remove header-like rows if accidentally inserted
-        items_df['quantity'] = pd.to_numeric(items_df['quantity'], errors='coerce')
-        items_df.dropna(subset=['quantity'], inplace=True)
-        items_df['quantity'] = items_df['quantity'].astype(int)
-
-        # Standardize ID format for merging
-        items_df['medicine_id'] = items_df['medicine_id'].astype(str)
-        meds_df['medicine_id'] = meds_df['medicine_id'].astype(str)
-
-        # Aggregate total quantity sold per medicine
-        best_sellers = (
-            items_df.groupby('medicine_id')['quantity']
-            .sum()
-            .reset_index()
-            .sort_values(by='quantity', ascending=False)
-            .head(10)
-        )
-
-        # Merge to get medicine names
-        best_sellers = best_sellers.merge(
-            meds_df[['medicine_id', 'name']],
-            on='medicine_id',
-            how='left'
-        )
-        
         # Display in a TreeView
         tree = ttk.Treeview(
             self.chart_frame,
-            columns=("Name", "Total Sold"),
+            columns=("Name", "Total Sold", "Amount"),
             show="headings",
             height=10
         )
-        tree.heading("Name", text="Medicine Name")
+        tree.heading("Name", text="Supplier Name" if group_by == 'supplier' else "Medicine Name")
         tree.heading("Total Sold", text="Total Quantity Sold")
+        tree.heading("Amount", text="Sales (₹)")
         tree.column("Name", anchor="w", width=200)
         tree.column("Total Sold", anchor="center", width=150)
+        tree.column("Amount", anchor="center", width=150)
 
-        for _, row in best_sellers.iterrows():
-            name = row['name'] if pd.notnull(row['name']) else "Unknown"
-            quantity = row['quantity']
-            tree.insert("", "end", values=(name, quantity))
+        for row in best_sellers:
+            tree.insert("", "end", values=(
+                row['name'] or "Unknown",
+                row['total_quantity_sold'],
+                f"₹{float(row['total_amount']):.2f}"
+            ))
 
         tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        
     def setup_stock_alerts_tab(self):
         alert_frame = ttk.LabelFrame(self.stock_alerts_tab, text="Low Stock Medicines (Below 10)")
         alert_frame.pack(fill="both", expand=True, padx=20, pady=20)
@@ -2042,29 +2298,39 @@ class PharmacyApp:
         selected_tab = event.widget.select()
         tab_text = event.widget.tab(selected_tab, "text")
 
-        if tab_text == "Stock Alerts":
+        # A tab built just now has loaded its data already
+        if self.ensure_tab(selected_tab):
+            if tab_text == "Stock Alerts":
+                self.load_low_stock_medicines()
+            return
+
+        if tab_text == "Billing History":
+            self.load_bills()
+        elif tab_text == "Stock Alerts":
             self.load_low_stock_medicines()
    
     def load_low_stock_medicines(self):
+        # Refreshing the catalog may hit the database, so do it in the background
+        self.tasks.submit('stock', lambda: (bool(self.medicine_repo.catalog.all()),
+                                            self.medicine_repo.catalog.low_stock(10)),
+                          on_success=self.show_low_stock_medicines)
+
+    def show_low_stock_medicines(self, result):
+        has_medicines, low_stock = result
+
         # Clear table
         for item in self.stock_tree.get_children():
             self.stock_tree.delete(item)
 
-        medicines = self.medicine_repo.get_all_medicines()
-
-        if not medicines:
+        if not has_medicines:
             messagebox.showinfo("Info", "No medicine data available.")
             return
 
-        df = pd.DataFrame(medicines)
-        df['quantity'] = pd.to_numeric(df['quantity'])
-        low_stock_df = df[df['quantity'] < 10]
-
-        for _, row in low_stock_df.iterrows():
+        for row in low_stock:
             self.stock_tree.insert("", "end", values=(
                 row['medicine_id'],
                 row['name'],
                 row['quantity'],
-                row['expiry_date'].strftime('%Y-%m-%d') if pd.notnull(row['expiry_date']) else "N/A",
+                row['expiry_date'].strftime('%Y-%m-%d') if row['expiry_date'] else "N/A",
                 row['location']
             ))
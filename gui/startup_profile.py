@@ -0,0 +1,93 @@
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import config
+    ENABLED = getattr(config, 'STARTUP_PROFILE', False)
+except ImportError:
+    ENABLED = False
+
+
+class StartupProfile:
+    """Wall-clock breakdown of how long startup takes and where it goes.
+
+    Phases are timed with phase(), points in time are noted with mark(),
+    and when enabled every first-time import made on the main thread is
+    timed too, so the report shows which libraries are slow to load. The
+    report is printed once the main window is usable; phases that run
+    later, such as a tab being built on first use, are printed as they end.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []     # (name, seconds)
+        self.marks = []      # (name, seconds since start)
+        self.imports = {}    # top-level module name -> seconds
+        self.reported = False
+        self.import_depth = 0
+        self.original_import = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append((name, elapsed))
+            if self.enabled and self.reported:
+                print(f"[startup] {name}: {elapsed * 1000:.0f} ms")
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.started))
+
+    def time_imports(self):
+        """Time first-time imports from here on; only the outermost import is counted"""
+        if not self.enabled or self.original_import is not None:
+            return
+
+        self.original_import = builtins.__import__
+        original = self.original_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if (level or self.import_depth or name in sys.modules
+                    or threading.current_thread() is not threading.main_thread()):
+                return original(name, globals, locals, fromlist, level)
+
+            self.import_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self.import_depth -= 1
+                self.imports[name] = self.imports.get(name, 0) + time.perf_counter() - start
+
+        builtins.__import__ = timed_import
+
+    def report(self, slowest_imports=10):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+
+        lines = ["[startup] Startup profile"]
+        for name, at in self.marks:
+            lines.append(f"  {at * 1000:8.0f} ms  {name}")
+
+        lines.append("  Phases:")
+        for name, elapsed in self.phases:
+            lines.append(f"  {elapsed * 1000:8.0f} ms  {name}")
+
+        if self.imports:
+            lines.append("  Slowest imports:")
+            ranked = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+            for name, elapsed in ranked[:slowest_imports]:
+                lines.append(f"  {elapsed * 1000:8.0f} ms  {name}")
+        print("\n".join(lines))
+
+
+# Shared by main.py, the login page and the main window
+profile = StartupProfile(ENABLED)
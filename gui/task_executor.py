@@ -0,0 +1,178 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from tkinter import messagebox
+from gui.tracing import tracer
+
+
+class TaskExecutor:
+    """Runs slow work off the Tk thread and hands the results back to it.
+
+    Database calls go to a thread pool; CPU-heavy work such as building
+    PDFs goes to a process pool (process=True, func must be a module-level
+    function). Finished tasks are queued and picked up by a root.after
+    poll, so callbacks always run on the Tk thread. A slower poll runs for
+    the executor's whole life and picks up work queued by call_soon from
+    other threads while no task is pending.
+
+    Tasks are submitted under a key. Submitting again under the same key
+    makes the earlier task stale: it is cancelled if it has not started,
+    and its result is dropped if it has. Busy listeners are told when the
+    first task starts and the last one finishes.
+    """
+
+    def __init__(self, root, io_workers=4, cpu_workers=2, poll_interval=25, idle_interval=100):
+        self.root = root
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.poll_interval = poll_interval
+        self.idle_interval = idle_interval
+
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="pharmacy-io")
+        self.cpu_pool = None
+        self.results = queue.SimpleQueue()
+        self.generations = {}
+        self.futures = {}
+        self.pending = 0
+        self.busy_listeners = []
+        self.poll_scheduled = False
+        self.closed = False
+        self.root.after(self.idle_interval, self.watch_queue)
+
+    def submit(self, key, func, *args, on_success=None, on_error=None, process=False, **kwargs):
+        """Run func(*args, **kwargs) in the background.
+
+        on_success(result) or on_error(exception) is called on the Tk thread
+        unless a newer task was submitted under the same key in the meantime.
+        Without on_error the exception is shown in a message box.
+        """
+        if self.closed:
+            return None
+
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        previous = self.futures.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        # The task and its callbacks count towards the click that started it
+        token = tracer.begin_task(key, process)
+        try:
+            future = self.pool(process).submit(func, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed); start a fresh pool and try once more
+            self.cpu_pool = None
+            future = self.pool(process).submit(func, *args, **kwargs)
+
+        self.futures[key] = future
+        self.set_pending(self.pending + 1)
+        future.add_done_callback(lambda done: self.task_done(key, generation, done, on_success, on_error, token))
+        self.schedule_poll()
+        return future
+
+    def call_soon(self, func, *args):
+        """Run func(*args) on the Tk thread; safe to call from any thread"""
+        self.results.put((None, None, None, lambda _: func(*args), None, None))
+        # Only the Tk thread may call root.after; from elsewhere watch_queue notices the entry
+        if threading.current_thread() is threading.main_thread():
+            self.schedule_poll()
+
+    def cancel(self, key):
+        """Drop the task running under key; its callbacks will not be called"""
+        self.generations[key] = self.generations.get(key, 0) + 1
+        future = self.futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def is_running(self, key):
+        future = self.futures.get(key)
+        return future is not None and not future.done()
+
+    def pool(self, process):
+        if not process:
+            return self.io_pool
+        if self.cpu_pool is None:
+            self.cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        return self.cpu_pool
+
+    def schedule_poll(self):
+        if not self.poll_scheduled and not self.closed:
+            self.poll_scheduled = True
+            self.root.after(self.poll_interval, self.poll)
+
+    def watch_queue(self):
+        # Runs until shutdown, so nothing queued from another thread waits for an unrelated task
+        if self.closed:
+            return
+        if not self.results.empty():
+            self.schedule_poll()
+        self.root.after(self.idle_interval, self.watch_queue)
+
+    def poll(self):
+        self.poll_scheduled = False
+        while True:
+            try:
+                key, generation, future, on_success, on_error, token = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if token is None:
+                self.deliver(key, generation, future, on_success, on_error)
+                continue
+            with tracer.deliver_task(token):
+                self.deliver(key, generation, future, on_success, on_error)
+
+        # Keep polling quickly while work is outstanding
+        if self.pending:
+            self.schedule_poll()
+
+    def task_done(self, key, generation, future, on_success, on_error, token):
+        # Called on the worker thread (or wherever the future completed)
+        tracer.end_task(token)
+        self.results.put((key, generation, future, on_success, on_error, token))
+
+    def deliver(self, key, generation, future, on_success, on_error):
+        if future is None:
+            # Queued by call_soon
+            self.run_callback(on_success, None)
+            return
+
+        self.set_pending(self.pending - 1)
+        if self.futures.get(key) is future:
+            del self.futures[key]
+
+        if future.cancelled() or generation != self.generations.get(key):
+            return
+
+        error = future.exception()
+        if error is None:
+            if on_success is not None:
+                self.run_callback(on_success, future.result())
+        elif on_error is not None:
+            self.run_callback(on_error, error)
+        else:
+            messagebox.showerror("Error", f"{type(error).__name__}: {error}")
+
+    def run_callback(self, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            # A broken callback must not stop later results from being delivered
+            print("Error in background task callback:", e)
+
+    def add_busy_listener(self, callback):
+        """Call callback(True) when work starts and callback(False) when all of it is done"""
+        self.busy_listeners.append(callback)
+
+    def set_pending(self, pending):
+        was_busy = self.pending > 0
+        self.pending = pending
+        if was_busy != (pending > 0):
+            for callback in self.busy_listeners:
+                self.run_callback(callback, pending > 0)
+
+    def shutdown(self):
+        self.closed = True
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        if self.cpu_pool is not None:
+            self.cpu_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,360 @@
+import atexit
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import tkinter
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# Record spans for every Tk callback, background task and query; exported as a Chrome trace
+UI_TRACE = getattr(config, 'UI_TRACE', False)
+UI_TRACE_FILE = getattr(config, 'UI_TRACE_FILE', 'ui_trace.json')
+
+# Log the Python stack when one callback blocks the Tk main loop for this long (ms); None turns it off
+UI_STALL_MS = getattr(config, 'UI_STALL_MS', 500)
+UI_STALL_LOG = getattr(config, 'UI_STALL_LOG', 'ui_stalls.log')
+
+# Events that start a user action: its latency runs until the work it started has been shown
+USER_EVENTS = {'ButtonPress', 'ButtonRelease', 'KeyPress', 'KeyRelease', 'VirtualEvent'}
+
+# Frames in which a callback is waiting inside Tk (a dialog or nested event loop), not stalling it
+_TK_DIR = os.path.dirname(os.path.abspath(tkinter.__file__))
+_TK_WAITS = {'show', '_show', 'wait_window', 'wait_variable', 'mainloop', 'update', 'askstring', '_askstring'}
+
+
+class Action:
+    """A user action: a click or key press and the background tasks it started"""
+
+    def __init__(self, action_id, name, start):
+        self.id = action_id
+        self.name = name
+        self.start = start
+        self.pending = 0    # tasks submitted and not yet delivered
+        self.running = 0    # callbacks of this action on the stack right now
+
+
+class UITracer:
+    """Times what happens between a click and the screen being up to date.
+
+    install() wraps every Python callback Tk runs (button commands, event
+    bindings and after() timers). Each one becomes a span on the main
+    thread, and clicks and key presses also open an action. Tasks that a
+    callback hands to the TaskExecutor belong to its action, and so do the
+    callbacks that deliver their results, so an action like Generate Bill
+    lasts from the click through create_bill to the bill preview showing.
+    Queries reported by the database instrumentation and phases marked
+    with span() appear inside them. export() writes everything as a Chrome
+    trace (chrome://tracing or https://ui.perfetto.dev).
+
+    A watchdog thread notices when one callback keeps the main loop busy
+    for longer than stall_ms and logs the Python stack it is stuck in.
+    """
+
+    def __init__(self, enabled=False, trace_file=None, stall_ms=None, stall_log=None, max_events=200000):
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.stall_ms = stall_ms
+        self.stall_log = stall_log
+        self.events = deque(maxlen=max_events)
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.thread_names = {}
+
+        self.action = None       # action of the callback running on the Tk thread
+        self.next_id = 1
+        self.action_stats = {}   # action name -> deque of recent durations in ms
+
+        # Innermost callback running on the Tk thread: (serial, name, start); read by the watchdog
+        self.callbacks = []
+        self.current = None
+        self.serial = 0
+        self.stalled = set()
+        self.watchdog = None
+        self.stopped = threading.Event()
+        self.installed = False
+
+    # Setup
+
+    def install(self):
+        """Start wrapping Tk callbacks and watching for stalls, as configured"""
+        if self.installed or not (self.enabled or self.stall_ms):
+            return
+        self.installed = True
+
+        original = tkinter.CallWrapper.__call__
+        tracer = self
+
+        def traced_call(wrapper, *args):
+            if threading.current_thread() is not threading.main_thread():
+                return original(wrapper, *args)
+            return tracer.run_callback(wrapper, args)
+
+        tkinter.CallWrapper.__call__ = traced_call
+
+        if self.enabled:
+            from database.instrumentation import get_instrumentation
+            get_instrumentation().listeners.append(self.on_query)
+            if self.trace_file:
+                atexit.register(self.export)
+
+        if self.stall_ms:
+            self.watchdog = threading.Thread(target=self.watch, name="ui-stall-watchdog", daemon=True)
+            self.watchdog.start()
+
+    # Tk callbacks
+
+    def run_callback(self, wrapper, args):
+        """What tkinter.CallWrapper.__call__ does, inside a span"""
+        try:
+            if wrapper.subst:
+                args = wrapper.subst(*args)
+            name, event_type = self.describe(wrapper, args)
+
+            previous_action = self.action
+            action = None
+            if event_type is not None and (event_type in USER_EVENTS or event_type == 'command'):
+                action = self.start_action(name if event_type == 'command' else f"{name} <{event_type}>")
+                self.action = action
+                action.running += 1
+
+            self.push_callback(name)
+            start = time.perf_counter()
+            try:
+                return wrapper.func(*args)
+            finally:
+                self.pop_callback()
+                if self.enabled:
+                    self.complete(name, 'ui', start, time.perf_counter(),
+                                  {'action': self.action.id if self.action else None})
+                if action is not None:
+                    action.running -= 1
+                    self.finish_action_if_done(action)
+                self.action = previous_action
+        except SystemExit:
+            raise
+        except:
+            wrapper.widget._report_exception()
+
+    def describe(self, wrapper, args):
+        """Return (name, event type) of a callback; the type is 'command' for commands and None for after()"""
+        func = wrapper.func
+        code = getattr(func, '__code__', None)
+        if code is not None and code.co_name == 'callit' and 'func' in code.co_freevars:
+            # after() and after_idle() wrap the real callback in a closure
+            target = func.__closure__[code.co_freevars.index('func')].cell_contents
+            return self.callable_name(target), None
+        if wrapper.subst and args:
+            event_type = getattr(args[0], 'type', None)
+            return self.callable_name(func), getattr(event_type, 'name', str(event_type))
+        return self.callable_name(func), 'command'
+
+    @staticmethod
+    def callable_name(func):
+        return getattr(func, '__qualname__', None) or getattr(func, '__name__', None) or repr(func)
+
+    def push_callback(self, name):
+        self.serial += 1
+        self.callbacks.append((self.serial, name, time.perf_counter()))
+        self.current = self.callbacks[-1]
+
+    def pop_callback(self):
+        serial, name, start = self.callbacks.pop()
+        if serial in self.stalled:
+            self.stalled.discard(serial)
+            self.write_stall_log(f"  {name} finished after {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        if self.callbacks:
+            # The outer callback was waiting in a nested event loop until now
+            outer_serial, outer_name, _ = self.callbacks[-1]
+            self.callbacks[-1] = (outer_serial, outer_name, time.perf_counter())
+        self.current = self.callbacks[-1] if self.callbacks else None
+
+    # Actions and background tasks
+
+    def start_action(self, name):
+        action = Action(self.next_id, name, time.perf_counter())
+        self.next_id += 1
+        return action
+
+    def finish_action_if_done(self, action):
+        if action.pending or action.running:
+            return
+        end = time.perf_counter()
+        duration_ms = (end - action.start) * 1000
+        durations = self.action_stats.get(action.name)
+        if durations is None:
+            durations = self.action_stats[action.name] = deque(maxlen=500)
+        durations.append(duration_ms)
+        if self.enabled:
+            self.async_span(action.name, 'action', action.id, action.start, end)
+
+    def begin_task(self, key, process=False):
+        """Note a task submitted to the TaskExecutor; returns a token for end_task and deliver_task"""
+        action = self.action
+        if action is not None:
+            action.pending += 1
+        task_id = self.next_id
+        self.next_id += 1
+        return action, task_id, key, process, time.perf_counter()
+
+    def end_task(self, token):
+        """The task itself finished (any thread)"""
+        if self.enabled:
+            _, task_id, key, process, start = token
+            self.async_span(f"task {key}", 'render' if process else 'task', task_id, start, time.perf_counter())
+
+    @contextmanager
+    def deliver_task(self, token):
+        """Run a task's result callbacks as part of the action that submitted it"""
+        action, _, key, _, _ = token
+        previous_action = self.action
+        if action is not None:
+            self.action = action
+            action.running += 1
+        try:
+            with self.span(f"deliver {key}", 'ui'):
+                yield
+        finally:
+            if action is not None:
+                action.running -= 1
+                action.pending -= 1
+                self.finish_action_if_done(action)
+            self.action = previous_action
+
+    def recent_actions(self):
+        """{action name: (count, average ms, p95 ms, max ms)} over the last few hundred of each"""
+        summary = {}
+        for name, durations in list(self.action_stats.items()):
+            ordered = sorted(durations)
+            if ordered:
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                summary[name] = (len(ordered), sum(ordered) / len(ordered), p95, ordered[-1])
+        return summary
+
+    # Spans
+
+    @contextmanager
+    def span(self, name, category='ui', **args):
+        """Time a phase, e.g. tracer.span("draw chart", "chart"); does nothing unless tracing"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, time.perf_counter(), args or None)
+
+    def on_query(self, sql, elapsed_ms, rows, caller):
+        """Listener for database.instrumentation: one span per statement on the thread that ran it"""
+        end = time.perf_counter()
+        self.complete(caller, 'db', end - elapsed_ms / 1000, end, {'sql': sql, 'rows': rows})
+
+    def timestamp(self, moment):
+        return round((moment - self.origin) * 1000000, 1)
+
+    def thread_id(self):
+        thread = threading.current_thread()
+        if thread.ident not in self.thread_names:
+            self.thread_names[thread.ident] = thread.name
+        return thread.ident
+
+    def complete(self, name, category, start, end, args=None):
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': self.thread_id(),
+                 'ts': self.timestamp(start), 'dur': round((end - start) * 1000000, 1)}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def async_span(self, name, category, span_id, start, end):
+        common = {'name': name, 'cat': category, 'id': span_id, 'pid': self.pid, 'tid': self.thread_id()}
+        self.events.append(dict(common, ph='b', ts=self.timestamp(start)))
+        self.events.append(dict(common, ph='e', ts=self.timestamp(end)))
+
+    def instant(self, name, category, args=None):
+        self.events.append({'name': name, 'cat': category, 'ph': 'i', 's': 'g', 'pid': self.pid,
+                            'tid': threading.main_thread().ident, 'ts': self.timestamp(time.perf_counter()),
+                            'args': args or {}})
+
+    def export(self, path=None):
+        """Write the recorded events as a Chrome trace; returns the path, or None on failure"""
+        path = path or self.trace_file
+        if not path:
+            return None
+
+        events = list(self.events)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in list(self.thread_names.items())]
+        partial = path + ".part"
+        try:
+            with open(partial, "w", encoding="utf-8") as trace_file:
+                json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, trace_file, default=str)
+            os.replace(partial, path)
+        except OSError as e:
+            print(f"Error writing UI trace: {e}")
+            return None
+        return path
+
+    # Stall watchdog
+
+    def watch(self):
+        main_id = threading.main_thread().ident
+        interval = max(self.stall_ms / 4000, 0.01)
+        while not self.stopped.wait(interval):
+            current = self.current
+            if current is None:
+                continue
+            serial, name, start = current
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms < self.stall_ms or serial in self.stalled:
+                continue
+
+            frame = sys._current_frames().get(main_id)
+            if frame is None or self.is_waiting_in_tk(frame):
+                continue
+            # The callback may have returned while the frames were collected
+            if self.current is not current:
+                continue
+
+            self.stalled.add(serial)
+            stack = "".join(traceback.format_stack(frame))
+            stamp = datetime.datetime.now().isoformat(sep=" ", timespec="milliseconds")
+            self.write_stall_log(f"{stamp} STALL {elapsed_ms:.0f} ms in {name}\n{stack}")
+            if self.enabled:
+                self.instant("stall", 'stall', {'callback': name, 'ms': round(elapsed_ms)})
+
+    def is_waiting_in_tk(self, frame):
+        """True if the innermost callback is in a dialog or a nested event loop rather than busy"""
+        while frame is not None and frame.f_code is not UITracer.run_callback.__code__:
+            code = frame.f_code
+            if code.co_name in _TK_WAITS and os.path.dirname(os.path.abspath(code.co_filename)) == _TK_DIR:
+                return True
+            frame = frame.f_back
+        return False
+
+    def write_stall_log(self, text):
+        if not self.stall_log:
+            print(text, end="")
+            return
+        try:
+            with self.lock, open(self.stall_log, "a", encoding="utf-8") as log:
+                log.write(text)
+        except OSError as e:
+            print(f"Error writing stall log: {e}")
+
+    def stop(self):
+        self.stopped.set()
+
+
+# Shared by main.py, the task executor and the main window
+tracer = UITracer(UI_TRACE, UI_TRACE_FILE, UI_STALL_MS, UI_STALL_LOG)
@@ -0,0 +1,360 @@
+from tkinter import ttk
+
+
+class VirtualTable(ttk.Frame):
+    """Table that only creates Treeview items for the rows on screen.
+
+    The rows stay in a Python list; the Treeview holds one item per visible
+    line and those items are rewritten as the view scrolls, so opening or
+    scrolling a list costs the same for 50 rows or 500,000.
+
+    columns is a list of (heading, field, width): heading is shown, field
+    is the row key used for sorting when the heading is clicked. key(row)
+    identifies a row; selection() returns keys and item(key, 'values')
+    returns the displayed values, like a Treeview whose iids are the keys.
+    on_near_end() is called when the view gets within a page of the last
+    row, so callers can fetch more rows lazily.
+
+    After a write, apply_changes() patches just the rows that changed
+    instead of replacing them all; the selection and the rows on screen
+    stay where they were.
+    """
+
+    SCROLL_UNITS = 3
+
+    def __init__(self, master, columns, key, format_row, height=10, on_near_end=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.key = key
+        self.format_row = format_row
+        self.on_near_end = on_near_end
+
+        self.rows = []
+        self.by_key = {}
+        self.positions = {}      # key -> index in rows + position_base
+        self.position_base = 0
+        self.offset = 0
+        self.page_size = height
+        self.selected = []
+        self.expected_selection = ()
+        self.sort_field = None
+        self.sort_descending = False
+        self.slots = []
+
+        headings = [heading for heading, _, _ in columns]
+        self.tree = ttk.Treeview(self, columns=headings, show="headings", height=height)
+        for heading, field, width in columns:
+            self.tree.heading(heading, text=heading, command=lambda f=field: self.sort_by(f))
+            self.tree.column(heading, width=width, anchor="center")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-self.SCROLL_UNITS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(self.SCROLL_UNITS))
+        self.tree.bind("<Up>", lambda e: self.move_cursor(-1))
+        self.tree.bind("<Down>", lambda e: self.move_cursor(1))
+        self.tree.bind("<Prior>", lambda e: self.move_cursor(-self.page_size))
+        self.tree.bind("<Next>", lambda e: self.move_cursor(self.page_size))
+        self.tree.bind("<Home>", lambda e: self.move_cursor(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self.move_cursor(len(self.rows)))
+
+    # Row source
+
+    def set_rows(self, rows):
+        """Replace all rows; the view goes back to the top, selected keys that remain stay selected"""
+        self.rows = list(rows)
+        if self.sort_field is not None:
+            self.sort_rows()
+        self.reindex()
+        self.selected = [key for key in self.selected if key in self.by_key]
+        self.offset = 0
+        self.render()
+
+    def append_rows(self, rows):
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if self.sort_field is not None:
+            self.sort_rows()
+            self.reindex()
+        else:
+            for position in range(start, len(self.rows)):
+                key = self.key(self.rows[position])
+                self.by_key[key] = self.rows[position]
+                self.positions[key] = position + self.position_base
+        self.render()
+
+    def apply_changes(self, keys, rows, add_new=True, at_start=False):
+        """Bring the given keys up to date: rows holds their current versions.
+
+        Keys without a row were deleted. Rows already shown are updated in
+        place, or moved if the change affects the sort order; rows not shown
+        are inserted only when add_new is set, at their sorted position, or
+        at the start or end when the table is unsorted. Each insert or
+        removal renumbers only the rows on the shorter side of it, so adding
+        new bills to the top of the history costs the same at any table size.
+        """
+        rows_by_key = {self.key(row): row for row in rows}
+        removed = [key for key in keys if key not in rows_by_key and key in self.by_key]
+
+        moved = []
+        for key, row in rows_by_key.items():
+            old = self.by_key.get(key)
+            if old is None:
+                if add_new:
+                    moved.append(row)
+                continue
+            self.by_key[key] = row
+            if self.sort_field is not None and self.sort_value(old) != self.sort_value(row):
+                removed.append(key)
+                moved.append(row)
+            else:
+                self.rows[self.position_of(key)] = row
+
+        # Keep the first visible row on screen, unless the view is at the very top
+        anchor = self.offset
+        for position in sorted((self.position_of(key) for key in removed), reverse=True):
+            self.remove_row(position)
+            if position < anchor:
+                anchor -= 1
+        for key in removed:
+            if key not in rows_by_key:
+                del self.by_key[key]
+
+        for row in moved:
+            position = self.insert_position(row, at_start)
+            self.insert_row(position, row)
+            self.by_key[self.key(row)] = row
+            if position < anchor or (position == anchor and anchor > 0):
+                anchor += 1
+
+        self.offset = anchor
+        self.selected = [key for key in self.selected if key in self.by_key]
+        self.render()
+
+    def insert_position(self, row, at_start=False):
+        if self.sort_field is None:
+            return 0 if at_start else len(self.rows)
+
+        # Binary search for the first row the new one sorts before
+        value = self.sort_value(row)
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            current = self.sort_value(self.rows[middle])
+            before = current < value if self.sort_descending else value < current
+            if before:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def clear(self):
+        self.set_rows([])
+
+    def reindex(self):
+        self.by_key = {self.key(row): row for row in self.rows}
+        self.positions = {self.key(row): position for position, row in enumerate(self.rows)}
+        self.position_base = 0
+
+    def position_of(self, key):
+        position = self.positions.get(key)
+        return None if position is None else position - self.position_base
+
+    def insert_row(self, position, row):
+        """Insert row at position, renumbering only the rows on the shorter side of it.
+
+        Rows after position move down one index. When fewer rows come
+        before it, those are renumbered instead and position_base absorbs
+        the shift, so inserting at the start or the end costs O(1).
+        """
+        self.rows.insert(position, row)
+        if position < len(self.rows) // 2:
+            self.position_base -= 1
+            for index in range(position):
+                self.positions[self.key(self.rows[index])] -= 1
+        else:
+            for index in range(position + 1, len(self.rows)):
+                self.positions[self.key(self.rows[index])] += 1
+        self.positions[self.key(row)] = position + self.position_base
+
+    def remove_row(self, position):
+        """Remove the row at position, renumbering only the rows on the shorter side of it"""
+        row = self.rows.pop(position)
+        self.positions.pop(self.key(row), None)
+        if position < len(self.rows) // 2:
+            self.position_base += 1
+            for index in range(position):
+                self.positions[self.key(self.rows[index])] += 1
+        else:
+            for index in range(position, len(self.rows)):
+                self.positions[self.key(self.rows[index])] -= 1
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get_row(self, key):
+        return self.by_key.get(key)
+
+    # Treeview-style access by key
+
+    def selection(self):
+        return tuple(self.selected)
+
+    def selected_row(self):
+        return self.get_row(self.selected[0]) if self.selected else None
+
+    def item(self, key, option=None):
+        row = self.get_row(key)
+        values = tuple(self.format_row(row)) if row is not None else ()
+        if option == 'values':
+            return values
+        return {'values': values}
+
+    def select(self, key, see=True):
+        if key not in self.by_key:
+            return
+        self.selected = [key]
+        if see:
+            self.see(self.position_of(key))
+        self.render()
+
+    # Sorting
+
+    def sort_by(self, field):
+        if self.sort_field == field:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_field = field
+            self.sort_descending = False
+
+        self.sort_rows()
+        self.reindex()
+        for heading, column_field, _ in self.columns:
+            arrow = ""
+            if column_field == self.sort_field:
+                arrow = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(heading, text=heading + arrow)
+
+        self.offset = 0
+        if self.selected:
+            self.see(self.position_of(self.selected[0]))
+        self.render()
+
+    def sort_rows(self):
+        self.rows.sort(key=self.sort_value, reverse=self.sort_descending)
+
+    def sort_value(self, row):
+        value = row.get(self.sort_field)
+        if value is None:
+            return (0, "")
+        if isinstance(value, str):
+            return (1, value.casefold())
+        return (1, value)
+
+    # Scrolling
+
+    def yview(self, *args):
+        if not args:
+            return self.fractions()
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.offset += step * self.page_size if args[2] == "pages" else step
+        self.render()
+
+    def scroll(self, units):
+        self.offset += units
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        if event.delta == 0:
+            return "break"
+        units = -event.delta // 120 if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        return self.scroll(units * self.SCROLL_UNITS)
+
+    def see(self, position):
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.page_size:
+            self.offset = position - self.page_size + 1
+
+    def move_cursor(self, step):
+        if not self.rows:
+            return "break"
+        current = self.position_of(self.selected[0]) if self.selected else None
+        position = self.offset if current is None else current + step
+        position = max(0, min(position, len(self.rows) - 1))
+        self.selected = [self.key(self.rows[position])]
+        self.see(position)
+        self.render()
+
+        slot = position - self.offset
+        if 0 <= slot < len(self.slots):
+            self.tree.focus(self.slots[slot])
+        return "break"
+
+    def on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # One line's worth is taken by the headings
+        page_size = max(1, event.height // rowheight - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def fractions(self):
+        total = len(self.rows)
+        if not total:
+            return 0.0, 1.0
+        return self.offset / total, min(1.0, (self.offset + self.page_size) / total)
+
+    # Rendering
+
+    def render(self):
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.page_size))
+        visible = self.rows[self.offset:self.offset + self.page_size]
+
+        while len(self.slots) < len(visible):
+            self.slots.append(self.tree.insert("", "end", iid=f"slot{len(self.slots)}"))
+
+        selected = set(self.selected)
+        selected_slots = []
+        for index, row in enumerate(visible):
+            slot = self.slots[index]
+            self.tree.item(slot, values=self.format_row(row))
+            self.tree.move(slot, "", index)
+            if self.key(row) in selected:
+                selected_slots.append(slot)
+
+        # Slots past the last row are detached, not destroyed, for the next render
+        if len(visible) < len(self.slots):
+            self.tree.detach(*self.slots[len(visible):])
+
+        self.expected_selection = tuple(selected_slots)
+        self.tree.selection_set(selected_slots)
+        self.scrollbar.set(*self.fractions())
+
+        if (self.on_near_end is not None and self.sort_field is None
+                and self.offset + 2 * self.page_size >= total):
+            self.after_idle(self.on_near_end)
+
+    def on_select(self, event):
+        current = self.tree.selection()
+        if current == self.expected_selection:
+            # Echo of the selection render() just set
+            return
+
+        self.expected_selection = current
+        keys = []
+        for slot in current:
+            index = self.slots.index(slot)
+            if self.offset + index < len(self.rows):
+                keys.append(self.key(self.rows[self.offset + index]))
+        self.selected = keys
@@ -0,0 +1,167 @@
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Built once per worker process and reused for every bill it renders
+_generator = None
+
+
+def invoice_filename(bill_id):
+    """File name of a bill's PDF; anything unsafe in a path becomes '_'"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(bill_id)) + ".pdf"
+
+
+def render_invoice(bill_data, path):
+    """Render one invoice in a worker process; returns (bill_id, success).
+
+    The PDF is written under a temporary name and renamed into place, so an
+    interrupted export never leaves a half-written file that a resumed run
+    would mistake for a finished one.
+    """
+    global _generator
+    if _generator is None:
+        from pdf_generator import PDFGenerator
+        _generator = PDFGenerator()
+
+    partial = path + ".part"
+    if not _generator.generate_bill_pdf(bill_data, partial):
+        if os.path.exists(partial):
+            os.remove(partial)
+        return bill_data['bill_id'], False
+    os.replace(partial, path)
+    return bill_data['bill_id'], True
+
+
+class InvoiceExporter:
+    """Exports every invoice in a date range as PDFs, rendered in parallel.
+
+    Bill ids are streamed from the database in keyset pages, their details
+    are read a page at a time, and rendering is spread over a process pool
+    with a bounded number of bills in flight. Each bill becomes
+    <output_dir>/<bill_id>.pdf; bills whose PDF already exists are skipped,
+    so running the same export again resumes where an interrupted one
+    stopped. Optionally all invoices are also combined into one PDF or a
+    zip archive.
+    """
+
+    def __init__(self, billing_repo, output_dir, workers=None, batch_size=200):
+        self.billing_repo = billing_repo
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def path_for(self, bill_id):
+        return os.path.join(self.output_dir, invoice_filename(bill_id))
+
+    def export(self, from_date, to_date, on_progress=None):
+        """Render the invoices dated from_date to to_date (inclusive).
+
+        on_progress(done, total, bill_id, status) is called after every
+        bill, with status 'rendered', 'skipped', 'missing' or 'failed'.
+        Returns a dict of counts plus the ids that failed.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.remove_partial_files()
+
+        total = self.billing_repo.count_bills(from_date, to_date) or 0
+        result = {'total': total, 'rendered': 0, 'skipped': 0, 'missing': 0, 'failed': 0, 'failed_ids': []}
+        done = 0
+
+        def finished(bill_id, status):
+            nonlocal done
+            done += 1
+            result[status] += 1
+            if status == 'failed':
+                result['failed_ids'].append(bill_id)
+            if on_progress is not None:
+                on_progress(done, total, bill_id, status)
+
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        in_flight = {}  # future -> bill_id
+        try:
+            for bill_ids in self.billing_repo.iter_bill_ids(from_date, to_date, self.batch_size):
+                # Resume: bills that already have a PDF are not read or rendered again
+                todo = []
+                for bill_id in bill_ids:
+                    if os.path.exists(self.path_for(bill_id)):
+                        finished(bill_id, 'skipped')
+                    else:
+                        todo.append(bill_id)
+
+                details = self.billing_repo.get_bills_details(todo)
+                for bill_id in todo:
+                    bill_data = details.get(bill_id)
+                    if bill_data is None:
+                        # Deleted or its customer is gone since the id was read
+                        finished(bill_id, 'missing')
+                        continue
+
+                    # Keep a few bills per worker queued, not the whole month
+                    while len(in_flight) >= self.workers * 4:
+                        completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self.collect(completed, in_flight, finished)
+                    future = pool.submit(render_invoice, bill_data, self.path_for(bill_id))
+                    in_flight[future] = bill_id
+
+            completed, _ = wait(in_flight)
+            self.collect(completed, in_flight, finished)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        return result
+
+    def collect(self, futures, in_flight, finished):
+        for future in futures:
+            bill_id = in_flight.pop(future)
+            try:
+                _, success = future.result()
+            except Exception as e:
+                # e.g. a worker process died
+                print(f"Error rendering invoice {bill_id}: {e}")
+                success = False
+            finished(bill_id, 'rendered' if success else 'failed')
+
+    def remove_partial_files(self):
+        for name in os.listdir(self.output_dir):
+            if name.endswith(".pdf.part"):
+                os.remove(os.path.join(self.output_dir, name))
+
+    def exported_paths(self, from_date, to_date):
+        """Yield the PDF of every bill in the range that has one, oldest first"""
+        for bill_ids in self.billing_repo.iter_bill_ids(from_date, to_date, self.batch_size):
+            for bill_id in bill_ids:
+                path = self.path_for(bill_id)
+                if os.path.exists(path):
+                    yield bill_id, path
+
+    def write_zip(self, from_date, to_date, zip_path):
+        """Pack the exported PDFs into one zip archive; returns the number of files"""
+        count = 0
+        partial = zip_path + ".part"
+        # PDFs are already compressed, so they are stored as they are
+        with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_STORED) as archive:
+            for bill_id, path in self.exported_paths(from_date, to_date):
+                archive.write(path, arcname=os.path.basename(path))
+                count += 1
+        os.replace(partial, zip_path)
+        return count
+
+    def write_merged_pdf(self, from_date, to_date, pdf_path):
+        """Render every invoice in the range into a single PDF, one bill per page"""
+        from pdf_generator import PDFGenerator
+
+        def bills():
+            for bill_ids in self.billing_repo.iter_bill_ids(from_date, to_date, self.batch_size):
+                details = self.billing_repo.get_bills_details(bill_ids)
+                for bill_id in bill_ids:
+                    if bill_id in details:
+                        yield details[bill_id]
+
+        partial = pdf_path + ".part"
+        if not PDFGenerator().generate_bills_pdf(bills(), partial):
+            if os.path.exists(partial):
+                os.remove(partial)
+            return False
+        os.replace(partial, pdf_path)
+        return True
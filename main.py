@@ -1,10 +1,31 @@
-import tkinter as tk
-from gui.login_ui import LoginPage
-from app_controller import start_main_app
+from gui.startup_profile import profile
+from gui.tracing import tracer
 
 
+def main():
+    # Only in the real entry point: process pool workers spawned on Windows
+    # import this module again and must not patch tkinter or start a watchdog
+    profile.time_imports()
+    tracer.install()
 
-if __name__ == "__main__":
+    import tkinter as tk
+    from gui.login_ui import LoginPage
+    from app_controller import start_main_app
+    from session import AppSession
+
+    profile.mark("Imports done")
     root = tk.Tk()
-    login = LoginPage(root, lambda: start_main_app(root))
-    root.mainloop()
\ No newline at end of file
+
+    # Start loading the catalog, suppliers and recent bills while the user logs in
+    with profile.phase("Connect"):
+        session = AppSession()
+    session.warm_up()
+
+    with profile.phase("Login window"):
+        login = LoginPage(root, lambda: start_main_app(root, session), session)
+    profile.mark("Login window shown")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from invoice_export import invoice_filename
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# Bump whenever pdf_generator's layout changes, so cached PDFs are rendered again
+RENDERER_VERSION = "4"
+
+PDF_CACHE_DIR = getattr(config, 'PDF_CACHE_DIR', None) or os.path.join(tempfile.gettempdir(), "pharmacy_pdf_cache")
+PDF_CACHE_MAX_MB = getattr(config, 'PDF_CACHE_MAX_MB', 200)
+
+CENT = Decimal("0.01")
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the PDF cache shared by the main window and the bill preview"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PDFCache(PDF_CACHE_DIR, PDF_CACHE_MAX_MB * 1024 * 1024)
+        return _default_cache
+
+
+def parse_bill_date(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    for date_format in ("%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.datetime.strptime(str(value), date_format).date().isoformat()
+        except ValueError:
+            pass
+    return str(value)
+
+
+def format_bill_date(value):
+    """The date as a bill PDF prints it (dd-mm-yyyy), whichever format it came in"""
+    iso = parse_bill_date(value)
+    try:
+        return datetime.date.fromisoformat(iso).strftime("%d-%m-%Y")
+    except ValueError:
+        return iso
+
+
+def money(value):
+    try:
+        return str(Decimal(str(value).replace("₹", "").strip()).quantize(CENT))
+    except InvalidOperation:
+        return str(value)
+
+
+def quantity(value):
+    try:
+        return int(Decimal(str(value)))
+    except InvalidOperation:
+        return str(value)
+
+
+def text(value):
+    return "" if value is None else str(value)
+
+
+def canonical_bill(bill_data):
+    """The fields a bill PDF shows, in one format.
+
+    The billing tab builds bill_data with ISO dates, int quantities and
+    formatted amounts; get_bill_details gives dd-mm-yyyy dates and strings
+    straight from the database. Both must hash the same for reprints to hit,
+    which is safe because the PDF prints the date through format_bill_date.
+    """
+    return {
+        'bill_id': text(bill_data['bill_id']),
+        'customer_name': text(bill_data.get('customer_name')),
+        'customer_contact': text(bill_data.get('customer_contact')),
+        'customer_address': text(bill_data.get('customer_address')),
+        'date': parse_bill_date(bill_data['date']),
+        'items': [
+            {
+                'medicine_id': text(item.get('medicine_id')),
+                'medicine_name': text(item.get('medicine_name')),
+                'quantity': quantity(item['quantity']),
+                'price': money(item['price']),
+                'amount': money(item['amount']),
+            }
+            for item in bill_data['items']
+        ],
+        'subtotal': money(bill_data['subtotal']),
+        'tax': money(bill_data['tax']),
+        'total': money(bill_data['total']),
+    }
+
+
+def bill_hash(bill_data):
+    """sha256 of the bill's content and the renderer version"""
+    canonical = json.dumps(canonical_bill(bill_data), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class PDFCache:
+    """Rendered bill PDFs on disk, keyed by a hash of the bill's content.
+
+    A file is named <bill_id>.<hash>.pdf. Reprinting an unchanged bill finds
+    the same name and reads the file instead of running ReportLab again. If
+    the bill or the layout changes the hash changes too, and the older files
+    for that bill are deleted when the new one is stored. When the directory
+    grows past max_bytes the least recently used files are deleted; every
+    hit touches its file's mtime.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.by_bill = None   # bill file stem -> set of cached file names
+        self.size = 0
+
+    def name_for(self, bill_data):
+        stem = invoice_filename(bill_data['bill_id'])[:-len(".pdf")]
+        return f"{stem}.{bill_hash(bill_data)[:32]}.pdf"
+
+    def lookup(self, bill_data):
+        """Return the cached PDF for this exact bill content, or None"""
+        path = os.path.join(self.directory, self.name_for(bill_data))
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def reserve(self):
+        """Return a temporary path to render into, inside the cache directory"""
+        os.makedirs(self.directory, exist_ok=True)
+        handle, path = tempfile.mkstemp(prefix=".render-", suffix=".pdf", dir=self.directory)
+        os.close(handle)
+        return path
+
+    def store(self, bill_data, rendered_path):
+        """Move a rendered PDF into the cache; returns its final path"""
+        name = self.name_for(bill_data)
+        path = os.path.join(self.directory, name)
+        os.replace(rendered_path, path)
+
+        with self.lock:
+            self.load_index()
+            stem = name.rsplit(".", 2)[0]
+
+            # The bill changed (or was rendered by an older layout): drop its old PDFs
+            for old_name in list(self.by_bill.get(stem, ())):
+                if old_name != name:
+                    self.remove(old_name)
+
+            names = self.by_bill.setdefault(stem, set())
+            if name not in names:
+                names.add(name)
+                self.size += self.file_size(name)
+
+            if self.size > self.max_bytes:
+                self.evict()
+        return path
+
+    def discard(self, rendered_path):
+        try:
+            os.remove(rendered_path)
+        except OSError:
+            pass
+
+    def get_or_render(self, bill_data, render=None):
+        """Return the path of the bill's PDF, rendering it only on a miss; None if rendering failed"""
+        path = self.lookup(bill_data)
+        if path is not None:
+            return path
+
+        if render is None:
+            from pdf_generator import render_bill_pdf
+            render = render_bill_pdf
+
+        rendered_path = self.reserve()
+        if not render(bill_data, rendered_path):
+            self.discard(rendered_path)
+            return None
+        return self.store(bill_data, rendered_path)
+
+    def load_index(self):
+        if self.by_bill is not None:
+            return
+
+        self.by_bill = {}
+        self.size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".render-"):
+                # Left behind by a render that never finished; recent ones may still be running
+                if time.time() - entry.stat().st_mtime > 3600:
+                    self.discard(entry.path)
+                continue
+            if entry.name.endswith(".pdf"):
+                self.by_bill.setdefault(entry.name.rsplit(".", 2)[0], set()).add(entry.name)
+                self.size += entry.stat().st_size
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        entries = []
+        for names in self.by_bill.values():
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name))
+
+        entries.sort()
+        for _, name in entries:
+            if self.size <= self.max_bytes:
+                break
+            self.remove(name)
+
+    def remove(self, name):
+        size = self.file_size(name)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            # e.g. still open in a PDF viewer on Windows; try again next time
+            return
+
+        stem = name.rsplit(".", 2)[0]
+        names = self.by_bill.get(stem)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.by_bill[stem]
+        self.size -= size
+
+    def file_size(self, name):
+        try:
+            return os.path.getsize(os.path.join(self.directory, name))
+        except OSError:
+            return 0
@@ -1,17 +1,90 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Spacer
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet , ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from collections import deque
+from decimal import Decimal
+from xml.sax.saxutils import escape
+import copy
 import os
+import threading
+from pdf_cache import format_bill_date
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# TrueType fonts with the rupee sign, tried in order; without one the
+# invoices use Helvetica and print "Rs." instead of "₹"
+FONT_CANDIDATES = [
+    (getattr(config, 'PDF_FONT_PATH', None), getattr(config, 'PDF_BOLD_FONT_PATH', None)),
+    (os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "DejaVuSans.ttf"),
+     os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "DejaVuSans-Bold.ttf")),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("C:\\Windows\\Fonts\\Nirmala.ttf", "C:\\Windows\\Fonts\\NirmalaB.ttf"),
+    ("C:\\Windows\\Fonts\\arial.ttf", "C:\\Windows\\Fonts\\arialbd.ttf"),
+]
+
+RUPEE = "\u20b9"
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_invoice_template():
+    """Return the invoice template shared by every PDFGenerator in this process"""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = InvoiceTemplate()
+        return _template
+
+
+def register_invoice_fonts():
+    """Register the first usable font pair; returns (regular, bold) font names"""
+    for regular_path, bold_path in FONT_CANDIDATES:
+        if not regular_path or not os.path.exists(regular_path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont("InvoiceSans", regular_path))
+            if bold_path and os.path.exists(bold_path):
+                pdfmetrics.registerFont(TTFont("InvoiceSans-Bold", bold_path))
+            else:
+                pdfmetrics.registerFont(TTFont("InvoiceSans-Bold", regular_path))
+            return "InvoiceSans", "InvoiceSans-Bold"
+        except Exception as e:
+            print(f"Could not load font {regular_path}: {e}")
+    return "Helvetica", "Helvetica-Bold"
+
+
+class InvoiceTemplate:
+    """The parts of an invoice that are the same for every bill, built once.
+
+    Fonts are registered, paragraph styles and table styles are created and
+    the title and footer paragraphs are parsed when the template is made.
+    Rendering a bill then only builds its customer details and item rows;
+    the static paragraphs are shallow copies, which share the parsed text.
+    """
+
+    customer_col_widths = [3 * inch, 3 * inch]
+    items_col_widths = [0.5 * inch, 2.5 * inch, 0.75 * inch, 1 * inch, 1 * inch]
 
-class PDFGenerator:
     def __init__(self):
+        self.font, self.bold_font = register_invoice_fonts()
+        # Helvetica has no rupee sign
+        self.currency = RUPEE if self.font != "Helvetica" else "Rs."
+
         self.styles = getSampleStyleSheet()
         self.title_style = ParagraphStyle(
             'Title',
             parent=self.styles['Heading1'],
+            fontName=self.bold_font,
             fontSize=16,
             alignment=1,
             spaceAfter=20
@@ -19,99 +92,362 @@ class PDFGenerator:
         self.header_style = ParagraphStyle(
             'Header',
             parent=self.styles['Heading2'],
+            fontName=self.bold_font,
             fontSize=12,
             spaceAfter=10
         )
-        self.normal_style = self.styles['Normal']
+        self.normal_style = ParagraphStyle('InvoiceNormal', parent=self.styles['Normal'], fontName=self.font)
+
+        self.customer_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
+            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 0), self.bold_font),
+            ('BOTTOMPADDING', (0, 0), (1, 0), 12),
+            ('BACKGROUND', (0, 1), (1, -1), colors.white),
+            ('GRID', (0, 0), (1, -1), 1, colors.black)
+        ])
+        # Styles of the paged tables, by shape; see page_table_style()
+        self.page_styles = {}
+        self.items_header = ["S.No.", "Medicine Name", "Quantity",
+                             f"Price ({self.currency})", f"Amount ({self.currency})"]
+
+        self.title = [
+            Paragraph("Pharmacy Management System", self.title_style),
+            Paragraph("INVOICE", self.title_style),
+        ]
+        self.items_heading = Paragraph("Items", self.header_style)
+        self.footer = [
+            Paragraph("Thank you for your business!", self.header_style),
+            Paragraph("Terms & Conditions Apply", self.normal_style),
+        ]
+
+    def bill_heading(self, bill_data):
+        """Flowables above a bill's items table"""
+        # Each document gets its own copies: ReportLab keeps layout state on a flowable
+        elements = [copy.copy(paragraph) for paragraph in self.title]
+        elements.append(Spacer(1, 0.25 * inch))
+
+        # Customer and Bill Info
+        customer_info = [
+            ["Customer Information", "Bill Information"],
+            [f"Name: {bill_data['customer_name']}", f"Bill No: {bill_data['bill_id']}"],
+            [f"Contact: {bill_data['customer_contact']}", f"Date: {format_bill_date(bill_data['date'])}"],
+            [f"Address: {bill_data['customer_address']}", ""]
+        ]
+        customer_table = Table(customer_info, colWidths=self.customer_col_widths)
+        customer_table.setStyle(self.customer_table_style)
+
+        elements.append(customer_table)
+        elements.append(Spacer(1, 0.25 * inch))
+        elements.append(copy.copy(self.items_heading))
+        return elements
+
+    def statement_heading(self, customer, from_date, to_date):
+        """Flowables above a customer statement's bills table"""
+        elements = [copy.copy(self.title[0]), Paragraph("STATEMENT", self.title_style), Spacer(1, 0.25 * inch)]
+
+        customer_info = [
+            ["Customer Information", "Statement Period"],
+            [f"Name: {customer['name']}", f"From: {from_date}"],
+            [f"Contact: {customer.get('contact') or ''}", f"To: {to_date}"],
+            [f"Address: {customer.get('address') or ''}", ""]
+        ]
+        customer_table = Table(customer_info, colWidths=self.customer_col_widths)
+        customer_table.setStyle(self.customer_table_style)
+
+        elements.append(customer_table)
+        elements.append(Spacer(1, 0.25 * inch))
+        elements.append(Paragraph("Bills", self.header_style))
+        return elements
+
+    def footer_elements(self):
+        elements = [Spacer(1, 0.5 * inch)]
+        elements.extend(copy.copy(paragraph) for paragraph in self.footer)
+        return elements
+
+    def page_table_style(self, columns, brought_forward, summary_rows):
+        """Style for one page of a paged table.
+
+        The page may start with a brought forward row under the header; it
+        ends with a carried forward row (summary_rows is 0) or with the
+        table's summary rows on the last page. Built once per shape.
+        """
+        key = (columns, brought_forward, summary_rows)
+        style = self.page_styles.get(key)
+        if style is not None:
+            return style
+
+        last = columns - 1
+        tail = summary_rows or 1
+        commands = [
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('BACKGROUND', (0, 0), (last, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (last, 0), colors.black),
+            ('ALIGN', (0, 0), (last, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (last, 0), self.bold_font),
+            ('BOTTOMPADDING', (0, 0), (last, 0), 12),
+            ('BACKGROUND', (0, 1), (last, -1 - tail), colors.white),
+        ]
+        if brought_forward:
+            commands.extend([
+                ('SPAN', (0, 1), (last - 1, 1)),
+                ('ALIGN', (0, 1), (last, 1), 'RIGHT'),
+                ('FONTNAME', (0, 1), (last, 1), self.bold_font),
+            ])
+        if summary_rows:
+            commands.extend([
+                ('GRID', (0, 0), (last, -1 - tail), 1, colors.black),
+                ('ALIGN', (last - 1, -tail), (last, -1), 'RIGHT'),
+                ('FONTNAME', (last - 1, -tail), (last, -1), self.bold_font),
+                ('LINEABOVE', (last - 1, -tail), (last, -tail), 1, colors.black),
+                ('LINEABOVE', (last - 1, -1), (last, -1), 1, colors.black),
+                ('LINEBELOW', (last - 1, -1), (last, -1), 1, colors.black)
+            ])
+        else:
+            commands.extend([
+                ('GRID', (0, 0), (last, -1), 1, colors.black),
+                ('SPAN', (0, -1), (last - 1, -1)),
+                ('ALIGN', (0, -1), (last, -1), 'RIGHT'),
+                ('FONTNAME', (0, -1), (last, -1), self.bold_font),
+            ])
+
+        style = TableStyle(commands)
+        self.page_styles[key] = style
+        return style
+
+
+def money(value):
+    return f"{value:.2f}"
+
+
+class PagedWriter:
+    """Writes bills and statements to a PDF one page at a time.
+
+    Flowables are made for the page being drawn and dropped once it is
+    drawn, and rows are pulled from their iterator only as pages need
+    them, so a bill with thousands of lines or a merged export of a whole
+    month is never held as one list of flowables. Long tables are cut into
+    one table per page: the column header repeats on every page, and the
+    running total of the amount column is carried forward at the foot of
+    a page and brought forward at the top of the next.
+    """
+
+    PADDING = 6
+
+    def __init__(self, filename, template=None, pagesize=letter, margin=72):
+        self.template = template or get_invoice_template()
+        self.canvas = canvas.Canvas(filename, pagesize=pagesize, pageCompression=1)
+        self.page_width, self.page_height = pagesize
+        self.margin = margin
+        self.left = margin + self.PADDING
+        self.top = self.page_height - margin - self.PADDING
+        self.bottom = margin + self.PADDING
+        self.width = self.page_width - 2 * self.left
+        self.y = self.top
+        self.page_number = 0
+        self.page_open = False
+
+    # Pages
+
+    def start_document(self):
+        """Start a bill or statement on a new page, numbering its pages from 1"""
+        if self.page_open:
+            self.finish_page()
+        self.page_number = 0
+        self.new_page()
+
+    def new_page(self):
+        if self.page_open:
+            self.finish_page()
+        self.page_number += 1
+        self.page_open = True
+        self.y = self.top
+
+    def finish_page(self):
+        self.canvas.setFont(self.template.font, 8)
+        self.canvas.drawRightString(self.page_width - self.margin, self.margin / 2, f"Page {self.page_number}")
+        self.canvas.showPage()
+        self.page_open = False
+
+    def at_top(self):
+        return self.y == self.top
+
+    def space_left(self):
+        return self.y - self.bottom
+
+    def place(self, flowable):
+        """Draw a flowable below the previous one, on a new page if it does not fit"""
+        space_before = 0 if self.at_top() else flowable.getSpaceBefore()
+        width, height = flowable.wrapOn(self.canvas, self.width, self.space_left())
+        if space_before + height > self.space_left() and not self.at_top():
+            self.new_page()
+            space_before = 0
+            width, height = flowable.wrapOn(self.canvas, self.width, self.space_left())
+
+        self.y -= space_before + height
+        flowable.drawOn(self.canvas, self.left, self.y, _sW=self.width - width)
+        self.y -= flowable.getSpaceAfter()
+
+    def close(self):
+        if self.page_open:
+            self.finish_page()
+        self.canvas.save()
+
+    # Documents
+
+    def write_bill(self, bill_data):
+        template = self.template
+        self.start_document()
+        for flowable in template.bill_heading(bill_data):
+            self.place(flowable)
+
+        rows = ([str(i), item['medicine_name'], item['quantity'], item['price'], item['amount']]
+                for i, item in enumerate(bill_data['items'], 1))
+        summary = [("Subtotal:", bill_data['subtotal']), ("Tax (18%):", bill_data['tax']),
+                   ("Total:", bill_data['total'])]
+        self.write_table(template.items_header, template.items_col_widths, rows, summary,
+                         continued=f"Bill No: {bill_data['bill_id']} (continued)")
+
+        for flowable in template.footer_elements():
+            self.place(flowable)
+
+    def write_statement(self, customer, bills, from_date, to_date):
+        """bills is an iterable of dicts with bill_id, bill_date and total, oldest first"""
+        template = self.template
+        self.start_document()
+        for flowable in template.statement_heading(customer, from_date, to_date):
+            self.place(flowable)
+
+        rows = ([str(i), str(bill['bill_date']), bill['bill_id'], bill['total']]
+                for i, bill in enumerate(bills, 1))
+        self.write_table(["S.No.", "Date", "Bill No.", f"Amount ({template.currency})"],
+                         [0.5 * inch, 1.5 * inch, 2.5 * inch, 1.75 * inch], rows,
+                         continued=f"Statement for {customer['name']} (continued)")
+
+        for flowable in template.footer_elements():
+            self.place(flowable)
+
+    def write_table(self, header, col_widths, rows, summary=None, continued=None):
+        """Draw rows as one table per page; the last cell of each row is its amount.
+
+        summary is the list of (label, value) rows under the last row; by
+        default a single Total of the amounts.
+        """
+        template = self.template
+        columns = len(header)
+        rows = iter(rows)
+        pending = deque()
+        running = Decimal(0)
+        brought_forward = False
+
+        header_height = Table([header], colWidths=col_widths,
+                              style=template.page_table_style(columns, False, 1)).wrap(self.width, self.top)[1]
+        row_height = Table([header, ["0"] * columns], colWidths=col_widths,
+                           style=template.page_table_style(columns, False, 1)).wrap(self.width, self.top)[1] \
+            - header_height
+
+        while True:
+            tail_rows = max(len(summary or ()), 1)
+            fixed = header_height + row_height * (tail_rows + brought_forward)
+            if self.space_left() < fixed + row_height and not self.at_top():
+                self.new_page()
+                if continued:
+                    self.place(Paragraph(escape(continued), template.normal_style))
+
+            # Pull one row more than fits, to know whether this is the last page
+            capacity = max(int((self.space_left() - fixed) // row_height), 1)
+            while len(pending) <= capacity:
+                try:
+                    pending.append(next(rows))
+                except StopIteration:
+                    break
+            page_rows = [pending.popleft() for _ in range(min(capacity, len(pending)))]
+
+            while True:
+                table = self.page_table(header, col_widths, page_rows, running, brought_forward,
+                                        not pending, summary)
+                height = table.wrap(self.width, self.space_left())[1]
+                if height <= self.space_left() or len(page_rows) <= 1:
+                    break
+                # A row came out taller than measured: move it to the next page
+                pending.appendleft(page_rows.pop())
+
+            self.place(table)
+            for row in page_rows:
+                running += Decimal(str(row[-1] or 0))
+            if not pending:
+                return running
+
+            self.new_page()
+            if continued:
+                self.place(Paragraph(escape(continued), template.normal_style))
+            brought_forward = True
+
+    def page_table(self, header, col_widths, page_rows, running, brought_forward, last, summary):
+        columns = len(header)
+        blank = [""] * (columns - 2)
+        data = [header]
+        if brought_forward:
+            data.append(["Brought forward:"] + blank + [money(running)])
+        data.extend(page_rows)
+
+        page_total = running + sum((Decimal(str(row[-1] or 0)) for row in page_rows), Decimal(0))
+        if not last:
+            data.append(["Carried forward:"] + blank + [money(page_total)])
+            summary_rows = 0
+        else:
+            summary = summary or [("Total:", money(page_total))]
+            data.extend(blank + [label, value] for label, value in summary)
+            summary_rows = len(summary)
+
+        return Table(data, colWidths=col_widths,
+                     style=self.template.page_table_style(columns, brought_forward, summary_rows))
+
+
+class PDFGenerator:
+    def __init__(self, template=None):
+        self.template = template or get_invoice_template()
+        self.styles = self.template.styles
+        self.title_style = self.template.title_style
+        self.header_style = self.template.header_style
+        self.normal_style = self.template.normal_style
 
     def generate_bill_pdf(self, bill_data, filename):
+        return self.generate_bills_pdf([bill_data], filename)
+
+    def generate_bills_pdf(self, bills, filename):
+        """Write one or more bills to a PDF, each bill starting on a new page.
+
+        bills may be a generator and each bill's 'items' any iterable; both
+        are consumed as the pages are drawn. filename may also be a binary
+        file object such as a BytesIO.
+        """
         try:
-            doc = SimpleDocTemplate(
-                filename,
-                pagesize=letter,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=72
-            )
-
-            elements = []
-
-            # Title
-            elements.append(Paragraph("Pharmacy Management System", self.title_style))
-            elements.append(Paragraph("INVOICE", self.title_style))
-            elements.append(Spacer(1, 0.25 * inch))
-
-            # Customer and Bill Info
-            customer_info = [
-                ["Customer Information", "Bill Information"],
-                [f"Name: {bill_data['customer_name']}", f"Bill No: {bill_data['bill_id']}"],
-                [f"Contact: {bill_data['customer_contact']}", f"Date: {bill_data['date']}"],
-                [f"Address: {bill_data['customer_address']}", ""]
-            ]
-
-            customer_table = Table(customer_info, colWidths=[3 * inch, 3 * inch])
-            customer_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
-                ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (1, 0), 12),
-                ('BACKGROUND', (0, 1), (1, -1), colors.white),
-                ('GRID', (0, 0), (1, -1), 1, colors.black)
-            ]))
-
-            elements.append(customer_table)
-            elements.append(Spacer(1, 0.25 * inch))
-
-            # Items Table - Removed Medicine ID column
-            elements.append(Paragraph("Items", self.header_style))
-
-            # Table header without Medicine ID
-            items_data = [["S.No.", "Medicine Name", "Quantity", "Price (₹)", "Amount (₹)"]]
-
-            # Add items without Medicine ID
-            for i, item in enumerate(bill_data['items'], 1):
-                items_data.append([
-                    str(i),
-                    item['medicine_name'],
-                    item['quantity'],
-                    item['price'],
-                    item['amount']
-                ])
-
-            # Add totals
-            items_data.append(["", "", "", "Subtotal:", bill_data['subtotal']])
-            items_data.append(["", "", "", "Tax (18%):", bill_data['tax']])
-            items_data.append(["", "", "", "Total:", bill_data['total']])
-
-            # Adjusted column widths since we removed one column
-            items_table = Table(items_data, colWidths=[0.5 * inch, 2.5 * inch, 0.75 * inch, 1 * inch, 1 * inch])
-            items_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (4, 0), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (4, 0), colors.black),
-                ('ALIGN', (0, 0), (4, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (4, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (4, 0), 12),
-                ('BACKGROUND', (0, 1), (4, -4), colors.white),
-                ('GRID', (0, 0), (4, -4), 1, colors.black),
-                ('ALIGN', (3, -3), (4, -1), 'RIGHT'),
-                ('FONTNAME', (3, -3), (4, -1), 'Helvetica-Bold'),
-                ('LINEABOVE', (3, -3), (4, -3), 1, colors.black),
-                ('LINEABOVE', (3, -1), (4, -1), 1, colors.black),
-                ('LINEBELOW', (3, -1), (4, -1), 1, colors.black)
-            ]))
-
-            elements.append(items_table)
-            elements.append(Spacer(1, 0.5 * inch))
-
-            # Footer
-            elements.append(Paragraph("Thank you for your business!", self.header_style))
-            elements.append(Paragraph("Terms & Conditions Apply", self.normal_style))
-
-            doc.build(elements)
+            writer = PagedWriter(filename, self.template)
+            for bill_data in bills:
+                writer.write_bill(bill_data)
+            writer.close()
             return True
 
         except Exception as e:
             print(f"Error generating PDF: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def generate_statement_pdf(self, customer, bills, from_date, to_date, filename):
+        """Write a customer's bills between two dates as a statement with a running total"""
+        try:
+            writer = PagedWriter(filename, self.template)
+            writer.write_statement(customer, bills, from_date, to_date)
+            writer.close()
+            return True
+
+        except Exception as e:
+            print(f"Error generating statement: {e}")
+            return False
+
+
+def render_bill_pdf(bill_data, filename):
+    """Build one bill PDF; module level so it can run in a process pool"""
+    return PDFGenerator().generate_bill_pdf(bill_data, filename)
@@ -0,0 +1,162 @@
+import datetime
+import os
+import re
+import tempfile
+import textwrap
+
+try:
+    import config
+except ImportError:
+    config = None
+
+# Device path of the receipt printer (e.g. /dev/usb/lp0, COM3 or \\host\printer)
+# or a directory to spool receipts into; the default spools to ./receipts
+RECEIPT_PRINTER = getattr(config, 'RECEIPT_PRINTER', None) or "receipts"
+
+# 'escpos' for thermal printers, 'text' for plain text
+RECEIPT_FORMAT = getattr(config, 'RECEIPT_FORMAT', 'escpos')
+
+# Characters per line: 48 for 80mm paper, 32 for 58mm
+RECEIPT_WIDTH = getattr(config, 'RECEIPT_WIDTH', 48)
+
+# ESC/POS commands
+ESC_INIT = b"\x1b@"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_DOUBLE_ON = b"\x1d!\x11"
+ESC_DOUBLE_OFF = b"\x1d!\x00"
+ESC_FEED_AND_CUT = b"\x1dV\x42\x03"
+
+
+def money(value):
+    return f"{float(value or 0):.2f}"
+
+
+def receipt_lines(bill_data, width=48):
+    """Lay a bill out as plain text lines of at most width characters.
+
+    Returns (header, body, footer): the header and footer are meant to be
+    centered, the body is left aligned. Prices are shown as "Rs." since
+    receipt printers have no rupee sign in their code pages.
+    """
+    qty_width, rate_width, amount_width = 4, 8, 9
+    name_width = width - qty_width - rate_width - amount_width - 3
+
+    header = ["Pharmacy Management System", "TAX INVOICE"]
+
+    bill_no = f"Bill No: {bill_data['bill_id']}"
+    date = f"Date: {bill_data['date']}"
+    body = []
+    if len(bill_no) + len(date) < width:
+        body.append(bill_no + date.rjust(width - len(bill_no)))
+    else:
+        body.extend([bill_no, date])
+    body.extend(textwrap.wrap(f"Customer: {bill_data.get('customer_name') or ''}", width) or ["Customer:"])
+
+    rule = "-" * width
+    body.append(rule)
+    body.append("Item".ljust(name_width) + " " + "Qty".rjust(qty_width) + " "
+                + "Rate".rjust(rate_width) + " " + "Amount".rjust(amount_width))
+    body.append(rule)
+
+    for item in bill_data['items']:
+        figures = (str(item['quantity']).rjust(qty_width) + " " + money(item['price']).rjust(rate_width)
+                   + " " + money(item['amount']).rjust(amount_width))
+        if name_width < 16:
+            # Narrow paper: the name gets its own line(s), the figures go underneath
+            body.extend(textwrap.wrap(str(item['medicine_name']), width))
+            body.append(figures.rjust(width))
+            continue
+
+        # Long names wrap; the figures go on the first line
+        name_lines = textwrap.wrap(str(item['medicine_name']), name_width) or [""]
+        body.append(name_lines[0].ljust(name_width) + " " + figures)
+        body.extend(name_lines[1:])
+
+    body.append(rule)
+    for label, value in (("Subtotal:", bill_data['subtotal']), ("Tax (18%):", bill_data['tax']),
+                         ("TOTAL Rs.:", bill_data['total'])):
+        body.append(label.rjust(width - amount_width - 1) + " " + money(value).rjust(amount_width))
+    body.append("=" * width)
+
+    footer = ["Thank you for your business!", "Terms & Conditions Apply"]
+    return header, body, footer
+
+
+def render_receipt_text(bill_data, width=48):
+    header, body, footer = receipt_lines(bill_data, width)
+    lines = [line.center(width).rstrip() for line in header] + body + [line.center(width).rstrip() for line in footer]
+    return "\n".join(lines) + "\n"
+
+
+def render_receipt_escpos(bill_data, width=48):
+    """The receipt as ESC/POS bytes: bold double-size title, body, feed and cut"""
+    header, body, footer = receipt_lines(bill_data, width)
+
+    def encode(lines):
+        return "".join(line + "\n" for line in lines).encode("ascii", errors="replace")
+
+    return b"".join([
+        ESC_INIT,
+        ESC_ALIGN_CENTER, ESC_BOLD_ON, ESC_DOUBLE_ON, encode(header[:1]), ESC_DOUBLE_OFF,
+        encode(header[1:]), ESC_BOLD_OFF,
+        ESC_ALIGN_LEFT, encode(body),
+        ESC_ALIGN_CENTER, encode(footer),
+        ESC_ALIGN_LEFT, ESC_FEED_AND_CUT,
+    ])
+
+
+class ReceiptPrinter:
+    """Sends bills to a receipt printer as ESC/POS or plain text.
+
+    target is either a device path, which the receipt is written to
+    directly, or a directory, where each receipt is spooled to its own
+    file for a print service (or a person) to pick up. Nothing here touches
+    ReportLab, so a receipt takes a few milliseconds.
+    """
+
+    def __init__(self, target=None, output_format=None, width=None):
+        self.target = target or RECEIPT_PRINTER
+        self.output_format = output_format or RECEIPT_FORMAT
+        self.width = width or RECEIPT_WIDTH
+
+    def render(self, bill_data):
+        if self.output_format == 'text':
+            return render_receipt_text(bill_data, self.width).encode("utf-8")
+        return render_receipt_escpos(bill_data, self.width)
+
+    def print_receipt(self, bill_data):
+        """Print one receipt; returns the path written to, or None on failure"""
+        data = self.render(bill_data)
+        try:
+            if self.is_spool_directory():
+                return self.spool(bill_data, data)
+            with open(self.target, "wb") as device:
+                device.write(data)
+            return self.target
+        except OSError as e:
+            print(f"Error printing receipt: {e}")
+            return None
+
+    def is_spool_directory(self):
+        if os.path.isdir(self.target):
+            return True
+        # A path that does not exist yet and is not a device is taken as a spool directory
+        return not os.path.exists(self.target) and not self.target.startswith(("/dev/", "\\\\")) \
+            and not re.fullmatch(r"(COM|LPT)\d+:?", self.target, re.IGNORECASE)
+
+    def spool(self, bill_data, data):
+        os.makedirs(self.target, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        bill_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(bill_data['bill_id']))
+        extension = ".txt" if self.output_format == 'text' else ".prn"
+        path = os.path.join(self.target, f"{stamp}-{bill_id}{extension}")
+
+        # Written under a temporary name and renamed, so a spooler never picks up half a receipt
+        handle, partial = tempfile.mkstemp(prefix=".receipt-", dir=self.target)
+        with os.fdopen(handle, "wb") as spool_file:
+            spool_file.write(data)
+        os.replace(partial, path)
+        return path
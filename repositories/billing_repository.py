@@ -1,14 +1,39 @@
 from database.connection import DatabaseConnection
-from tkinter import messagebox
-import mysql.connector
-from mysql.connector import Error
+from database.id_allocator import ID_DIGITS
+from repositories.report_repository import ReportRepository
+from repositories.search_index import TrigramIndex, parse_date_range
+
+
+class InsufficientStockError(Exception):
+    """Raised when one or more bill lines ask for more units than are in stock"""
+
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls
+        lines = [
+            f"{s['name']} ({s['medicine_id']}): requested {s['requested']}, available {s['available']}"
+            for s in shortfalls
+        ]
+        super().__init__("\n".join(lines))
+
 
 class BillingRepository:
+    # Customers per query when fetching the bills of a name search
+    CUSTOMER_BATCH = 200
+
     def __init__(self, db_connection):
         self.db = db_connection
-        
+        self.report_repo = ReportRepository(db_connection)
+        self.last_shortfalls = []
+
+        # Customer names for the history search, refreshed from updated_at on use
+        self.customer_index = TrigramIndex()
+        self.customer_index_stamp = None
+
     def create_bill(self, bill_data):
-        # Start a transaction
+        # The whole bill is written in one transaction with a fixed number of
+        # round trips: header insert, one batched items insert, one stock update
+        # and the daily sales rollup
+        self.last_shortfalls = []
         try:
             # Insert bill header
             bill_query = """
@@ -24,44 +49,120 @@ class BillingRepository:
                 bill_data['total']
             )
 
-            self.db.execute_query(bill_query, bill_params)
-
-            # Insert bill items
-            for item in bill_data['items']:
-                item_query = """
-                INSERT INTO bill_items (bill_id, medicine_id, quantity, price, amount)
-                VALUES (%s, %s, %s, %s, %s)
-                """
-                item_params = (
+            # Insert all bill items in one batch
+            item_query = """
+            INSERT INTO bill_items (bill_id, medicine_id, quantity, price, amount)
+            VALUES (%s, %s, %s, %s, %s)
+            """
+            item_rows = [
+                (
                     bill_data['bill_id'],
                     item['medicine_id'],
                     item['quantity'],
                     item['price'],
                     item['amount']
                 )
+                for item in bill_data['items']
+            ]
 
-                self.db.execute_query(item_query, item_params)
-
-                # Update medicine quantity
-                update_query = """
-                UPDATE medicines
-                SET quantity = quantity - %s
-                WHERE medicine_id = %s
-                """
-                update_params = (item['quantity'], item['medicine_id'])
+            # Every counter updates the same daily_sales row, so the rollup goes
+            # last, just before commit, and holds that shared row lock only
+            # for the commit itself; the medicine rows are locked one step earlier
+            success = (self.db.execute_query(bill_query, bill_params)
+                       and self.db.execute_many(item_query, item_rows)
+                       and self.reserve_stock(bill_data['items'])
+                       and self.report_repo.record_sale(bill_data))
 
-                self.db.execute_query(update_query, update_params)
+            if not success:
+                self.db.rollback()
+                return False
 
             # Commit the transaction
             self.db.commit()
+            self.db.changes.record('bills', [bill_data['bill_id']])
+            self.db.changes.record('medicines', [item['medicine_id'] for item in bill_data['items']])
             return True
 
-        except Error as e:
+        except InsufficientStockError as e:
+            self.db.rollback()
+            self.last_shortfalls = e.shortfalls
+            self.db.report_error("Insufficient Stock", f"Bill not saved, stock ran out:\n{e}")
+            return False
+
+        except self.db.Error as e:
             # Rollback in case of error
             self.db.rollback()
-            messagebox.showerror("Billing Error", f"Error creating bill: {e}")
+            self.db.report_error("Billing Error", f"Error creating bill: {e}")
             return False
 
+    def reserve_stock(self, items):
+        """Atomically take every line's quantity off stock inside the bill transaction.
+
+        A single conditional UPDATE decrements only rows that still hold
+        enough units, so concurrent counters can never drive stock negative.
+        If any line falls short the transaction is rolled back and
+        InsufficientStockError lists the shortfall per medicine.
+        """
+        quantities = {}
+        for item in items:
+            medicine_id = item['medicine_id']
+            quantities[medicine_id] = quantities.get(medicine_id, 0) + int(item['quantity'])
+
+        if not quantities:
+            return True
+
+        # Sorted ids keep row locks in the same order for every terminal
+        medicine_ids = sorted(quantities)
+        cases = " ".join("WHEN %s THEN %s" for _ in medicine_ids)
+        placeholders = ", ".join(["%s"] * len(medicine_ids))
+        update_query = f"""
+        UPDATE medicines
+        SET quantity = quantity - CASE medicine_id {cases} END
+        WHERE medicine_id IN ({placeholders})
+          AND quantity >= CASE medicine_id {cases} END
+        """
+
+        case_params = []
+        for medicine_id in medicine_ids:
+            case_params.extend((medicine_id, quantities[medicine_id]))
+        params = case_params + medicine_ids + case_params
+
+        if not self.db.execute_query(update_query, tuple(params)):
+            return False
+
+        if self.db.rowcount == len(medicine_ids):
+            return True
+
+        # Undo the lines that did fit before reading stock, so shortfalls are
+        # reported against what is really on the shelf
+        self.db.rollback()
+        raise InsufficientStockError(self.get_stock_shortfalls(quantities))
+
+    def get_stock_shortfalls(self, quantities):
+        """Compare requested quantities ({medicine_id: units}) with current stock"""
+        medicine_ids = sorted(quantities)
+        placeholders = ", ".join(["%s"] * len(medicine_ids))
+        query = f"""
+        SELECT medicine_id, name, quantity
+        FROM medicines
+        WHERE medicine_id IN ({placeholders})
+        """
+        self.db.execute_query(query, tuple(medicine_ids))
+        stock = {row['medicine_id']: row for row in self.db.fetch_all()}
+
+        shortfalls = []
+        for medicine_id in medicine_ids:
+            row = stock.get(medicine_id)
+            available = int(row['quantity']) if row else 0
+            if available < quantities[medicine_id]:
+                shortfalls.append({
+                    'medicine_id': medicine_id,
+                    'name': row['name'] if row else "Unknown medicine",
+                    'requested': quantities[medicine_id],
+                    'available': available
+                })
+        return shortfalls
+
     def get_all_bills(self):
         query = """
         SELECT b.bill_id, b.customer_id, c.name as customer_name, 
@@ -77,93 +178,251 @@ class BillingRepository:
         self.db.execute_query(query)
         return self.db.fetch_all()
 
-    def search_bills(self, search_by, search_term):
-        query = """
-        SELECT b.bill_id, b.customer_id, c.name as customer_name, 
-               b.total, b.bill_date,
-               GROUP_CONCAT(m.name SEPARATOR ', ') as medicines
-        FROM bills b
-        JOIN customers c ON b.customer_id = c.customer_id
-        JOIN bill_items bi ON b.bill_id = bi.bill_id
-        JOIN medicines m ON bi.medicine_id = m.medicine_id
-        WHERE 
+    def get_bills_page(self, limit=100, after=None):
+        """Return the next page of bills, newest first.
+
+        Keyset pagination: after is the (bill_date, bill_id) of the last row
+        of the previous page, so every page is an index range scan on
+        (bill_date, bill_id) no matter how deep into the history it is.
+        The medicines list is only aggregated for the bills on the page.
         """
+        where = ""
+        params = []
+        if after:
+            # The leading bill_date <= bound lets both MySQL and SQLite seek the index
+            where = "WHERE bill_date <= %s AND (bill_date < %s OR bill_id < %s)"
+            params.extend((after[0], after[0], after[1]))
 
-        if search_by == 'Bill ID':
-            query += "b.bill_id LIKE %s"
-        elif search_by == 'Customer Name':
-            query += "c.name LIKE %s"
-        elif search_by == 'Customer ID':
-            query += "b.customer_id LIKE %s"
-        elif search_by == 'Date':
-            query += "b.bill_date LIKE %s"
-
-        query += " GROUP BY b.bill_id, b.customer_id, c.name, b.total, b.bill_date"
-        query += " ORDER BY b.bill_date DESC"
-
-        self.db.execute_query(query, (f"%{search_term}%",))
-        return self.db.fetch_all()
+        return self.fetch_bill_list(where, params, limit)
 
-    def filter_bills_by_date(self, from_date, to_date):
-        query = """
-        SELECT b.bill_id, b.customer_id, c.name as customer_name, 
-               b.total, b.bill_date,
-               GROUP_CONCAT(m.name SEPARATOR ', ') as medicines
-        FROM bills b
-        JOIN customers c ON b.customer_id = c.customer_id
-        JOIN bill_items bi ON b.bill_id = bi.bill_id
-        JOIN medicines m ON bi.medicine_id = m.medicine_id
-        WHERE b.bill_date BETWEEN %s AND %s
-        GROUP BY b.bill_id, b.customer_id, c.name, b.total, b.bill_date
-        ORDER BY b.bill_date DESC
+    def get_bills_by_ids(self, bill_ids):
+        """Return the history rows for just these bills"""
+        bill_ids = list(bill_ids)
+        if not bill_ids:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(bill_ids))
+        return self.fetch_bill_list(f"WHERE bill_id IN ({placeholders})", bill_ids)
+
+    def fetch_bill_list(self, where="", params=(), limit=None, rank=None, rank_params=()):
+        """Run the history tab's row query for the bills matching where.
+
+        Rows come back newest first, or ordered by rank (an SQL expression,
+        lowest first) and then newest first when one is given. The bills are filtered, ordered and limited on
+        their own; the customer name and the medicines list are only looked
+        up for the rows that are returned.
         """
+        params = list(rank_params) + list(params)
+        order = "bill_date DESC, bill_id DESC"
+        if rank:
+            order = "search_rank, " + order
+
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s"
+            params.append(limit)
 
-        self.db.execute_query(query, (from_date, to_date))
+        query = f"""
+        SELECT p.bill_id, p.customer_id, c.name as customer_name,
+               p.total, p.bill_date,
+               (SELECT GROUP_CONCAT(m.name SEPARATOR ', ')
+                FROM bill_items bi
+                JOIN medicines m ON bi.medicine_id = m.medicine_id
+                WHERE bi.bill_id = p.bill_id) as medicines
+        FROM (
+            SELECT bill_id, customer_id, total, bill_date, {rank or 0} AS search_rank
+            FROM bills
+            {where}
+            ORDER BY {order}
+            {limit_clause}
+        ) p
+        JOIN customers c ON p.customer_id = c.customer_id
+        ORDER BY p.search_rank, p.bill_date DESC, p.bill_id DESC
+        """
+        self.db.execute_query(query, tuple(params) if params else None)
         return self.db.fetch_all()
 
+    def search_bills(self, search_by, search_term, limit=200):
+        """Search the billing history, best matches first.
+
+        Every mode is answered from an index instead of LIKE '%term%':
+        Bill ID and Customer ID are prefix matches on the key columns
+        ("250314" also finds BILL-250314-000042) or a day's sequence
+        number ("42" finds it too), Customer Name is a ranked
+        trigram lookup over customer names, and Date takes a year, month or
+        day and turns it into a bill_date range.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return []
+
+        if search_by == 'Bill ID':
+            where, params = self.prefix_condition("bill_id", search_term, "BILL-")
+            # An exact id sorts ahead of longer ids that share its prefix
+            return self.fetch_bill_list(where, params, limit,
+                                        rank="CASE WHEN bill_id = %s THEN 0 ELSE 1 END",
+                                        rank_params=(search_term,))
+
+        if search_by == 'Customer ID':
+            where, params = self.prefix_condition("customer_id", search_term, "CUST")
+            # The customer typed in full first, then others sharing the prefix
+            return self.fetch_bill_list(where, params, limit,
+                                        rank="CASE WHEN customer_id = %s THEN 0 ELSE 1 END",
+                                        rank_params=(search_term,))
+
+        if search_by == 'Customer Name':
+            matches = self.search_customer_names(search_term)
+
+            # Bills of the best matching customers first, newest first within
+            # each. A common fragment can match thousands of customers, so they
+            # are read in rank order a batch at a time until limit bills are found
+            customer_ids = [customer_id for customer_id, _ in matches]
+            rows = []
+            for start in range(0, len(customer_ids), self.CUSTOMER_BATCH):
+                if len(rows) >= limit:
+                    break
+                batch = customer_ids[start:start + self.CUSTOMER_BATCH]
+                placeholders = ", ".join(["%s"] * len(batch))
+                ranks = " ".join(f"WHEN %s THEN {rank}" for rank in range(len(batch)))
+                rows.extend(self.fetch_bill_list(f"WHERE customer_id IN ({placeholders})",
+                                                 batch, limit - len(rows),
+                                                 rank=f"CASE customer_id {ranks} END",
+                                                 rank_params=batch))
+            return rows
+
+        if search_by == 'Date':
+            date_range = parse_date_range(search_term)
+            if not date_range:
+                return []
+            return self.fetch_bill_list("WHERE bill_date >= %s AND bill_date < %s",
+                                        date_range, limit)
+
+        return []
+
+    def prefix_condition(self, column, term, id_prefix):
+        """Index-friendly prefix match on an id column; a term starting with a digit also matches id_prefix + term.
+
+        A term of up to ID_DIGITS digits is also taken as a daily sequence
+        number, so "42" and "000042" find BILL-250314-000042. That match
+        is on the end of the id and scans the key index instead of seeking it.
+        """
+        escaped = term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+        patterns = [escaped + "%"]
+        if term[:1].isdigit():
+            patterns.append(id_prefix + escaped + "%")
+        if term.isdigit() and len(term) <= ID_DIGITS:
+            patterns.append("%-" + term.zfill(ID_DIGITS))
+
+        where = " OR ".join(f"{column} LIKE %s ESCAPE '!'" for _ in patterns)
+        return f"WHERE {where}", patterns
+
+    def search_customer_names(self, name, limit=50):
+        """Return [(customer_id, score)], best first: every customer whose name contains name, plus up to limit fuzzy matches"""
+        self.refresh_customer_index()
+        return self.customer_index.search(name, limit)
+
+    def refresh_customer_index(self):
+        """Bring the in-memory customer name index up to date.
+
+        Only customers changed since the last refresh are read; a change in
+        the number of customers (a delete) triggers a full rebuild.
+        """
+        self.db.execute_query("""
+        SELECT COUNT(*) AS customer_count, MAX(updated_at) AS last_update
+        FROM customers
+        """)
+        stats = self.db.fetch_one() or {}
+        customer_count = int(stats.get('customer_count') or 0)
+        last_update = stats.get('last_update')
+
+        if (customer_count, last_update) == self.customer_index_stamp:
+            return
+
+        query = "SELECT customer_id, name FROM customers"
+        params = None
+        if self.customer_index_stamp is not None and self.customer_index_stamp[1] is not None:
+            query += " WHERE updated_at >= %s"
+            params = (self.customer_index_stamp[1],)
+
+        if not self.db.execute_query(query, params):
+            return
+        rows = self.db.fetch_all()
+
+        if params is None:
+            self.customer_index.clear()
+        for row in rows:
+            self.customer_index.add(row['customer_id'], row['name'])
+
+        if len(self.customer_index) != customer_count:
+            # Rows were deleted, so the delta cannot be trusted; start over
+            self.customer_index_stamp = None
+            self.customer_index.clear()
+            if self.db.execute_query("SELECT customer_id, name FROM customers"):
+                for row in self.db.fetch_all():
+                    self.customer_index.add(row['customer_id'], row['name'])
+
+        self.customer_index_stamp = (customer_count, last_update)
+
+    def filter_bills_by_date(self, from_date, to_date):
+        return self.fetch_bill_list("WHERE bill_date BETWEEN %s AND %s", (from_date, to_date))
+
     def get_bill_details(self, bill_id):
-        # Get bill header
-        header_query = """
+        return self.get_bills_details([bill_id]).get(bill_id)
+
+    def get_bills_details(self, bill_ids):
+        """Return {bill_id: details} for the given bills in two queries, whatever their number"""
+        bill_ids = list(bill_ids)
+        if not bill_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(bill_ids))
+
+        # Get bill headers
+        header_query = f"""
         SELECT b.*, c.name as customer_name, c.contact as customer_contact, 
                c.email as customer_email, c.address as customer_address
         FROM bills b
         JOIN customers c ON b.customer_id = c.customer_id
-        WHERE b.bill_id = %s
+        WHERE b.bill_id IN ({placeholders})
         """
 
-        self.db.execute_query(header_query, (bill_id,))
-        bill_header = self.db.fetch_one()
+        self.db.execute_query(header_query, tuple(bill_ids))
+        bill_headers = self.db.fetch_all()
 
-        if not bill_header:
-            return None
+        if not bill_headers:
+            return {}
 
         # Get bill items
-        items_query = """
+        items_query = f"""
         SELECT bi.*, m.name as medicine_name
         FROM bill_items bi
         JOIN medicines m ON bi.medicine_id = m.medicine_id
-        WHERE bi.bill_id = %s
+        WHERE bi.bill_id IN ({placeholders})
         """
 
-        self.db.execute_query(items_query, (bill_id,))
+        self.db.execute_query(items_query, tuple(bill_ids))
         bill_items = self.db.fetch_all()
 
-        # Combine header and items
-        bill_details = {
-            'bill_id': bill_header['bill_id'],
-            'customer_id': bill_header['customer_id'],
-            'customer_name': bill_header['customer_name'],
-            'customer_contact': bill_header['customer_contact'],
-            'customer_address': bill_header['customer_address'],
-            'date': bill_header['bill_date'].strftime('%d-%m-%Y'),
-            'subtotal': str(bill_header['subtotal']),
-            'tax': str(bill_header['tax']),
-            'total': str(bill_header['total']),
-            'items': []
-        }
+        # Combine headers and items
+        bills = {}
+        for bill_header in bill_headers:
+            bills[bill_header['bill_id']] = {
+                'bill_id': bill_header['bill_id'],
+                'customer_id': bill_header['customer_id'],
+                'customer_name': bill_header['customer_name'],
+                'customer_contact': bill_header['customer_contact'],
+                'customer_address': bill_header['customer_address'],
+                'date': bill_header['bill_date'].strftime('%d-%m-%Y'),
+                'subtotal': str(bill_header['subtotal']),
+                'tax': str(bill_header['tax']),
+                'total': str(bill_header['total']),
+                'items': []
+            }
 
         for item in bill_items:
-            bill_details['items'].append({
+            bill = bills.get(item['bill_id'])
+            if bill is None:
+                continue
+            bill['items'].append({
                 'medicine_id': item['medicine_id'],
                 'medicine_name': item['medicine_name'],
                 'quantity': str(item['quantity']),
@@ -171,8 +430,67 @@ class BillingRepository:
                 'amount': str(item['amount'])
             })
 
-        return bill_details
-    
+        return bills
+
+    def count_bills(self, from_date, to_date):
+        query = "SELECT COUNT(*) AS bill_count FROM bills WHERE bill_date >= %s AND bill_date <= %s"
+        if not self.db.execute_query(query, (from_date, to_date)):
+            return None
+        return int(self.db.fetch_one()['bill_count'] or 0)
+
+    def iter_bill_ids(self, from_date, to_date, batch_size=500):
+        """Yield lists of bill ids between two dates (inclusive), oldest first.
+
+        Pages are read by keyset on (bill_date, bill_id), so a month of
+        bills streams in fixed-size index range scans without holding the
+        whole list or a long-running cursor.
+        """
+        after = None
+        while True:
+            query = "SELECT bill_id, bill_date FROM bills WHERE bill_date >= %s AND bill_date <= %s"
+            params = [from_date, to_date]
+            if after:
+                query += " AND bill_date >= %s AND (bill_date > %s OR bill_id > %s)"
+                params.extend((after[0], after[0], after[1]))
+            query += " ORDER BY bill_date, bill_id LIMIT %s"
+            params.append(batch_size)
+
+            if not self.db.execute_query(query, tuple(params)):
+                return
+            rows = self.db.fetch_all()
+            if rows:
+                yield [row['bill_id'] for row in rows]
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['bill_date'], rows[-1]['bill_id'])
+
+    def iter_customer_bills(self, customer_id, from_date, to_date, batch_size=500):
+        """Yield a customer's bills between two dates (inclusive), oldest first, for a statement.
+
+        Read in keyset pages on idx_bills_customer, so a statement covering
+        years of bills never holds more than one page of rows.
+        """
+        after = None
+        while True:
+            query = """
+            SELECT bill_id, bill_date, subtotal, tax, total FROM bills
+            WHERE customer_id = %s AND bill_date >= %s AND bill_date <= %s
+            """
+            params = [customer_id, from_date, to_date]
+            if after:
+                query += " AND bill_date >= %s AND (bill_date > %s OR bill_id > %s)"
+                params.extend((after[0], after[0], after[1]))
+            query += " ORDER BY bill_date, bill_id LIMIT %s"
+            params.append(batch_size)
+
+            if not self.db.execute_query(query, tuple(params)):
+                return
+            rows = self.db.fetch_all()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['bill_date'], rows[-1]['bill_id'])
+
     def get_all_bill_items(self):
         try:
             query = "SELECT * FROM bill_items"
@@ -183,18 +501,6 @@ class BillingRepository:
             return []
 
         
-    def get_best_sellers(self, limit=10):
-        query = """
-            SELECT m.name AS medicine_name, SUM(bi.quantity) AS total_quantity_sold
-            FROM bill_items bi
-            JOIN medicines m ON bi.medicine_id = m.medicine_id
-            GROUP BY bi.medicine_id
-            ORDER BY total_quantity_sold DESC
-            LIMIT %s
-        """
-        try:
-            self.db.execute_query(query, (limit,))
-            return self.db.fetch_all()
-        except Exception as e:
-            print("Error fetching best sellers:", e)
-            return []
\ No newline at end of file
+    def get_best_sellers(self, limit=10, from_date=None, to_date=None, group_by='medicine'):
+        # Served from the per-medicine daily rollup instead of scanning bill_items
+        return self.report_repo.get_best_sellers(limit, from_date, to_date, group_by)
@@ -39,6 +39,7 @@ class CustomerRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('customers', [customer_data['customer_id']])
         return success
 
     def update_customer(self, customer_data):
@@ -58,6 +59,7 @@ class CustomerRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('customers', [customer_data['customer_id']])
         return success
 
     def delete_customer(self, customer_id):
@@ -65,4 +67,5 @@ class CustomerRepository:
         success = self.db.execute_query(query, (customer_id,))
         if success:
             self.db.commit()
+            self.db.changes.record('customers', [customer_id])
         return success
\ No newline at end of file
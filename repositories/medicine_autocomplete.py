@@ -0,0 +1,97 @@
+from bisect import bisect_left
+import datetime
+import heapq
+import threading
+import time
+from repositories.medicine_catalog import normalize_name
+
+
+class MedicineAutocomplete:
+    """Search-as-you-type suggestions over the medicine catalog.
+
+    A sorted list of (key, rank, medicine_id) is searched with bisect, so a
+    prefix lookup costs O(log n) plus one pass over the keys it matches. Keys are the
+    normalized id, the full name and every later word of the name, which
+    lets "500" find "Paracetamol 500". Matches are ranked by how they
+    matched, then by units sold over the last sales_days days.
+
+    suggest() only reads memory, so it is safe to call on every keystroke
+    on the Tk thread. refresh() reads the database and is meant to run in
+    the background, e.g. every refresh_interval seconds and after writes.
+    """
+
+    # Lower rank sorts first
+    ID_MATCH = 0
+    NAME_MATCH = 1
+    WORD_MATCH = 2
+
+    def __init__(self, catalog, report_repo, sales_days=90, sales_max_age=900, refresh_interval=10):
+        self.catalog = catalog
+        self.report_repo = report_repo
+        self.sales_days = sales_days
+        self.sales_max_age = sales_max_age
+        self.refresh_interval = refresh_interval
+        # (keys, entries, sort names), swapped as a whole so suggest never sees half a rebuild
+        self.index = ([], [], {})
+        self.names_version = None
+        self.sales = {}
+        self.sales_loaded_at = None
+        # The index may be warmed up in the background while the login screen is shown
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        with self.lock:
+            self.catalog.refresh()
+            if self.names_version != self.catalog.names_version:
+                self.build()
+
+            now = time.monotonic()
+            if self.sales_loaded_at is None or now - self.sales_loaded_at >= self.sales_max_age:
+                since = datetime.date.today() - datetime.timedelta(days=self.sales_days)
+                self.sales = self.report_repo.get_units_by_medicine(since)
+                self.sales_loaded_at = now
+
+    def build(self):
+        """Rebuild the sorted key list; only needed when names change, not stock"""
+        entries = []
+        sort_names = {}
+        for medicine_id, row in list(self.catalog.by_id.items()):
+            name = normalize_name(row['name'])
+            sort_names[medicine_id] = name
+            entries.append((normalize_name(medicine_id), self.ID_MATCH, medicine_id))
+            words = name.split()
+            for position in range(len(words)):
+                rank = self.NAME_MATCH if position == 0 else self.WORD_MATCH
+                entries.append((" ".join(words[position:]), rank, medicine_id))
+
+        entries.sort()
+        self.index = ([entry[0] for entry in entries], entries, sort_names)
+        self.names_version = self.catalog.names_version
+
+    def suggest(self, text, limit=8):
+        """Return up to limit catalog rows whose id or name starts with text, best first"""
+        prefix = normalize_name(text)
+        if not prefix:
+            return []
+
+        keys, entries, sort_names = self.index
+        sales = self.sales
+
+        # Best way each medicine matched: id beats name start beats a later word.
+        # The whole prefix range is read, so a best seller deep in a one-letter
+        # range is still found; only the top limit of it are sorted
+        matched = {}
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + chr(0x10FFFF), start)
+        for key, rank, medicine_id in entries[start:end]:
+            if key == prefix and rank == self.ID_MATCH:
+                rank = -1  # the exact id typed or scanned
+            if rank < matched.get(medicine_id, self.WORD_MATCH + 1):
+                matched[medicine_id] = rank
+
+        by_id = self.catalog.by_id
+        ranked = heapq.nsmallest(
+            limit, (match for match in matched.items() if match[0] in by_id),
+            key=lambda match: (match[1], -sales.get(match[0], 0), sort_names.get(match[0], ""))
+        )
+        return [by_id[medicine_id] for medicine_id, _ in ranked if medicine_id in by_id]
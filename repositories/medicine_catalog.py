@@ -0,0 +1,176 @@
+from database.connection import DatabaseConnection
+import threading
+import time
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key used for name lookups"""
+    return " ".join(str(name or "").casefold().split())
+
+
+class MedicineCatalog:
+    """In-process copy of the medicine list, keyed by id and by normalized name.
+
+    Writes committed through the repositories are picked up from the change
+    tracker on the next lookup, by reloading only the rows they touched.
+    Writes from other terminals are picked up by a delta read on updated_at
+    at most every max_age seconds. Rows are shared: treat them as read-only.
+    """
+
+    SELECT = """
+        SELECT m.medicine_id, m.name, m.supplier_id, s.name as supplier_name, m.price,
+               m.quantity, m.expiry_date, m.location, m.updated_at
+        FROM medicines m
+        LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
+    """
+
+    def __init__(self, db_connection, max_age=30):
+        self.db = db_connection
+        self.max_age = max_age
+        self.by_id = {}
+        self.by_name = {}
+        self.loaded = False
+        self.version = 0         # last change tracker version applied
+        self.stamp = None        # (row count, MAX(updated_at)) at the last delta read
+        self.checked_at = 0
+        self.names_version = 0   # bumped when a medicine is added, renamed or removed
+        self.lock = threading.RLock()
+
+    def refresh(self, force=False):
+        """Apply pending changes; cheap when nothing has changed"""
+        with self.lock:
+            if force or not self.loaded:
+                self.reload()
+                return
+
+            changes = self.db.changes
+            version = changes.version
+            if version != self.version:
+                medicine_ids = changes.changes_since(self.version, 'medicines')
+                supplier_ids = changes.changes_since(self.version, 'suppliers')
+                if medicine_ids is None or supplier_ids is None:
+                    self.reload()
+                    return
+
+                # A renamed supplier changes supplier_name on its medicines
+                if supplier_ids:
+                    medicine_ids.update(medicine_id for medicine_id, row in self.by_id.items()
+                                        if row['supplier_id'] in supplier_ids)
+                if medicine_ids:
+                    self.load_rows(medicine_ids)
+                self.version = version
+
+            if time.monotonic() - self.checked_at >= self.max_age:
+                self.refresh_delta()
+
+    def reload(self):
+        with self.lock:
+            version = self.db.changes.version
+            stamp = self.read_stamp()
+            if not self.db.execute_query(self.SELECT):
+                return
+
+            self.by_id = {}
+            self.by_name = {}
+            for row in self.db.fetch_all():
+                self.put(row)
+            self.names_version += 1
+
+            self.loaded = True
+            self.version = version
+            self.stamp = stamp
+            self.checked_at = time.monotonic()
+
+    def load_rows(self, medicine_ids):
+        """Re-read the given medicines; ids that no longer exist are dropped"""
+        medicine_ids = list(medicine_ids)
+        placeholders = ", ".join(["%s"] * len(medicine_ids))
+        query = self.SELECT + f" WHERE m.medicine_id IN ({placeholders})"
+        if not self.db.execute_query(query, tuple(medicine_ids)):
+            return
+
+        rows = {row['medicine_id']: row for row in self.db.fetch_all()}
+        for medicine_id in medicine_ids:
+            if medicine_id in rows:
+                self.put(rows[medicine_id])
+            else:
+                self.drop(medicine_id)
+
+    def refresh_delta(self):
+        """Pick up writes made by other terminals since the last check"""
+        self.checked_at = time.monotonic()
+        stamp = self.read_stamp()
+        if stamp is None or stamp == self.stamp:
+            return
+
+        if self.stamp is None or self.stamp[1] is None:
+            self.reload()
+            return
+
+        if not self.db.execute_query(self.SELECT + " WHERE m.updated_at >= %s", (self.stamp[1],)):
+            return
+        for row in self.db.fetch_all():
+            self.put(row)
+
+        if len(self.by_id) != stamp[0]:
+            # Rows were deleted elsewhere, which the delta cannot show
+            self.reload()
+            return
+        self.stamp = stamp
+
+    def read_stamp(self):
+        query = "SELECT COUNT(*) AS medicine_count, MAX(updated_at) AS last_update FROM medicines"
+        if not self.db.execute_query(query):
+            return None
+        row = self.db.fetch_one()
+        return int(row['medicine_count'] or 0), row['last_update']
+
+    def put(self, row):
+        old = self.by_id.get(row['medicine_id'])
+        if old is not None and old['name'] == row['name']:
+            # Stock or price change; the name keys stay as they are
+            self.by_id[row['medicine_id']] = row
+            return
+
+        self.drop(row['medicine_id'])
+        self.by_id[row['medicine_id']] = row
+        self.by_name.setdefault(normalize_name(row['name']), set()).add(row['medicine_id'])
+        self.names_version += 1
+
+    def drop(self, medicine_id):
+        row = self.by_id.pop(medicine_id, None)
+        if row is None:
+            return
+        key = normalize_name(row['name'])
+        ids = self.by_name.get(key)
+        if ids is not None:
+            ids.discard(medicine_id)
+            if not ids:
+                del self.by_name[key]
+        self.names_version += 1
+
+    def get(self, medicine_id):
+        self.refresh()
+        return self.by_id.get(medicine_id)
+
+    def find_by_name(self, name):
+        """Return the medicine called name (ignoring case and spacing), or None"""
+        self.refresh()
+        ids = self.by_name.get(normalize_name(name))
+        if not ids:
+            return None
+        return self.by_id[min(ids)]
+
+    def all(self):
+        """Every medicine, ordered by name"""
+        self.refresh()
+        return sorted(self.by_id.values(), key=lambda row: (normalize_name(row['name']), row['medicine_id']))
+
+    def names(self):
+        return [row['name'] for row in self.all()]
+
+    def low_stock(self, threshold=10):
+        """Medicines with fewer than threshold units, lowest stock first"""
+        self.refresh()
+        rows = [row for row in self.by_id.values() if int(row['quantity'] or 0) < threshold]
+        return sorted(rows, key=lambda row: (int(row['quantity'] or 0), normalize_name(row['name'])))
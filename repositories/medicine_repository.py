@@ -1,11 +1,14 @@
 from database.connection import DatabaseConnection
+from repositories.medicine_catalog import MedicineCatalog
 from tkinter import messagebox
 
 class MedicineRepository:
     def __init__(self, db_connection):
         self.db = db_connection
-        self.suppliers = []  # Cache for suppliers
-        self.load_suppliers()  # Initial load
+        self.suppliers = None  # Cache for suppliers, loaded on first use
+
+        # Id and name lookups for billing and supplies, loaded on first use
+        self.catalog = MedicineCatalog(db_connection)
 
     def load_suppliers(self):
         """Load or refresh the list of suppliers"""
@@ -15,11 +18,13 @@ class MedicineRepository:
 
     def get_supplier_names(self):
         """Return list of supplier names"""
+        if self.suppliers is None:
+            self.load_suppliers()
         return [supplier['name'] for supplier in self.suppliers]
 
     def get_all_medicines(self):
         query = """
-        SELECT m.medicine_id, m.name, s.name as supplier_name, m.price, m.quantity, 
+        SELECT m.medicine_id, m.name, m.supplier_id, s.name as supplier_name, m.price, m.quantity, 
                m.expiry_date, m.location
         FROM medicines m
         LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
@@ -27,9 +32,27 @@ class MedicineRepository:
         self.db.execute_query(query)
         return self.db.fetch_all()
 
+    def get_medicines_by_ids(self, medicine_ids):
+        """Return the rows get_all_medicines would give for just these medicines, or None if the query failed"""
+        medicine_ids = list(medicine_ids)
+        if not medicine_ids:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(medicine_ids))
+        query = f"""
+        SELECT m.medicine_id, m.name, m.supplier_id, s.name as supplier_name, m.price, m.quantity, 
+               m.expiry_date, m.location
+        FROM medicines m
+        LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
+        WHERE m.medicine_id IN ({placeholders})
+        """
+        if not self.db.execute_query(query, tuple(medicine_ids)):
+            return None
+        return self.db.fetch_all()
+
     def search_medicines(self, search_by, search_term):
         query = """
-        SELECT m.medicine_id, m.name, s.name as supplier_name, m.price, m.quantity, 
+        SELECT m.medicine_id, m.name, m.supplier_id, s.name as supplier_name, m.price, m.quantity, 
                m.expiry_date, m.location
         FROM medicines m
         LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
@@ -93,6 +116,7 @@ class MedicineRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('medicines', [medicine_data['medicine_id']])
         return success
 
     def update_medicine(self, medicine_data):
@@ -123,6 +147,7 @@ class MedicineRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('medicines', [medicine_data['medicine_id']])
         return success
 
     def delete_medicine(self, medicine_id):
@@ -130,6 +155,7 @@ class MedicineRepository:
         success = self.db.execute_query(query, (medicine_id,))
         if success:
             self.db.commit()
+            self.db.changes.record('medicines', [medicine_id])
         return success
 
     def update_quantity(self, medicine_id, quantity_change):
@@ -141,5 +167,6 @@ class MedicineRepository:
         success = self.db.execute_query(query, (quantity_change, medicine_id))
         if success:
             self.db.commit()
+            self.db.changes.record('medicines', [medicine_id])
         return success
 
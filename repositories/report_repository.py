@@ -0,0 +1,213 @@
+from database.connection import DatabaseConnection
+import datetime
+from decimal import Decimal
+
+class ReportRepository:
+    """Pre-aggregated sales figures kept in step with bills by create_bill"""
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    def record_sale(self, bill_data):
+        """Add one bill to its day's rollup rows; runs last in the bill transaction.
+
+        The per-medicine rows are written first and the day's daily_sales
+        row, which every counter shares, last, so its lock is held for as
+        short a time as possible before the commit.
+        """
+        # Per-medicine counters for best sellers, one batched upsert for all lines
+        per_medicine = {}
+        for item in bill_data['items']:
+            sold, amount = per_medicine.get(item['medicine_id'], (0, Decimal(0)))
+            per_medicine[item['medicine_id']] = (sold + int(item['quantity']),
+                                                 amount + Decimal(str(item['amount'])))
+
+        medicine_query = """
+        INSERT INTO daily_medicine_sales (sale_date, medicine_id, units, amount)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            units = units + VALUES(units),
+            amount = amount + VALUES(amount)
+        """
+        rows = [
+            (bill_data['date'], medicine_id, sold, amount)
+            for medicine_id, (sold, amount) in sorted(per_medicine.items())
+        ]
+        if not self.db.execute_many(medicine_query, rows):
+            return False
+
+        query = """
+        INSERT INTO daily_sales (sale_date, bill_count, subtotal, tax, total, units)
+        VALUES (%s, 1, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            bill_count = bill_count + VALUES(bill_count),
+            subtotal = subtotal + VALUES(subtotal),
+            tax = tax + VALUES(tax),
+            total = total + VALUES(total),
+            units = units + VALUES(units)
+        """
+        units = sum(int(item['quantity']) for item in bill_data['items'])
+        params = (
+            bill_data['date'],
+            bill_data['subtotal'],
+            bill_data['tax'],
+            bill_data['total'],
+            units
+        )
+        return self.db.execute_query(query, params)
+
+    def rebuild_daily_sales(self, from_date=None, to_date=None):
+        """Recompute the rollups from bills, for backfills or after manual edits"""
+        where = "WHERE 1=1"
+        params = []
+
+        if from_date:
+            where += " AND {column} >= %s"
+            params.append(from_date)
+
+        if to_date:
+            where += " AND {column} <= %s"
+            params.append(to_date)
+
+        params = tuple(params) if params else None
+        sales_where = where.format(column="sale_date")
+        bill_where = where.format(column="b.bill_date")
+
+        queries = [
+            "DELETE FROM daily_sales " + sales_where,
+            """
+            INSERT INTO daily_sales (sale_date, bill_count, subtotal, tax, total, units)
+            SELECT b.bill_date, COUNT(*), SUM(b.subtotal), SUM(b.tax), SUM(b.total),
+                   COALESCE(SUM(u.units), 0)
+            FROM bills b
+            LEFT JOIN (
+                SELECT bill_id, SUM(quantity) AS units
+                FROM bill_items
+                GROUP BY bill_id
+            ) u ON u.bill_id = b.bill_id
+            """ + bill_where + """
+            GROUP BY b.bill_date
+            """,
+            "DELETE FROM daily_medicine_sales " + sales_where,
+            """
+            INSERT INTO daily_medicine_sales (sale_date, medicine_id, units, amount)
+            SELECT b.bill_date, bi.medicine_id, SUM(bi.quantity), SUM(bi.amount)
+            FROM bills b
+            JOIN bill_items bi ON bi.bill_id = b.bill_id
+            """ + bill_where + """
+            GROUP BY b.bill_date, bi.medicine_id
+            """
+        ]
+
+        success = all(self.db.execute_query(query, params) for query in queries)
+        if success:
+            self.db.commit()
+        else:
+            self.db.rollback()
+        return success
+
+    def get_daily_sales(self, from_date=None, to_date=None):
+        query = """
+        SELECT sale_date, bill_count, subtotal, tax, total, units
+        FROM daily_sales
+        WHERE 1=1
+        """
+        params = []
+
+        if from_date:
+            query += " AND sale_date >= %s"
+            params.append(from_date)
+
+        if to_date:
+            query += " AND sale_date <= %s"
+            params.append(to_date)
+
+        query += " ORDER BY sale_date"
+
+        self.db.execute_query(query, tuple(params) if params else None)
+        return self.db.fetch_all()
+
+    def get_sales_series(self, period='month', from_date=None, to_date=None):
+        """Sum the daily rollup into 'day', 'week' (starting Monday) or 'month' buckets"""
+        series = {}
+
+        for row in self.get_daily_sales(from_date, to_date):
+            sale_date = row['sale_date']
+            if period == 'week':
+                label = (sale_date - datetime.timedelta(days=sale_date.weekday())).strftime('%Y-%m-%d')
+            elif period == 'day':
+                label = sale_date.strftime('%Y-%m-%d')
+            else:
+                label = sale_date.strftime('%Y-%m')
+
+            bucket = series.setdefault(label, {
+                'period': label, 'bill_count': 0, 'subtotal': Decimal(0),
+                'tax': Decimal(0), 'total': Decimal(0), 'units': 0
+            })
+            bucket['bill_count'] += int(row['bill_count'])
+            bucket['subtotal'] += Decimal(str(row['subtotal']))
+            bucket['tax'] += Decimal(str(row['tax']))
+            bucket['total'] += Decimal(str(row['total']))
+            bucket['units'] += int(row['units'])
+
+        return list(series.values())
+
+    def get_best_sellers(self, limit=10, from_date=None, to_date=None, group_by='medicine'):
+        """Top sellers by units over an optional date window.
+
+        Reads the per-day per-medicine counters, so the cost depends on the
+        number of days and medicines in the window, not on bill_items.
+        group_by is 'medicine' or 'supplier'.
+        """
+        if group_by == 'supplier':
+            key_column, name_column = "s.supplier_id", "s.name"
+        else:
+            key_column, name_column = "d.medicine_id", "m.name"
+
+        query = f"""
+        SELECT {key_column} AS id, {name_column} AS name,
+               SUM(d.units) AS total_quantity_sold, SUM(d.amount) AS total_amount
+        FROM daily_medicine_sales d
+        LEFT JOIN medicines m ON d.medicine_id = m.medicine_id
+        LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
+        WHERE 1=1
+        """
+        params = []
+
+        if from_date:
+            query += " AND d.sale_date >= %s"
+            params.append(from_date)
+
+        if to_date:
+            query += " AND d.sale_date <= %s"
+            params.append(to_date)
+
+        query += f"""
+        GROUP BY {key_column}, {name_column}
+        ORDER BY total_quantity_sold DESC
+        LIMIT %s
+        """
+        params.append(limit)
+
+        try:
+            self.db.execute_query(query, tuple(params))
+            return self.db.fetch_all()
+        except Exception as e:
+            print("Error fetching best sellers:", e)
+            return []
+
+    def get_units_by_medicine(self, from_date=None):
+        """Units sold per medicine since from_date, as {medicine_id: units}"""
+        query = """
+        SELECT medicine_id, SUM(units) AS units
+        FROM daily_medicine_sales
+        """
+        params = None
+        if from_date:
+            query += " WHERE sale_date >= %s"
+            params = (from_date,)
+        query += " GROUP BY medicine_id"
+
+        if not self.db.execute_query(query, params):
+            return {}
+        return {row['medicine_id']: int(row['units'] or 0) for row in self.db.fetch_all()}
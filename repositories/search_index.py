@@ -0,0 +1,191 @@
+import calendar
+import datetime
+import re
+from collections import defaultdict
+
+_MONTHS = {}
+for _number in range(1, 13):
+    _MONTHS[calendar.month_name[_number].lower()] = _number
+    _MONTHS[calendar.month_abbr[_number].lower()] = _number
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    """Lower-case text and collapse punctuation and whitespace to single spaces"""
+    return _NON_WORD.sub(" ", str(text or "").lower()).strip()
+
+
+def trigrams(text, prefix=False):
+    """Trigrams of every word, padded like pg_trgm ("  w", " wo", "wor", "ord", "rd ").
+
+    With prefix=True the last word is not end-padded, so a partially typed
+    word still matches every longer word it is a prefix of.
+    """
+    words = normalize(text).split()
+    grams = set()
+    for position, word in enumerate(words):
+        padded = "  " + word
+        if not (prefix and position == len(words) - 1):
+            padded += " "
+        for start in range(len(padded) - 2):
+            grams.add(padded[start:start + 3])
+    return grams
+
+
+class TrigramIndex:
+    """In-memory trigram index for fuzzy, ranked lookups of short texts such as names"""
+
+    def __init__(self, min_score=0.6):
+        self.min_score = min_score
+        self._postings = defaultdict(set)
+        self._grams = {}
+        self._texts = {}
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def add(self, key, text):
+        if key in self._texts:
+            self.remove(key)
+        grams = trigrams(text)
+        self._grams[key] = grams
+        self._texts[key] = normalize(text)
+        for gram in grams:
+            self._postings[gram].add(key)
+
+    def remove(self, key):
+        for gram in self._grams.pop(key, ()):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        self._texts.pop(key, None)
+
+    def clear(self):
+        self._postings.clear()
+        self._grams.clear()
+        self._texts.clear()
+
+    def search(self, query, limit=50):
+        """Return [(key, score)] best first; score is the share of query trigrams matched.
+
+        Every text that contains the query is returned, so the results are
+        never narrower than a substring search; limit caps only the fuzzy
+        matches that do not contain it.
+        """
+        query_grams = trigrams(query, prefix=True)
+        if not query_grams:
+            return []
+
+        hits = defaultdict(int)
+        for gram in query_grams:
+            for key in self._postings.get(gram, ()):
+                hits[key] += 1
+
+        normalized = normalize(query)
+        candidates = hits.keys()
+        if len(normalized) < 3:
+            # One or two letters in the middle of a word share no trigram with the query
+            candidates = self._texts.keys()
+
+        results = []
+        fuzzy = 0
+        for key in candidates:
+            score = hits.get(key, 0) / len(query_grams)
+            text = self._texts[key]
+            # Anything LIKE '%query%' would have found is kept, however low its score
+            contains = normalized in text
+            if score < self.min_score and not contains:
+                continue
+
+            # Whole-text and word prefixes outrank matches in the middle of a word
+            if text == normalized:
+                score += 1.0
+            elif text.startswith(normalized):
+                score += 0.5
+            elif (" " + normalized) in (" " + text):
+                score += 0.25
+            fuzzy += not contains
+            results.append((key, score, len(text), contains))
+
+        results.sort(key=lambda result: (-result[1], result[2]))
+        if fuzzy > limit:
+            # Drop the lowest scoring fuzzy matches, never a substring match
+            kept = 0
+            trimmed = []
+            for result in results:
+                if not result[3]:
+                    kept += 1
+                    if kept > limit:
+                        continue
+                trimmed.append(result)
+            results = trimmed
+        return [(key, score) for key, score, _, _ in results]
+
+
+def parse_date_range(term, today=None):
+    """Turn a typed date into a half-open (start, end) range, or None if unrecognised.
+
+    Accepts a year (2025), a month (2025-03, 03/2025, Mar 2025) or a day
+    (2025-03-14, 14-03-2025, 14/03/2025, 14 Mar, 2025), plus today/yesterday.
+    """
+    term = term.strip().lower().replace(",", " ")
+    term = " ".join(term.split())
+    today = today or datetime.date.today()
+
+    try:
+        if term == "today":
+            return today, today + datetime.timedelta(days=1)
+
+        if term == "yesterday":
+            return today - datetime.timedelta(days=1), today
+
+        match = re.fullmatch(r"(\d{4})", term)
+        if match:
+            year = int(match.group(1))
+            return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+        match = (re.fullmatch(r"(\d{4})[-/.](\d{1,2})", term)
+                 or re.fullmatch(r"(?P<m>\d{1,2})[-/.](?P<y>\d{4})", term))
+        if match:
+            if match.re.groupindex:
+                year, month = int(match.group('y')), int(match.group('m'))
+            else:
+                year, month = int(match.group(1)), int(match.group(2))
+            return _month_range(year, month)
+
+        match = re.fullmatch(r"([a-z]+) (\d{4})", term)
+        if match and match.group(1) in _MONTHS:
+            return _month_range(int(match.group(2)), _MONTHS[match.group(1)])
+
+        match = re.fullmatch(r"(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})", term)
+        if match:
+            day = datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            return day, day + datetime.timedelta(days=1)
+
+        match = re.fullmatch(r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})", term)
+        if match:
+            day = datetime.date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+            return day, day + datetime.timedelta(days=1)
+
+        match = re.fullmatch(r"(\d{1,2}) ([a-z]+) (\d{4})", term)
+        if match and match.group(2) in _MONTHS:
+            day = datetime.date(int(match.group(3)), _MONTHS[match.group(2)], int(match.group(1)))
+            return day, day + datetime.timedelta(days=1)
+    except ValueError:
+        # Out of range month or day
+        return None
+
+    return None
+
+
+def _month_range(year, month):
+    start = datetime.date(year, month, 1)
+    if month == 12:
+        return start, datetime.date(year + 1, 1, 1)
+    return start, datetime.date(year, month + 1, 1)
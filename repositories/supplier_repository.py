@@ -10,6 +10,18 @@ class SupplierRepository:
         self.db.execute_query(query)
         return self.db.fetch_all()
 
+    def get_suppliers_by_ids(self, supplier_ids):
+        """Return the given suppliers, or None if the query failed"""
+        supplier_ids = list(supplier_ids)
+        if not supplier_ids:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(supplier_ids))
+        query = f"SELECT * FROM suppliers WHERE supplier_id IN ({placeholders})"
+        if not self.db.execute_query(query, tuple(supplier_ids)):
+            return None
+        return self.db.fetch_all()
+
     def search_suppliers(self, search_by, search_term):
         query = "SELECT * FROM suppliers WHERE "
 
@@ -44,6 +56,7 @@ class SupplierRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('suppliers', [supplier_data['supplier_id']])
         return success
 
     def update_supplier(self, supplier_data):
@@ -63,6 +76,7 @@ class SupplierRepository:
         success = self.db.execute_query(query, params)
         if success:
             self.db.commit()
+            self.db.changes.record('suppliers', [supplier_data['supplier_id']])
         return success
 
     def delete_supplier(self, supplier_id):
@@ -70,6 +84,7 @@ class SupplierRepository:
         success = self.db.execute_query(query, (supplier_id,))
         if success:
             self.db.commit()
+            self.db.changes.record('suppliers', [supplier_id])
         return success
 
     def add_supply_record(self, supply_data):
@@ -87,7 +102,9 @@ class SupplierRepository:
 
         success = self.db.execute_query(query, params)
         if success:
+            supply_id = self.db.lastrowid
             self.db.commit()
+            self.db.changes.record('supplies', [supply_id])
 
             # Update medicine quantity
             medicine_repo = MedicineRepository(self.db)
@@ -123,4 +140,24 @@ class SupplierRepository:
         query += " ORDER BY s.supply_date DESC"
 
         self.db.execute_query(query, tuple(params) if params else None)
-        return self.db.fetch_all()
\ No newline at end of file
+        return self.db.fetch_all()
+
+    def get_supply_records_by_ids(self, supply_ids):
+        """Return the rows get_supply_records would give for just these supplies, or None if the query failed"""
+        supply_ids = list(supply_ids)
+        if not supply_ids:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(supply_ids))
+        query = f"""
+        SELECT s.supply_id, sup.supplier_id, sup.name as supplier_name, 
+               m.medicine_id, m.name as medicine_name, s.quantity, 
+               s.amount, s.supply_date
+        FROM supplies s
+        JOIN suppliers sup ON s.supplier_id = sup.supplier_id
+        JOIN medicines m ON s.medicine_id = m.medicine_id
+        WHERE s.supply_id IN ({placeholders})
+        """
+        if not self.db.execute_query(query, tuple(supply_ids)):
+            return None
+        return self.db.fetch_all()
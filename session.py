@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database.connection import DatabaseConnection
+from repositories.medicine_repository import MedicineRepository
+from repositories.customer_repository import CustomerRepository
+from repositories.supplier_repository import SupplierRepository
+from repositories.billing_repository import BillingRepository
+from repositories.report_repository import ReportRepository
+from repositories.user_repository import UserRepository
+from repositories.medicine_autocomplete import MedicineAutocomplete
+
+
+class AppSession:
+    """Database connection, repositories and caches shared by the login page and the main window.
+
+    warm_up() loads the medicine catalog and its search index, the supplier
+    list and the newest page of bills in background threads while the login
+    screen is shown. The main window is then built on the same connection
+    pool and warmed caches instead of loading everything again after login.
+    """
+
+    def __init__(self, db=None, recent_bills=100, recent_bills_max_age=60):
+        self.db = db or DatabaseConnection()
+        self.user_repo = UserRepository(self.db)
+        self.medicine_repo = MedicineRepository(self.db)
+        self.supplier_repo = SupplierRepository(self.db)
+        self.customer_repo = CustomerRepository(self.db)
+        self.billing_repo = BillingRepository(self.db)
+        self.report_repo = ReportRepository(self.db)
+        self.medicine_search = MedicineAutocomplete(self.medicine_repo.catalog, self.report_repo)
+
+        self.recent_bills = recent_bills
+        self.recent_bills_max_age = recent_bills_max_age
+        self.user = None
+        self.executor = None
+        self.warmups = {}
+        self.closed = False
+
+    def warm_up(self):
+        """Start loading the data the main window needs first; returns immediately"""
+        if self.executor is not None:
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="pharmacy-warmup")
+        self.warmups = {
+            'catalog': self.executor.submit(self.medicine_search.refresh),
+            'suppliers': self.executor.submit(self.medicine_repo.load_suppliers),
+            'bills': self.executor.submit(self.fetch_recent_bills),
+        }
+
+    def refresh_search(self):
+        """Bring the medicine search index up to date in the background; returns immediately.
+
+        Autocomplete lookups only read the index, so they never wait on the
+        database. A refresh still running from an earlier call is not queued again.
+        """
+        if self.executor is None or self.closed:
+            return
+        running = self.warmups.get('catalog')
+        if running is not None and not running.done():
+            return
+        self.warmups['catalog'] = self.executor.submit(self.medicine_search.refresh)
+
+    def fetch_recent_bills(self):
+        version = self.db.changes.version
+        bills = self.billing_repo.get_bills_page(self.recent_bills)
+        return version, time.monotonic(), bills
+
+    def take_recent_bills(self, limit):
+        """Return the prefetched first page of bills once, or None if it is not ready or out of date"""
+        future = self.warmups.pop('bills', None)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+
+        version, fetched_at, bills = future.result()
+        if limit != self.recent_bills or time.monotonic() - fetched_at > self.recent_bills_max_age:
+            return None
+        if self.db.changes.changes_since(version, 'bills') != set():
+            return None
+        return bills
+
+    def close(self):
+        self.closed = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.db.close()
@@ -0,0 +1,226 @@
+"""Benchmark the repositories on synthetic data at several scales.
+
+    python -m tools.benchmark --scales small,medium --repeat 20 --out run.json
+    python -m tools.benchmark --scales small --compare run.json
+
+Each scale gets a fresh throwaway SQLite database filled by
+tools.synthetic_data, so runs need no MySQL server and the same seed
+always measures the same rows. Every operation runs once untimed to warm
+caches, then --repeat times; min, median, p95 and max are reported per
+operation, with the statements that took the most database time. The
+JSON written by --out can be handed to --compare on a later run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from database.backends import SQLiteBackend
+from database.connection import DatabaseConnection, close_pools
+from database.instrumentation import get_instrumentation
+from repositories.billing_repository import BillingRepository
+from repositories.medicine_repository import MedicineRepository
+from repositories.report_repository import ReportRepository
+from repositories.supplier_repository import SupplierRepository
+from tools.synthetic_data import SyntheticData
+
+# medicines, suppliers, customers, bills
+SCALES = {
+    'tiny': (100, 10, 200, 1000),
+    'small': (500, 50, 1000, 10000),
+    'medium': (2000, 150, 5000, 50000),
+    'large': (5000, 300, 20000, 200000),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_operation(operation, repeat):
+    """Run operation once to warm up, then repeat times; returns its timing summary"""
+    result = operation()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = operation()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'max_ms': round(max(timings), 3),
+        'rows': len(result) if isinstance(result, (list, dict)) else None,
+    }
+
+
+class BillFactory:
+    """New bills for the create_bill benchmark, drawn like the synthetic history"""
+
+    def __init__(self, data):
+        self.data = data
+        self.rng = data.rng("benchmark bills")
+        self.popular = data.popularity(self.rng)
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        customer_id = self.data.customer_ids[self.rng.randrange(len(self.data.customer_ids))]
+        return self.data.make_bill(f"BILL-9{self.count:06d}", customer_id, self.data.end_date,
+                                   self.popular, self.rng)
+
+
+def operations(db, data, pdf_dir):
+    """The operations to time, as (name, callable) pairs"""
+    billing_repo = BillingRepository(db)
+    medicine_repo = MedicineRepository(db)
+    supplier_repo = SupplierRepository(db)
+    report_repo = ReportRepository(db)
+
+    month_start = data.end_date.replace(day=1)
+    year_start = data.end_date - datetime.timedelta(days=364)
+    new_bill = BillFactory(data)
+    sample_bill_id = "BILL-000001"
+    sample_customer = data.customer_names[0]
+
+    def create_bill():
+        if not billing_repo.create_bill(new_bill()):
+            raise RuntimeError("create_bill failed")
+        return None
+
+    def generate_bill_pdf():
+        from pdf_generator import PDFGenerator
+        bill_data = billing_repo.get_bill_details(sample_bill_id)
+        if not PDFGenerator().generate_bill_pdf(bill_data, os.path.join(pdf_dir, "bill.pdf")):
+            raise RuntimeError("generate_bill_pdf failed")
+        return None
+
+    ops = [
+        ('create_bill', create_bill),
+        ('get_all_bills', billing_repo.get_all_bills),
+        ('get_bills_page', lambda: billing_repo.get_bills_page(100)),
+        ('search_bills bill id', lambda: billing_repo.search_bills('Bill ID', "00012")),
+        ('search_bills customer name', lambda: billing_repo.search_bills('Customer Name', sample_customer)),
+        ('search_bills date', lambda: billing_repo.search_bills('Date', data.end_date.strftime("%Y-%m"))),
+        ('search_medicines name', lambda: medicine_repo.search_medicines('Name', "Para")),
+        ('search_medicines id', lambda: medicine_repo.search_medicines('ID', data.medicine_ids[-1])),
+        ('get_supply_records', supplier_repo.get_supply_records),
+        ('get_supply_records supplier', lambda: supplier_repo.get_supply_records(data.supplier_ids[0])),
+        ('get_daily_sales month', lambda: report_repo.get_daily_sales(month_start, data.end_date)),
+        ('get_sales_series month', lambda: report_repo.get_sales_series('month', year_start, data.end_date)),
+        ('get_sales_series day', lambda: report_repo.get_sales_series('day', month_start, data.end_date)),
+        ('get_best_sellers year', lambda: report_repo.get_best_sellers(10, year_start, data.end_date)),
+        ('get_best_sellers supplier', lambda: report_repo.get_best_sellers(10, group_by='supplier')),
+    ]
+    try:
+        import reportlab  # noqa: F401
+        ops.append(('generate_bill_pdf', generate_bill_pdf))
+    except ImportError:
+        print("ReportLab is not installed, skipping generate_bill_pdf")
+    return ops
+
+
+def run_scale(name, seed, repeat, only=None):
+    medicines, suppliers, customers, bills = SCALES[name]
+    data = SyntheticData(medicines, suppliers, customers, bills, seed=seed)
+    db = DatabaseConnection(backend=SQLiteBackend(":memory:"))
+    instrumentation = db.instrumentation
+
+    started = time.perf_counter()
+    counts = data.populate(db)
+    populate_s = time.perf_counter() - started
+    print(f"[{name}] {counts['medicines']} medicines, {counts['customers']} customers, "
+          f"{counts['bills']} bills ({counts['bill_items']} items) in {populate_s:.1f}s")
+
+    results = {}
+    instrumentation.reset()
+    with tempfile.TemporaryDirectory() as pdf_dir:
+        for op_name, operation in operations(db, data, pdf_dir):
+            if only and not any(word in op_name for word in only):
+                continue
+            results[op_name] = summary = time_operation(operation, repeat)
+            print(f"[{name}] {op_name:<30} median {summary['median_ms']:9.2f} ms   "
+                  f"p95 {summary['p95_ms']:9.2f} ms")
+
+    top_statements = [
+        {'sql': stats['sql'][:200], 'calls': stats['calls'], 'total_ms': round(stats['total_ms'], 3),
+         'top_caller': stats['callers'][0][0] if stats['callers'] else None}
+        for stats in instrumentation.snapshot()[:10]
+    ]
+    db.close()
+    # Delete this scale's database before the next one is filled
+    close_pools()
+    db.backend.close()
+    return {
+        'sizes': {'medicines': medicines, 'suppliers': suppliers, 'customers': customers, 'bills': bills},
+        'rows': counts,
+        'populate_s': round(populate_s, 3),
+        'operations': results,
+        'top_statements': top_statements,
+    }
+
+
+def compare(previous, current):
+    """Print the median change of every operation present in both runs"""
+    for scale, result in current['scales'].items():
+        before = previous.get('scales', {}).get(scale)
+        if not before:
+            continue
+        print(f"\n[{scale}] compared with {previous.get('started', 'previous run')}")
+        for op_name, summary in result['operations'].items():
+            old = before['operations'].get(op_name)
+            if not old or not old['median_ms']:
+                continue
+            change = (summary['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+            print(f"  {op_name:<30} {old['median_ms']:9.2f} -> {summary['median_ms']:9.2f} ms  {change:+6.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the repositories on synthetic data")
+    parser.add_argument("--scales", default="small", help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per operation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help="comma separated words; time only operations whose name contains one")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare medians against")
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    only = [word.strip() for word in args.only.split(",")] if args.only else None
+
+    # Statement timings are kept for the report, but slow statements are not logged to disk
+    get_instrumentation().slow_query_log = None
+
+    run = {
+        'started': datetime.datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': "SQLite :memory:",
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for scale in scales:
+        run['scales'][scale] = run_scale(scale, args.seed, args.repeat, only)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            json.dump(run, out, indent=2)
+        print(f"Wrote results to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as previous:
+            compare(json.load(previous), run)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+"""Measure how long one invoice PDF takes to render.
+
+    python -m tools.benchmark_invoices --count 200 --items 12
+
+Renders the same synthetic bills twice into memory: once building a new
+InvoiceTemplate for every invoice (fonts, styles and table styles made
+again each time, as every PDFGenerator() used to do) and once with the
+shared template. Prints the time per invoice for both and the speedup.
+"""
+import argparse
+import random
+import time
+from io import BytesIO
+from pdf_generator import InvoiceTemplate, PDFGenerator, get_invoice_template
+
+
+def sample_bills(count, items, seed=1):
+    rng = random.Random(seed)
+    bills = []
+    for n in range(count):
+        rows = []
+        for i in range(items):
+            quantity = rng.randint(1, 10)
+            price = round(rng.uniform(2, 500), 2)
+            rows.append({
+                'medicine_id': f"MED{i:04d}",
+                'medicine_name': f"Medicine {rng.randint(1, 5000)} {rng.choice(['Tablets', 'Syrup', 'Capsules'])}",
+                'quantity': quantity,
+                'price': price,
+                'amount': round(quantity * price, 2),
+            })
+        subtotal = round(sum(row['amount'] for row in rows), 2)
+        tax = round(subtotal * 0.18, 2)
+        bills.append({
+            'bill_id': f"BILL-{n:06d}",
+            'date': "14-03-2025",
+            'customer_name': f"Customer {n}",
+            'customer_contact': f"98{n:08d}",
+            'customer_address': "12 Example Street",
+            'items': rows,
+            'subtotal': subtotal,
+            'tax': tax,
+            'total': round(subtotal + tax, 2),
+        })
+    return bills
+
+
+def time_renders(bills, make_generator):
+    started = time.perf_counter()
+    for bill_data in bills:
+        # Rendered into memory, so disk writes are not part of the timing
+        if not make_generator().generate_bills_pdf([bill_data], BytesIO()):
+            raise RuntimeError(f"Rendering {bill_data['bill_id']} failed")
+    return (time.perf_counter() - started) / len(bills)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark invoice PDF rendering")
+    parser.add_argument("--count", type=int, default=100, help="invoices to render per run")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    args = parser.parse_args(argv)
+
+    bills = sample_bills(args.count, args.items)
+    template = get_invoice_template()
+    print(f"Font: {template.font}, currency: {template.currency}")
+
+    # Warm up ReportLab's own caches before timing either run
+    time_renders(bills[:5], PDFGenerator)
+
+    rebuilt = time_renders(bills, lambda: PDFGenerator(InvoiceTemplate()))
+    shared = time_renders(bills, PDFGenerator)
+
+    print(f"New template per invoice: {rebuilt * 1000:.2f} ms/invoice")
+    print(f"Shared template:          {shared * 1000:.2f} ms/invoice")
+    print(f"Speedup:                  {rebuilt / shared:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
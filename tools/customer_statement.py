@@ -0,0 +1,46 @@
+"""Write a customer's statement: every bill in a date range with a running total.
+
+    python -m tools.customer_statement CUST1234 --from 2024-04-01 --to 2025-03-31 --out statement.pdf
+
+Bills are read and drawn a page at a time, so a statement covering years
+of bills takes no more memory than a short one.
+"""
+import argparse
+import datetime
+from database.connection import DatabaseConnection
+from repositories.billing_repository import BillingRepository
+from repositories.customer_repository import CustomerRepository
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a customer statement PDF")
+    parser.add_argument("customer_id")
+    parser.add_argument("--from", dest="from_date", type=parse_date, required=True, help="first day")
+    parser.add_argument("--to", dest="to_date", type=parse_date, required=True, help="last day")
+    parser.add_argument("--out", required=True, help="PDF file to write")
+    args = parser.parse_args(argv)
+
+    from pdf_generator import PDFGenerator
+
+    db = DatabaseConnection()
+    try:
+        customer = CustomerRepository(db).get_customer_by_id(args.customer_id)
+        if not customer:
+            print(f"No customer {args.customer_id}")
+            return 1
+
+        bills = BillingRepository(db).iter_customer_bills(args.customer_id, args.from_date, args.to_date)
+        if not PDFGenerator().generate_statement_pdf(customer, bills, args.from_date, args.to_date, args.out):
+            return 1
+        print(f"Wrote statement to {args.out}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
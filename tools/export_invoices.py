@@ -0,0 +1,87 @@
+"""Export the invoice PDFs for a day, a month or any date range.
+
+    python -m tools.export_invoices --day 2025-03-14 --out invoices/2025-03-14
+    python -m tools.export_invoices --month 2025-03 --out invoices/2025-03 --zip invoices/2025-03.zip
+    python -m tools.export_invoices --from 2025-03-01 --to 2025-03-31 --out invoices/march --merged march.pdf
+
+One PDF is written per bill. Running the same command again after an
+interruption skips the bills that are already exported.
+"""
+import argparse
+import calendar
+import datetime
+import sys
+import time
+from database.connection import DatabaseConnection
+from repositories.billing_repository import BillingRepository
+from invoice_export import InvoiceExporter
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def parse_month(value):
+    start = datetime.datetime.strptime(value, "%Y-%m").date()
+    last_day = calendar.monthrange(start.year, start.month)[1]
+    return start, start.replace(day=last_day)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export invoice PDFs for a date range")
+    parser.add_argument("--day", type=parse_date, help="export a single day")
+    parser.add_argument("--month", type=parse_month, help="export a month, YYYY-MM")
+    parser.add_argument("--from", dest="from_date", type=parse_date, help="first day to export")
+    parser.add_argument("--to", dest="to_date", type=parse_date, help="last day to export")
+    parser.add_argument("--out", required=True, help="directory for the per-bill PDFs")
+    parser.add_argument("--workers", type=int, help="rendering processes (default: one per core)")
+    parser.add_argument("--zip", dest="zip_path", help="also pack the PDFs into this zip file")
+    parser.add_argument("--merged", dest="merged_path", help="also write every invoice into this one PDF")
+    args = parser.parse_args(argv)
+
+    if args.day:
+        from_date = to_date = args.day
+    elif args.month:
+        from_date, to_date = args.month
+    elif args.from_date and args.to_date:
+        from_date, to_date = args.from_date, args.to_date
+    else:
+        parser.error("give --day, --month or both --from and --to")
+
+    db = DatabaseConnection()
+    exporter = InvoiceExporter(BillingRepository(db), args.out, workers=args.workers)
+    started = time.monotonic()
+
+    def show_progress(done, total, bill_id, status):
+        if status == 'failed':
+            print(f"\nFailed to render {bill_id}")
+        sys.stdout.write(f"\r{done}/{total} invoices")
+        sys.stdout.flush()
+
+    try:
+        result = exporter.export(from_date, to_date, on_progress=show_progress)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume")
+        db.close()
+        return 130
+
+    elapsed = time.monotonic() - started
+    print(f"\nRendered {result['rendered']}, skipped {result['skipped']} already exported, "
+          f"{result['missing']} missing, {result['failed']} failed in {elapsed:.1f}s")
+
+    if args.zip_path:
+        count = exporter.write_zip(from_date, to_date, args.zip_path)
+        print(f"Wrote {count} invoice(s) to {args.zip_path}")
+
+    if args.merged_path:
+        if exporter.write_merged_pdf(from_date, to_date, args.merged_path):
+            print(f"Wrote merged invoices to {args.merged_path}")
+        else:
+            result['failed'] += 1
+
+    db.close()
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,435 @@
+"""Drive several simulated checkout counters against one database.
+
+    python -m tools.load_simulator --terminals 8 --duration 60 --think-ms 500 --basket 1-6
+    python -m tools.load_simulator --terminals 8 --processes --use-config --out load.json
+
+Every terminal repeats what a counter does: look up or register a
+customer, search for and open each medicine in the basket, then save the
+bill with BillingRepository.create_bill. Ids come from an IdAllocator of
+the terminal's own, as at a real counter; --ids random makes them the way
+the forms used to (BILL-1000 to BILL-9999) for comparison. Failed saves
+that the database reports as a deadlock, lock timeout or duplicate id are
+retried. The run ends with throughput, p50/p95/p99 latencies, retries and
+a stock check: for every medicine, the stock before the run minus the
+units on the bills saved during the run must equal the stock after it.
+
+By default the terminals share a throwaway SQLite file filled by
+tools.synthetic_data. --use-config runs against the database in
+config.py instead; nothing else should write to it during the run, or
+the stock check will report their sales as violations.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from database.backends import SQLiteBackend
+from database.connection import DatabaseConnection, get_default_backend
+from database.id_allocator import ID_PREFIXES, IdAllocator
+from database.pool import ConnectionPool
+from repositories.billing_repository import BillingRepository
+from repositories.customer_repository import CustomerRepository
+from repositories.medicine_repository import MedicineRepository
+from tools.synthetic_data import SyntheticData, ZipfSampler
+
+TAX_RATE = Decimal("0.18")
+CENT = Decimal("0.01")
+
+# Error messages that mean the statement may succeed if simply run again
+RETRYABLE = ("deadlock", "lock wait timeout", "database is locked", "try restarting transaction")
+DUPLICATE = ("duplicate entry", "unique constraint")
+
+# Shared by every terminal thread of one process
+_connection = None
+_connection_lock = threading.Lock()
+_errors = threading.local()
+
+
+def get_connection(options):
+    """Return this process's DatabaseConnection, with a pool slot for every terminal"""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            backend = get_default_backend() if options.use_config else SQLiteBackend(options.sqlite)
+            pool = ConnectionPool(backend.connect, backend.is_healthy, max_size=options.terminals + 1,
+                                  timeout=30)
+            # Repositories report errors here instead of in message boxes
+            _connection = DatabaseConnection(backend=backend, pool=pool, error_reporter=record_error)
+        return _connection
+
+
+def record_error(title, message):
+    _errors.last = f"{title}: {message}"
+
+
+def take_error():
+    message = getattr(_errors, 'last', None)
+    _errors.last = None
+    return message or ""
+
+
+def random_id(name, rng):
+    # The scheme the forms used before ids came from id_sequences
+    return f"{ID_PREFIXES[name]}{rng.randint(1000, 9999)}"
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(values):
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.50), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3),
+        'max_ms': round(max(values), 3) if values else 0.0,
+    }
+
+
+def parse_range(value):
+    low, _, high = value.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 1 or high < low:
+        raise argparse.ArgumentTypeError("expected N or LOW-HIGH with 1 <= LOW <= HIGH")
+    return low, high
+
+
+class Terminal:
+    """One simulated checkout counter; run() returns its counters as a dict"""
+
+    def __init__(self, number, options, deadline):
+        self.number = number
+        self.options = options
+        self.deadline = deadline
+        self.rng = random.Random(f"{options.seed}:{number}")
+
+        self.db = get_connection(options)
+        self.billing_repo = BillingRepository(self.db)
+        self.medicine_repo = MedicineRepository(self.db)
+        self.customer_repo = CustomerRepository(self.db)
+        self.ids = IdAllocator(self.db)
+
+        self.checkout_ms = []
+        self.lookup_ms = []
+        self.saved = {}         # bill_id -> {medicine_id: units}
+        self.counts = {'checkouts': 0, 'failed': 0, 'stock_outs': 0, 'retries': 0, 'deadlocks': 0,
+                       'duplicate_ids': 0, 'new_customers': 0, 'customer_errors': 0}
+        self.errors = {}
+
+    def run(self):
+        medicines = [m for m in self.medicine_repo.get_all_medicines() if m['quantity'] > 0]
+        customers = [c['customer_id'] for c in self.customer_repo.get_all_customers()]
+        if not medicines or not customers:
+            raise RuntimeError("The database needs medicines and customers to simulate checkouts")
+        popular = ZipfSampler(len(medicines), self.options.zipf, self.rng)
+
+        while time.time() < self.deadline:
+            if self.options.checkouts and self.counts['checkouts'] + self.counts['failed'] \
+                    + self.counts['stock_outs'] >= self.options.checkouts:
+                break
+            if self.options.think_ms:
+                time.sleep(self.rng.expovariate(1000.0 / self.options.think_ms))
+
+            started = time.perf_counter()
+            customer_id = self.pick_customer(customers)
+            items = self.fill_basket(medicines, popular)
+            self.lookup_ms.append((time.perf_counter() - started) * 1000)
+            if customer_id and items:
+                self.checkout(customer_id, items)
+
+        self.counts['id_reservations'] = self.ids.reservations
+        return {
+            'terminal': self.number,
+            'counts': self.counts,
+            'errors': self.errors,
+            'checkout_ms': self.checkout_ms,
+            'lookup_ms': self.lookup_ms,
+            'saved': self.saved,
+        }
+
+    def new_id(self, name):
+        if self.options.ids == 'random':
+            return random_id(name, self.rng)
+        return self.ids.next_id(name)
+
+    def pick_customer(self, customers):
+        if self.rng.random() >= self.options.new_customers:
+            customer_id = self.rng.choice(customers)
+            return customer_id if self.customer_repo.get_customer_by_id(customer_id) else None
+
+        # A walk-in registered at the counter
+        customer = {
+            'customer_id': self.new_id('customer'),
+            'name': f"Walk-in {self.number}-{self.counts['new_customers'] + 1}",
+            'contact': f"9{self.rng.randint(100000000, 999999999)}",
+            'email': "",
+            'address': "",
+        }
+        if not customer['customer_id'] or not self.customer_repo.add_customer(customer):
+            self.counts['customer_errors'] += 1
+            self.note_error(take_error())
+            return None
+        self.counts['new_customers'] += 1
+        customers.append(customer['customer_id'])
+        return customer['customer_id']
+
+    def fill_basket(self, medicines, popular):
+        items = []
+        size = self.rng.randint(*self.options.basket)
+        for index in popular.sample_distinct(size):
+            name = medicines[index]['name']
+            self.medicine_repo.search_medicines('Name', name[:self.rng.randint(3, 6)])
+            medicine = self.medicine_repo.get_medicine_by_id(medicines[index]['medicine_id'])
+            if not medicine or medicine['quantity'] <= 0:
+                continue
+            quantity = min(self.rng.randint(*self.options.quantity), medicine['quantity'])
+            price = Decimal(str(medicine['price']))
+            items.append({
+                'medicine_id': medicine['medicine_id'],
+                'medicine_name': medicine['name'],
+                'quantity': quantity,
+                'price': price,
+                'amount': price * quantity,
+            })
+        return items
+
+    def checkout(self, customer_id, items):
+        subtotal = sum((item['amount'] for item in items), Decimal(0))
+        tax = (subtotal * TAX_RATE).quantize(CENT)
+        bill_data = {
+            'bill_id': self.new_id('bill'),
+            'customer_id': customer_id,
+            'date': datetime.date.today().strftime("%Y-%m-%d"),
+            'subtotal': subtotal,
+            'tax': tax,
+            'total': subtotal + tax,
+            'items': items,
+        }
+
+        started = time.perf_counter()
+        for attempt in range(self.options.retries + 1):
+            if not bill_data['bill_id']:
+                message = take_error()
+                self.note_error(message)
+                break
+            if self.billing_repo.create_bill(bill_data):
+                self.checkout_ms.append((time.perf_counter() - started) * 1000)
+                self.counts['checkouts'] += 1
+                units = {}
+                for item in items:
+                    units[item['medicine_id']] = units.get(item['medicine_id'], 0) + item['quantity']
+                self.saved[bill_data['bill_id']] = units
+                return
+
+            if self.billing_repo.last_shortfalls:
+                self.counts['stock_outs'] += 1
+                take_error()
+                return
+
+            message = take_error()
+            lowered = message.lower()
+            if any(text in lowered for text in DUPLICATE):
+                self.counts['duplicate_ids'] += 1
+                bill_data['bill_id'] = self.new_id('bill')
+            elif any(text in lowered for text in RETRYABLE):
+                self.counts['deadlocks'] += 1
+                time.sleep(self.rng.uniform(0.005, 0.05) * (attempt + 1))
+            else:
+                self.note_error(message)
+                break
+            if attempt < self.options.retries:
+                self.counts['retries'] += 1
+        else:
+            self.note_error("Gave up after retries: " + message)
+
+        self.counts['failed'] += 1
+
+    def note_error(self, message):
+        message = message.splitlines()[0][:200] if message else "unknown error"
+        self.errors[message] = self.errors.get(message, 0) + 1
+
+
+def run_terminal(number, options, deadline):
+    return Terminal(number, options, deadline).run()
+
+
+def stock_levels(db):
+    db.execute_query("SELECT medicine_id, quantity FROM medicines")
+    return {row['medicine_id']: int(row['quantity']) for row in db.fetch_all()}
+
+
+def saved_units(db, bill_ids, batch_size=500):
+    """Units per medicine on these bills as stored in bill_items, and the ids actually found"""
+    units = {}
+    found = set()
+    for start in range(0, len(bill_ids), batch_size):
+        batch = bill_ids[start:start + batch_size]
+        placeholders = ", ".join(["%s"] * len(batch))
+        db.execute_query(f"SELECT bill_id, medicine_id, quantity FROM bill_items WHERE bill_id IN ({placeholders})",
+                         tuple(batch))
+        for row in db.fetch_all():
+            found.add(row['bill_id'])
+            units[row['medicine_id']] = units.get(row['medicine_id'], 0) + int(row['quantity'])
+    db.rollback()
+    return units, found
+
+
+def check_stock(db, before, results):
+    """Return a list of stock-consistency violations found after the run"""
+    after = stock_levels(db)
+    saved = {}
+    for result in results:
+        saved.update(result['saved'])
+    bill_ids = sorted(saved)
+    stored, found = saved_units(db, bill_ids)
+
+    violations = []
+    for bill_id in bill_ids:
+        if bill_id not in found:
+            violations.append(f"{bill_id} was reported saved but has no items in the database")
+
+    reported = {}
+    for units in saved.values():
+        for medicine_id, quantity in units.items():
+            reported[medicine_id] = reported.get(medicine_id, 0) + quantity
+    for medicine_id, quantity in sorted(reported.items()):
+        if stored.get(medicine_id, 0) != quantity:
+            violations.append(f"{medicine_id}: terminals sold {quantity} units, bill_items hold "
+                              f"{stored.get(medicine_id, 0)}")
+
+    for medicine_id, quantity in sorted(after.items()):
+        if quantity < 0:
+            violations.append(f"{medicine_id}: stock is negative ({quantity})")
+        expected = before.get(medicine_id, quantity) - stored.get(medicine_id, 0)
+        if quantity != expected:
+            violations.append(f"{medicine_id}: stock {before.get(medicine_id)} - sold {stored.get(medicine_id, 0)} "
+                              f"should leave {expected}, found {quantity}")
+    return violations
+
+
+def prepare_sqlite(options):
+    """Fill the SQLite file with synthetic data unless it already has medicines"""
+    db = get_connection(options)
+    db.execute_query("SELECT COUNT(*) AS medicines FROM medicines")
+    row = db.fetch_one()
+    if row and row['medicines']:
+        return
+    print(f"Filling {options.sqlite} with synthetic data")
+    SyntheticData(options.medicines, max(1, options.medicines // 10), options.customers, options.history,
+                  seed=options.seed).populate(db)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent checkout counters")
+    parser.add_argument("--terminals", type=int, default=4, help="simulated counters")
+    parser.add_argument("--processes", action="store_true", help="one process per terminal instead of threads")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--checkouts", type=int, default=0, help="stop each terminal after this many bills")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean pause between customers")
+    parser.add_argument("--basket", type=parse_range, default=(1, 6), help="medicines per bill, N or LOW-HIGH")
+    parser.add_argument("--quantity", type=parse_range, default=(1, 3), help="units per line, N or LOW-HIGH")
+    parser.add_argument("--new-customers", type=float, default=0.1, help="share of walk-ins registered at the counter")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of medicine popularity")
+    parser.add_argument("--retries", type=int, default=3, help="retries after a deadlock or duplicate id")
+    parser.add_argument("--ids", choices=("allocator", "random"), default="allocator",
+                        help="take ids from id_sequences, or make them at random as the forms used to")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--use-config", action="store_true", help="use the database in config.py")
+    parser.add_argument("--sqlite", default="load_test.db", help="SQLite file to use otherwise")
+    parser.add_argument("--medicines", type=int, default=500, help="medicines to create in a new SQLite file")
+    parser.add_argument("--customers", type=int, default=1000, help="customers to create in a new SQLite file")
+    parser.add_argument("--history", type=int, default=5000, help="past bills to create in a new SQLite file")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if not args.use_config:
+        prepare_sqlite(args)
+    db = get_connection(args)
+    before = stock_levels(db)
+    db.rollback()
+
+    where = "configured database" if args.use_config else os.path.abspath(args.sqlite)
+    kind = "processes" if args.processes else "threads"
+    print(f"Running {args.terminals} terminals ({kind}) for {args.duration:g}s against {where}")
+
+    if args.processes:
+        # Spawned, not forked, so no child inherits this process's open connections
+        executor = ProcessPoolExecutor(max_workers=args.terminals, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.terminals)
+    started = time.time()
+    deadline = started + args.duration
+    with executor:
+        futures = [executor.submit(run_terminal, number, args, deadline) for number in range(1, args.terminals + 1)]
+        results = [future.result() for future in futures]
+    elapsed = time.time() - started
+
+    totals = {}
+    errors = {}
+    checkout_ms = []
+    lookup_ms = []
+    for result in results:
+        for name, count in result['counts'].items():
+            totals[name] = totals.get(name, 0) + count
+        for message, count in result['errors'].items():
+            errors[message] = errors.get(message, 0) + count
+        checkout_ms.extend(result['checkout_ms'])
+        lookup_ms.extend(result['lookup_ms'])
+
+    violations = check_stock(db, before, results)
+    report = {
+        'terminals': args.terminals,
+        'mode': kind,
+        'database': where,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(totals['checkouts'] / elapsed, 3) if elapsed else 0.0,
+        'counts': totals,
+        'checkout': latency_summary(checkout_ms),
+        'lookup': latency_summary(lookup_ms),
+        'errors': errors,
+        'stock_violations': violations,
+        'per_terminal': [dict(result['counts'], terminal=result['terminal']) for result in results],
+    }
+
+    checkout = report['checkout']
+    print(f"\n{totals['checkouts']} bills in {elapsed:.1f}s: {report['throughput_per_s']:.1f} bills/s")
+    print(f"Checkout latency: p50 {checkout['p50_ms']:.1f} ms, p95 {checkout['p95_ms']:.1f} ms, "
+          f"p99 {checkout['p99_ms']:.1f} ms, max {checkout['max_ms']:.1f} ms")
+    print(f"Lookups per basket: p50 {report['lookup']['p50_ms']:.1f} ms, p95 {report['lookup']['p95_ms']:.1f} ms")
+    print(f"Failed: {totals['failed']}, out of stock: {totals['stock_outs']}, retries: {totals['retries']} "
+          f"(deadlocks/lock timeouts: {totals['deadlocks']}, duplicate bill ids: {totals['duplicate_ids']})")
+    print(f"Walk-ins registered: {totals['new_customers']}, failed: {totals['customer_errors']}")
+    if args.ids == 'allocator':
+        print(f"Id blocks reserved: {totals['id_reservations']}")
+    for message, count in sorted(errors.items(), key=lambda item: -item[1]):
+        print(f"  {count:>6}  {message}")
+    if violations:
+        print(f"{len(violations)} stock consistency violation(s):")
+        for violation in violations[:50]:
+            print(f"  {violation}")
+    else:
+        print("Stock is consistent with the bills saved")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2)
+        print(f"Wrote report to {args.out}")
+
+    db.close()
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+"""Rebuild the daily_sales rollup from the bills table.
+
+    python -m tools.rebuild_sales_rollup [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+
+Without a range the whole history is recomputed.
+"""
+import argparse
+import datetime
+from database.connection import DatabaseConnection
+from repositories.report_repository import ReportRepository
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollup table")
+    parser.add_argument("--from", dest="from_date", type=parse_date, help="first day to rebuild")
+    parser.add_argument("--to", dest="to_date", type=parse_date, help="last day to rebuild")
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    report_repo = ReportRepository(db)
+
+    if not report_repo.rebuild_daily_sales(args.from_date, args.to_date):
+        return 1
+
+    days = report_repo.get_daily_sales(args.from_date, args.to_date)
+    print(f"Rebuilt daily sales for {len(days)} day(s)")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+"""Fill a database with deterministic synthetic pharmacy data.
+
+    python -m tools.synthetic_data synthetic.db --medicines 2000 --customers 5000 --bills 50000
+
+Creates suppliers, medicines, customers, supplies and bills following
+database_schema.md, then rebuilds the sales rollups. The same seed always
+gives the same rows. Items on a bill are drawn from a Zipf distribution,
+so a few medicines sell on most bills and the long tail sells rarely, as
+at a real counter.
+"""
+import argparse
+import bisect
+import datetime
+import itertools
+import random
+from decimal import Decimal
+from database.backends import SQLiteBackend
+from database.connection import DatabaseConnection
+from repositories.report_repository import ReportRepository
+
+TAX_RATE = Decimal("0.18")
+CENT = Decimal("0.01")
+
+# Rows written per execute_many call
+BATCH_SIZE = 1000
+
+MEDICINE_STEMS = ["Paracetamol", "Amoxicillin", "Cetirizine", "Ibuprofen", "Metformin", "Azithromycin",
+                  "Omeprazole", "Pantoprazole", "Amlodipine", "Atorvastatin", "Losartan", "Diclofenac",
+                  "Ranitidine", "Levocetirizine", "Montelukast", "Dolo", "Calpol", "Cefixime",
+                  "Ofloxacin", "Domperidone", "Ondansetron", "Telmisartan", "Glimepiride", "Vitamin C"]
+MEDICINE_FORMS = ["Tablets", "Capsules", "Syrup", "Suspension", "Drops", "Ointment", "Injection"]
+STRENGTHS = ["50mg", "100mg", "250mg", "500mg", "650mg", "5ml", "10ml", "1g"]
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Anjali", "Rohan", "Kavya", "Arjun", "Meera",
+               "Sanjay", "Pooja", "Amit", "Neha", "Karan", "Divya", "Suresh", "Lakshmi", "Ravi", "Asha"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Khan", "Das", "Joshi",
+              "Mehta", "Rao", "Kulkarni", "Chopra", "Verma", "Pillai", "Bose", "Shetty", "Menon", "Jain"]
+CITIES = ["Mumbai", "Pune", "Bengaluru", "Chennai", "Hyderabad", "Delhi", "Kolkata", "Ahmedabad"]
+SUPPLIER_KINDS = ["Pharma", "Healthcare", "Distributors", "Medicals", "Lifesciences", "Drug House"]
+
+
+class ZipfSampler:
+    """Draw indexes 0..n-1 where the k-th most popular has weight 1 / k**s.
+
+    Popularity ranks are shuffled over the indexes with rng, so the best
+    sellers are not simply the first ids.
+    """
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.order = list(range(n))
+        rng.shuffle(self.order)
+        self.cumulative = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+    def sample(self):
+        rank = bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.order[min(rank, len(self.order) - 1)]
+
+    def sample_distinct(self, count):
+        count = min(count, len(self.order))
+        chosen = []
+        while len(chosen) < count:
+            index = self.sample()
+            if index not in chosen:
+                chosen.append(index)
+        return chosen
+
+
+def money(value):
+    return Decimal(value).quantize(CENT)
+
+
+class SyntheticData:
+    """Deterministic suppliers, medicines, customers, supplies and bills.
+
+    Rows are built lazily in the shape the tables take, so large data sets
+    are written batch by batch. Bills are spread over the days days up to
+    end_date, in date order, with ids BILL-000001 upwards.
+    """
+
+    def __init__(self, medicines=500, suppliers=50, customers=1000, bills=5000, seed=1,
+                 items_per_bill=(1, 8), zipf_s=1.1, days=365, end_date=datetime.date(2025, 3, 31)):
+        self.medicine_count = medicines
+        self.supplier_count = suppliers
+        self.customer_count = customers
+        self.bill_count = bills
+        self.seed = seed
+        self.items_per_bill = items_per_bill
+        self.zipf_s = zipf_s
+        self.days = days
+        self.end_date = end_date
+
+        rng = random.Random(seed)
+        self.supplier_ids = [f"SUP{n:05d}" for n in range(1, suppliers + 1)]
+        self.customer_ids = [f"CUST{n:06d}" for n in range(1, customers + 1)]
+        self.medicine_ids = [f"MED{n:05d}" for n in range(1, medicines + 1)]
+        self.medicine_names = [
+            f"{rng.choice(MEDICINE_STEMS)} {rng.choice(STRENGTHS)} {rng.choice(MEDICINE_FORMS)} {n}"
+            for n in range(1, medicines + 1)
+        ]
+        self.prices = [money(rng.uniform(5, 800)) for _ in range(medicines)]
+        self.customer_names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(customers)]
+
+    def rng(self, part):
+        """A generator of its own for each table, so changing one count leaves the others' rows alone"""
+        return random.Random(f"{self.seed}:{part}")
+
+    def popularity(self, rng):
+        return ZipfSampler(self.medicine_count, self.zipf_s, rng)
+
+    def suppliers(self):
+        rng = self.rng("suppliers")
+        for n, supplier_id in enumerate(self.supplier_ids, 1):
+            city = rng.choice(CITIES)
+            yield (supplier_id, f"{rng.choice(LAST_NAMES)} {rng.choice(SUPPLIER_KINDS)} {n}",
+                   f"9{rng.randint(100000000, 999999999)}", f"orders{n}@supplier.example",
+                   f"{rng.randint(1, 400)} Industrial Area, {city}")
+
+    def medicines(self):
+        rng = self.rng("medicines")
+        start = self.end_date
+        for index, medicine_id in enumerate(self.medicine_ids):
+            expiry = start + datetime.timedelta(days=rng.randint(30, 1100))
+            yield (medicine_id, self.medicine_names[index], rng.choice(self.supplier_ids), self.prices[index],
+                   rng.randint(2000, 20000), expiry, f"Rack {rng.choice('ABCDEFGH')}{rng.randint(1, 20)}",
+                   "Synthetic test medicine")
+
+    def customers(self):
+        rng = self.rng("customers")
+        for index, customer_id in enumerate(self.customer_ids):
+            yield (customer_id, self.customer_names[index], f"9{rng.randint(100000000, 999999999)}",
+                   f"customer{index + 1}@mail.example",
+                   f"{rng.randint(1, 999)} Main Road, {rng.choice(CITIES)}")
+
+    def supplies(self, per_medicine=2):
+        rng = self.rng("supplies")
+        first_day = self.end_date - datetime.timedelta(days=self.days - 1)
+        for index, medicine_id in enumerate(self.medicine_ids):
+            for _ in range(per_medicine):
+                quantity = rng.randint(100, 2000)
+                cost = money(self.prices[index] * quantity * Decimal("0.7"))
+                supply_date = first_day + datetime.timedelta(days=rng.randrange(self.days))
+                yield (rng.choice(self.supplier_ids), medicine_id, quantity, cost, supply_date)
+
+    def bills(self):
+        """Yield bill_data dicts in the shape BillingRepository.create_bill takes, oldest first"""
+        rng = self.rng("bills")
+        popular = self.popularity(rng)
+        customers = ZipfSampler(self.customer_count, 0.8, rng)
+        first_day = self.end_date - datetime.timedelta(days=self.days - 1)
+        offsets = sorted(rng.randrange(self.days) for _ in range(self.bill_count))
+
+        for n, offset in enumerate(offsets, 1):
+            yield self.make_bill(f"BILL-{n:06d}", self.customer_ids[customers.sample()],
+                                 first_day + datetime.timedelta(days=offset), popular, rng)
+
+    def make_bill(self, bill_id, customer_id, bill_date, popular, rng):
+        items = []
+        for index in popular.sample_distinct(rng.randint(*self.items_per_bill)):
+            quantity = rng.choice((1, 1, 1, 2, 2, 3, 5, 10))
+            price = self.prices[index]
+            items.append({
+                'medicine_id': self.medicine_ids[index],
+                'medicine_name': self.medicine_names[index],
+                'quantity': quantity,
+                'price': price,
+                'amount': price * quantity,
+            })
+        subtotal = sum((item['amount'] for item in items), Decimal(0))
+        tax = money(subtotal * TAX_RATE)
+        return {
+            'bill_id': bill_id,
+            'customer_id': customer_id,
+            'date': bill_date,
+            'items': items,
+            'subtotal': subtotal,
+            'tax': tax,
+            'total': subtotal + tax,
+        }
+
+    def populate(self, db, progress=None):
+        """Write every table through db and rebuild the rollups; returns the row counts"""
+        counts = {}
+        tables = [
+            ('suppliers', "INSERT INTO suppliers (supplier_id, name, contact, email, address) "
+                          "VALUES (%s, %s, %s, %s, %s)", self.suppliers()),
+            ('medicines', "INSERT INTO medicines (medicine_id, name, supplier_id, price, quantity, "
+                          "expiry_date, location, description) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+             self.medicines()),
+            ('customers', "INSERT INTO customers (customer_id, name, contact, email, address) "
+                          "VALUES (%s, %s, %s, %s, %s)", self.customers()),
+            ('supplies', "INSERT INTO supplies (supplier_id, medicine_id, quantity, amount, supply_date) "
+                         "VALUES (%s, %s, %s, %s, %s)", self.supplies()),
+        ]
+        for table, query, rows in tables:
+            counts[table] = self.write(db, query, rows)
+            if progress:
+                progress(table, counts[table])
+
+        counts['bills'] = counts['bill_items'] = 0
+        bills = self.bills()
+        while True:
+            batch = list(itertools.islice(bills, BATCH_SIZE))
+            if not batch:
+                break
+            headers = [(bill['bill_id'], bill['customer_id'], bill['date'], bill['subtotal'], bill['tax'],
+                        bill['total']) for bill in batch]
+            items = [(bill['bill_id'], item['medicine_id'], item['quantity'], item['price'], item['amount'])
+                     for bill in batch for item in bill['items']]
+            if not (db.execute_many("INSERT INTO bills (bill_id, customer_id, bill_date, subtotal, tax, total) "
+                                    "VALUES (%s, %s, %s, %s, %s, %s)", headers)
+                    and db.execute_many("INSERT INTO bill_items (bill_id, medicine_id, quantity, price, amount) "
+                                        "VALUES (%s, %s, %s, %s, %s)", items)):
+                db.rollback()
+                raise RuntimeError("Writing synthetic bills failed")
+            db.commit()
+            counts['bills'] += len(headers)
+            counts['bill_items'] += len(items)
+        if progress:
+            progress('bills', counts['bills'])
+
+        if not ReportRepository(db).rebuild_daily_sales():
+            raise RuntimeError("Rebuilding the sales rollups failed")
+        return counts
+
+    def write(self, db, query, rows):
+        written = 0
+        while True:
+            batch = list(itertools.islice(rows, BATCH_SIZE))
+            if not batch:
+                return written
+            if not db.execute_many(query, batch):
+                db.rollback()
+                raise RuntimeError(f"Writing synthetic rows failed: {query.split('(')[0].strip()}")
+            db.commit()
+            written += len(batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic data to an SQLite database")
+    parser.add_argument("path", help="SQLite file to create or add to")
+    parser.add_argument("--medicines", type=int, default=500)
+    parser.add_argument("--suppliers", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--bills", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365, help="days of history the bills cover")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of item popularity")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    data = SyntheticData(args.medicines, args.suppliers, args.customers, args.bills, seed=args.seed,
+                         zipf_s=args.zipf, days=args.days)
+    db = DatabaseConnection(backend=SQLiteBackend(args.path))
+    try:
+        data.populate(db, progress=lambda table, rows: print(f"{table}: {rows} rows"))
+    except RuntimeError as e:
+        print(e)
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())